@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会议分析导出
+将 saved_meetings/ 增量导出为按日期分区的 Arrow IPC 文件（需要安装 pyarrow），并提供常用统计
+
+用法（在 backend 目录下）:
+    python analytics_export.py                 # 增量导出上次之后保存的会议
+    python analytics_export.py --rebuild       # 删除已导出的文件并从头导出
+    python analytics_export.py --summary --start 2026-01-01 --end 2026-01-31
+
+导出目录为 ANALYTICS_EXPORT_DIR（默认 saved_meetings/_analytics），包含 meetings 和 turns 两张表，
+在 Python 中可用 services.analytics_service.read_table() 以内存映射方式读取。
+"""
+
+import os
+import sys
+import json
+import argparse
+
+# 添加当前目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils import setup_console_encoding
+from config import config
+from logging_config import setup_logging
+from services.analytics_service import AnalyticsExporter, summarize
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='会议分析导出')
+    parser.add_argument('--save-dir', default=config.meetings_save_dir, help='已保存会议目录')
+    parser.add_argument('--export-dir', default=config.analytics.export_dir, help='导出目录')
+    parser.add_argument('--rebuild', action='store_true', help='删除已导出的文件并从头导出')
+    parser.add_argument('--summary', action='store_true', help='只输出跨会议统计，不导出')
+    parser.add_argument('--start', help='统计的起始日期（YYYY-MM-DD）')
+    parser.add_argument('--end', help='统计的结束日期（YYYY-MM-DD）')
+    args = parser.parse_args()
+
+    setup_console_encoding()
+    setup_logging(log_level='WARNING', enable_console=True, enable_file=False)
+
+    if args.summary:
+        result = summarize(args.export_dir, args.start, args.end)
+    else:
+        exporter = AnalyticsExporter(args.save_dir, args.export_dir)
+        result = exporter.rebuild() if args.rebuild else exporter.export()
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,34 +8,61 @@
 
 import os
 import sys
-from flask import Flask
-from flask_cors import CORS
-from flask_socketio import SocketIO
-
-from utils import setup_console_encoding
+import time
 
 # 添加当前目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# eventlet/gevent 模式必须在导入 Flask 等模块之前打补丁（config 只依赖标准库，可以先导入）
 from config import config
+from async_runtime import monkey_patch
+monkey_patch(config.websocket.async_mode)
+
+from flask import Flask
+from flask_cors import CORS
+from flask_socketio import SocketIO
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from utils import setup_console_encoding
 from logging_config import setup_logging, get_logger
-from routes import meeting_bp
+from routes import meeting_bp, admin_bp, auth_bp, job_bp
+from routes.meeting_routes import get_meeting_service
 from routes.websocket_routes import register_websocket_events
-from services.meeting_service import MeetingService
+from services.wechat_service import get_wechat_service
 
-# 设置控制台编码
-setup_console_encoding()
+# 导入阶段不做任何初始化工作，日志、目录等在 bootstrap() 中完成
+logger = get_logger('multi_agent_meeting')
 
-# 设置日志
-logger = setup_logging(
-    log_level=config.logging.level,
-    enable_console=config.logging.enable_console,
-    enable_file=config.logging.enable_file
-)
+# 是否已完成进程级初始化
+_bootstrapped = False
+
+
+def bootstrap():
+    """进程级初始化（控制台编码、运行目录、日志），只执行一次"""
+    global _bootstrapped
+    if _bootstrapped:
+        return
+    _bootstrapped = True
+    
+    # 设置控制台编码
+    setup_console_encoding()
+    
+    # 确保运行目录存在
+    config.ensure_directories()
+    
+    # 设置日志
+    setup_logging(
+        log_level=config.logging.level,
+        max_file_size=config.logging.max_file_size,
+        backup_count=config.logging.backup_count,
+        enable_console=config.logging.enable_console,
+        enable_file=config.logging.enable_file
+    )
+    
+    logger.info("=" * 60)
+    logger.info("多智能体会议系统后端启动")
+    logger.info("=" * 60)
 
-logger.info("=" * 60)
-logger.info("多智能体会议系统后端启动")
-logger.info("=" * 60)
 
 def create_app():
     """创建Flask应用"""
@@ -51,6 +78,9 @@ def create_app():
     
     # 注册蓝图
     app.register_blueprint(meeting_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(job_bp)
     logger.info("API路由注册完成")
     
     # 创建SocketIO实例
@@ -71,16 +101,27 @@ def create_app():
     logger.info(f"SocketIO配置: async_mode={config.websocket.async_mode}")
     logger.info(f"WebSocket优化: compression={config.websocket.http_compression}, manage_session={config.websocket.manage_session}")
     
+    # 反向代理后按转发头还原客户端地址（包在Socket.IO中间件外层，握手请求同样生效），匿名用户的准入配额按各自地址计算
+    if config.proxy_trusted_hops:
+        hops = config.proxy_trusted_hops
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+        logger.info(f"信任反向代理转发头: hops={hops}")
+    
     # 注册WebSocket事件
     register_websocket_events(socketio)
     
-    # 创建全局会议服务实例
-    meeting_service = MeetingService()
-    
-    # 将服务实例添加到应用上下文
-    app.meeting_service = meeting_service
+    # 将服务实例添加到应用上下文（与路由共用同一个会议服务实例）
+    app.meeting_service = get_meeting_service()
     app.socketio = socketio
     
+    # 在后台预热模型实例，不阻塞worker启动
+    if config.meeting.prewarm_agents:
+        app.meeting_service.agent_service.prewarm_async(config.api_keys)
+    
+    # 启动登录会话清理线程，并在后台预生成登录二维码
+    if config.wechat.enable_login:
+        get_wechat_service()
+    
     logger.info("Flask应用创建完成")
     return app, socketio
 
@@ -112,9 +153,9 @@ def print_startup_info():
     logger.info(f"  日志级别: {config.logging.level}")
     logger.info(f"  WebSocket异步模式: {config.websocket.async_mode}")
     
-    logger.info("API密钥配置:")
+    logger.info(f"API密钥配置（密钥池，每密钥并发上限: {config.api_key_max_in_flight or '不限制'}）:")
     for i, key in enumerate(config.api_keys):
-        logger.info(f"  智能体{i+1}: {key[:10]}...")
+        logger.info(f"  密钥{i+1}: {key[:10]}...")
     
     logger.info("目录配置:")
     logger.info(f"  日志目录: {config.logs_dir}")
@@ -125,6 +166,9 @@ def print_startup_info():
 
 def create_gunicorn_app():
     """为gunicorn创建应用实例"""
+    boot_start = time.perf_counter()
+    bootstrap()
+    
     # 验证环境
     if not validate_environment():
         logger.error("环境验证失败，程序退出")
@@ -139,11 +183,17 @@ def create_gunicorn_app():
     # 将socketio实例添加到app中，供gunicorn使用
     app.socketio = socketio
     
+    boot_ms = (time.perf_counter() - boot_start) * 1000
+    app.boot_time_ms = boot_ms
+    logger.info(f"worker启动完成: pid={os.getpid()}, 耗时={boot_ms:.1f}ms")
+    
     return app
 
 
 def main():
     """主函数"""
+    bootstrap()
+    
     try:
         # 验证环境
         if not validate_environment():
@@ -160,8 +210,17 @@ def main():
         logger.info("启动Web服务器...")
         
         # 检查是否为生产环境
-        if not config.flask_debug:
-            logger.info("生产环境模式 - 使用生产服务器配置")
+        if not config.flask_debug and config.websocket.async_mode != 'threading':
+            # eventlet/gevent 模式使用对应的协程WSGI服务器
+            logger.info(f"生产环境模式 - 使用 {config.websocket.async_mode} 服务器")
+            socketio.run(
+                app,
+                host=config.flask_host,
+                port=config.flask_port,
+                debug=False
+            )
+        elif not config.flask_debug:
+            logger.warning("生产环境模式 - threading 模式使用Werkzeug服务器，建议设置 WEBSOCKET_ASYNC_MODE=eventlet 或 gevent")
             # 生产环境设置
             socketio.run(
                 app, 
@@ -190,8 +249,18 @@ def main():
     return 0
 
 
-# 创建gunicorn应用实例
-app = create_gunicorn_app()
+# gunicorn应用实例（gunicorn 通过 `app_new:app` 访问时才创建，导入本模块不会创建应用）
+_gunicorn_app = None
+
+
+def __getattr__(name):
+    """模块级延迟属性（PEP 562）"""
+    global _gunicorn_app
+    if name == 'app':
+        if _gunicorn_app is None:
+            _gunicorn_app = create_gunicorn_app()
+        return _gunicorn_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+协程运行时模块
+eventlet/gevent 模式下在导入其他模块之前打猴子补丁（socket、threading、time 等变为协程版本，
+模型调用、长轮询和 WebSocket 都在协程中等待），并提供 run_blocking 将文件读写、numpy/pyarrow
+计算等会阻塞事件循环的操作放到原生线程池中执行。threading 模式下均为直接调用。
+"""
+
+import importlib
+from typing import Any, Callable, TypeVar
+
+ASYNC_MODES = ('threading', 'eventlet', 'gevent')
+
+# 各模式需要安装的包
+_MODE_PACKAGES = {
+    'eventlet': 'eventlet',
+    'gevent': 'gevent gevent-websocket'
+}
+
+T = TypeVar('T')
+
+# 已生效的协程模式（未打补丁时为 threading）
+_active_mode = 'threading'
+
+
+def _require(mode: str) -> Any:
+    """导入协程库（可选依赖）"""
+    try:
+        if mode == 'eventlet':
+            import eventlet
+            return eventlet
+        import gevent
+        return gevent
+    except ImportError:
+        raise RuntimeError(f"{mode} 模式需要安装 {mode} 包: pip install {_MODE_PACKAGES[mode]}")
+
+
+def _already_patched(mode: str) -> bool:
+    """是否已由服务器（如 gunicorn 的 eventlet/gevent worker）打过补丁"""
+    if mode == 'eventlet':
+        import eventlet.patcher
+        return eventlet.patcher.is_monkey_patched('socket')
+    import gevent.monkey
+    return gevent.monkey.is_module_patched('socket')
+
+
+def monkey_patch(mode: str) -> str:
+    """
+    按异步模式打猴子补丁（必须在导入 Flask、CAMEL 等模块之前调用，重复调用无副作用）
+
+    Args:
+        mode: threading / eventlet / gevent
+
+    Returns:
+        生效的模式
+    """
+    global _active_mode
+    if mode not in ASYNC_MODES:
+        raise ValueError(f"未知的异步模式: {mode}")
+    if mode == 'threading' or _active_mode == mode:
+        return _active_mode
+
+    _require(mode)
+    if not _already_patched(mode):
+        if mode == 'eventlet':
+            import eventlet
+            eventlet.monkey_patch()
+        else:
+            from gevent import monkey
+            monkey.patch_all()
+    _active_mode = mode
+    return mode
+
+
+def active_mode() -> str:
+    """已生效的协程模式"""
+    return _active_mode
+
+
+def is_green() -> bool:
+    """是否运行在协程模式下"""
+    return _active_mode != 'threading'
+
+
+def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    在原生线程池中执行会阻塞事件循环的函数，当前协程等待结果，其他协程继续运行
+
+    func 在原生线程中执行，不能获取会与协程竞争的锁（打补丁后 threading 的锁是协程锁），
+    只用于文件读写、序列化和 numpy/pyarrow 计算等自包含的操作。threading 模式下直接调用。
+    """
+    if _active_mode == 'eventlet':
+        from eventlet import tpool
+        return tpool.execute(func, *args, **kwargs)
+    if _active_mode == 'gevent':
+        import gevent
+        return gevent.get_hub().threadpool.apply(func, args, kwargs)
+    return func(*args, **kwargs)
+
+
+def original(module_name: str, attribute: str) -> Any:
+    """未打补丁的原始函数（如 time.sleep、_thread.get_ident），供原生线程中使用"""
+    if _active_mode == 'eventlet':
+        import eventlet.patcher
+        return getattr(eventlet.patcher.original(module_name), attribute)
+    if _active_mode == 'gevent':
+        import gevent.monkey
+        return gevent.monkey.get_original(module_name, attribute)
+    return getattr(importlib.import_module(module_name), attribute)
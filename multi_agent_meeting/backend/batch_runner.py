@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量会议运行器
+不启动Web服务，直接通过 MeetingService 离线运行大量会议（评测集、夜间报告等）
+
+用法（在 backend 目录下）:
+    python batch_runner.py meetings.jsonl
+    python batch_runner.py meetings.yaml --workers 8 --per-key-limit 2
+    python batch_runner.py meetings.jsonl --mode process --workers 4 --output-dir /data/meetings
+
+输入文件每条会议配置包含 topic、background、agents（[{role, description}, ...]），
+可选 id（用于断点续跑，缺省时按内容生成）和 user_id。JSONL 每行一条；YAML 为列表，
+或包含 meetings 列表的字典。
+
+运行结果保存在 saved_meetings/（或 --output-dir），每完成一场会议向状态文件追加一行，
+中断后重新执行同一命令会跳过已成功的会议。
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Any, Iterator
+
+# 添加当前目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils import setup_console_encoding
+from config import config
+from logging_config import setup_logging, get_logger
+from models import MeetingConfig
+from services.meeting_service import MeetingService
+
+logger = get_logger('batch_runner')
+
+# 单场会议最多驱动的发言次数（防止异常情况下死循环）
+DEFAULT_MAX_STEPS = 200
+
+
+class KeyConcurrencyLimiter:
+    """按API密钥限制同时进行的模型调用数量"""
+
+    def __init__(self, limit: int, semaphores: Optional[Dict[str, Any]] = None):
+        self.limit = limit
+        # 进程池模式下由主进程创建共享信号量后传入
+        self._semaphores: Dict[str, Any] = semaphores if semaphores is not None else {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, api_key: str) -> Any:
+        semaphore = self._semaphores.get(api_key)
+        if semaphore is None:
+            with self._lock:
+                semaphore = self._semaphores.get(api_key)
+                if semaphore is None:
+                    semaphore = self._semaphores[api_key] = threading.BoundedSemaphore(self.limit)
+        return semaphore
+
+    @contextmanager
+    def __call__(self, api_key: str) -> Iterator[None]:
+        semaphore = self._semaphore(api_key)
+        semaphore.acquire()
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+def load_meeting_configs(path: str) -> List[Dict[str, Any]]:
+    """读取JSONL或YAML格式的会议配置，并为每条配置确定 id"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise RuntimeError("读取YAML需要安装 PyYAML: pip install pyyaml")
+            data = yaml.safe_load(f) or []
+            items = data.get('meetings', []) if isinstance(data, dict) else data
+        else:
+            items = [json.loads(line) for line in f if line.strip()]
+
+    jobs = []
+    for index, item in enumerate(items):
+        job = dict(item)
+        if not job.get('id'):
+            digest = hashlib.sha1(json.dumps(item, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+            job['id'] = f"{index}_{digest[:10]}"
+        jobs.append(job)
+    return jobs
+
+
+def load_completed_ids(state_file: str) -> Dict[str, Dict[str, Any]]:
+    """读取状态文件中已成功的会议"""
+    completed = {}
+    if not os.path.exists(state_file):
+        return completed
+
+    with open(state_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # 中断时可能写了半行
+            if record.get('status') == 'success':
+                completed[record['id']] = record
+    return completed
+
+
+def drive_meeting(service: MeetingService, max_steps: int = DEFAULT_MAX_STEPS) -> Dict[str, Any]:
+    """
+    按前端的发言流程驱动会议直至结束（CEO开场 -> 智能体依次发言或分组讨论 -> CEO总结 ...）
+
+    Returns:
+        最后一次发言结果
+    """
+    result = service.ceo_speak()
+    for _ in range(max_steps):
+        if result.get('status') != 'success':
+            if result.get('should_ceo_speak'):
+                result = service.ceo_speak()
+                continue
+            break
+
+        if result.get('meeting_should_end') or result.get('meeting_ended'):
+            break
+
+        next_speaker_id = result['next_speaker_id']
+        if result.get('breakout'):
+            # 大规模会议：CEO发言后进行分组讨论
+            result = service.breakout_round()
+        elif next_speaker_id == config.meeting.ceo_agent_id:
+            result = service.ceo_speak()
+        else:
+            result = service.agent_speak(next_speaker_id)
+    return result
+
+
+def run_meeting_job(job: Dict[str, Any], max_steps: int = DEFAULT_MAX_STEPS,
+                    limiter: Optional[KeyConcurrencyLimiter] = None) -> Dict[str, Any]:
+    """运行单场会议并保存，返回写入状态文件的记录"""
+    start_time = time.time()
+    record: Dict[str, Any] = {'id': job['id'], 'topic': job.get('topic', '')}
+
+    service = MeetingService()
+    service.agent_service.key_limiter = limiter or _worker_limiter
+
+    try:
+        meeting_config = MeetingConfig(
+            topic=job.get('topic', ''),
+            background=job.get('background', ''),
+            agents=job.get('agents', [])
+        )
+        errors = meeting_config.validate()
+        if errors:
+            raise ValueError("; ".join(errors))
+
+        if not service.initialize_meeting(meeting_config, user_id=job.get('user_id')):
+            raise RuntimeError("会议初始化失败")
+
+        last_result = drive_meeting(service, max_steps)
+        if last_result.get('status') != 'success':
+            raise RuntimeError(last_result.get('error', '会议运行失败'))
+
+        end_result = service.end_meeting()
+        if end_result.get('status') != 'success':
+            raise RuntimeError(end_result.get('error', '结束会议失败'))
+
+        usage = end_result.get('token_usage', {}).get('total', {})
+        record.update({
+            'status': 'success',
+            'meeting_id': service.state.meeting_id,
+            'messages': end_result.get('total_messages', 0),
+            'rounds': end_result.get('total_rounds', 0),
+            'total_tokens': usage.get('total_tokens', 0),
+            'cached_tokens': usage.get('cached_tokens', 0)
+        })
+
+    except Exception as e:
+        logger.error(f"批量会议运行失败: id={job['id']}, error={e}")
+        record.update({'status': 'failed', 'error': str(e)})
+
+    finally:
+        service.agent_service.clear_agents()
+
+    record['duration'] = round(time.time() - start_time, 3)
+    return record
+
+
+# 进程池worker内的并发限制器与配置（由 _init_worker 设置）
+_worker_limiter: Optional[KeyConcurrencyLimiter] = None
+
+
+def _init_worker(per_key_limit: int, semaphores: Dict[str, Any], output_dir: str, log_level: str) -> None:
+    """进程池worker初始化"""
+    global _worker_limiter
+    _worker_limiter = KeyConcurrencyLimiter(per_key_limit, semaphores)
+    config.meetings_save_dir = output_dir
+    config.ensure_directories()
+    setup_logging(log_level=log_level, enable_console=False, enable_file=config.logging.enable_file)
+
+
+class ThroughputStats:
+    """吞吐统计"""
+
+    def __init__(self, total: int, skipped: int):
+        self.total = total
+        self.skipped = skipped
+        self.succeeded = 0
+        self.failed = 0
+        self.messages = 0
+        self.tokens = 0
+        self.start_time = time.time()
+
+    def add(self, record: Dict[str, Any]) -> None:
+        if record['status'] == 'success':
+            self.succeeded += 1
+            self.messages += record.get('messages', 0)
+            self.tokens += record.get('total_tokens', 0)
+        else:
+            self.failed += 1
+
+    def line(self) -> str:
+        elapsed = max(time.time() - self.start_time, 1e-6)
+        done = self.succeeded + self.failed
+        return (f"[{done + self.skipped}/{self.total}] 成功 {self.succeeded}, 失败 {self.failed}, 跳过 {self.skipped} | "
+                f"{done * 60 / elapsed:.2f} 场/分钟, {self.messages / elapsed:.2f} 条发言/秒, "
+                f"{self.tokens / elapsed:.0f} 令牌/秒, 用时 {elapsed:.1f}s")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='批量离线运行多智能体会议')
+    parser.add_argument('input', help='会议配置文件（.jsonl / .yaml / .yml）')
+    parser.add_argument('--workers', type=int, default=4, help='同时运行的会议数')
+    parser.add_argument('--mode', choices=['thread', 'process'], default='thread', help='并发方式')
+    parser.add_argument('--per-key-limit', type=int, default=2, help='每个API密钥同时进行的调用数')
+    parser.add_argument('--max-steps', type=int, default=DEFAULT_MAX_STEPS, help='单场会议最多发言次数')
+    parser.add_argument('--output-dir', default=config.meetings_save_dir, help='会议保存目录')
+    parser.add_argument('--state-file', help='断点续跑状态文件（默认保存在输出目录）')
+    parser.add_argument('--log-level', default='WARNING', help='日志级别')
+    args = parser.parse_args()
+
+    setup_console_encoding()
+    config.meetings_save_dir = os.path.abspath(args.output_dir)
+    config.ensure_directories()
+    setup_logging(log_level=args.log_level, enable_console=True, enable_file=config.logging.enable_file)
+
+    jobs = load_meeting_configs(args.input)
+    input_name = os.path.splitext(os.path.basename(args.input))[0]
+    state_file = args.state_file or os.path.join(config.meetings_save_dir, f"batch_{input_name}.state.jsonl")
+    completed = load_completed_ids(state_file)
+    pending = [job for job in jobs if job['id'] not in completed]
+
+    stats = ThroughputStats(total=len(jobs), skipped=len(jobs) - len(pending))
+    print(f"共 {len(jobs)} 场会议，已完成 {stats.skipped} 场，待运行 {len(pending)} 场 "
+          f"(mode={args.mode}, workers={args.workers}, per_key_limit={args.per_key_limit})")
+    print(f"状态文件: {state_file}")
+
+    if args.mode == 'process':
+        import multiprocessing
+        manager = multiprocessing.Manager()
+        semaphores = {key: manager.BoundedSemaphore(args.per_key_limit) for key in dict.fromkeys(config.api_keys)}
+        executor = ProcessPoolExecutor(
+            max_workers=args.workers,
+            initializer=_init_worker,
+            initargs=(args.per_key_limit, semaphores, config.meetings_save_dir, args.log_level)
+        )
+        limiter = None
+    else:
+        executor = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix='batch-meeting')
+        limiter = KeyConcurrencyLimiter(args.per_key_limit)
+
+    interrupted = False
+    with open(state_file, 'a', encoding='utf-8') as state:
+        futures = [executor.submit(run_meeting_job, job, args.max_steps, limiter) for job in pending]
+        try:
+            for future in as_completed(futures):
+                record = future.result()
+                state.write(json.dumps(record, ensure_ascii=False) + '\n')
+                state.flush()
+                stats.add(record)
+                print(stats.line())
+        except KeyboardInterrupt:
+            interrupted = True
+            print("收到中断信号，等待进行中的会议结束后退出（重新运行同一命令可继续）")
+            for future in futures:
+                future.cancel()
+        finally:
+            executor.shutdown(wait=True)
+
+    print(f"完成: {stats.line()}")
+    return 130 if interrupted else (1 if stats.failed else 0)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
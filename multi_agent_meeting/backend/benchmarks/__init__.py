@@ -0,0 +1,6 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能基准模块
+在 backend 目录下以 `python -m benchmarks.<name>` 方式运行
+"""
@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步模式基准
+
+用法（在 backend 目录下）:
+    python -m benchmarks.async_modes                                   # 对比 threading/eventlet/gevent
+    python -m benchmarks.async_modes --modes threading eventlet --meetings 200 --connections 1000
+    python -m benchmarks.async_modes --latency 0.2 --skip-sockets --json
+
+每种模式在独立的子进程中运行（协程模式必须在导入其他模块之前打补丁），单个进程相当于一个worker：
+- 并发会议：同时进行 --meetings 场会议，模型调用由合成的回放记录代替，每次调用等待 --latency 秒
+  模拟模型响应时间，会议结束时保存到临时目录；统计总耗时、每秒完成会议数、进程内存峰值和
+  事件循环延迟（10ms心跳的最大滞后，协程模式下反映是否有操作阻塞了事件循环）。
+- 并发连接：子进程按该模式启动Web服务器，本进程同时建立 --connections 个 Socket.IO WebSocket
+  连接并各发送一次 join_meeting，统计成功连接数、连接和往返耗时以及服务器进程内存。
+未安装的协程库对应的模式会被跳过。
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import tempfile
+import subprocess
+import threading
+from typing import Dict, List, Optional, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODES = ('threading', 'eventlet', 'gevent')
+
+ROLES = ['CEO', '技术总监', '市场总监', '财务总监', '产品经理']
+
+# 事件循环心跳间隔（秒）
+HEARTBEAT_INTERVAL = 0.01
+
+
+def percentile(values: List[float], ratio: float) -> float:
+    """百分位数（values 为空时返回0）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def peak_rss_mb() -> float:
+    """本进程的内存峰值（MB）"""
+    import resource
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def process_rss_mb(pid: int) -> Optional[float]:
+    """指定进程的当前内存（MB，仅Linux）"""
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+# ---------------------------------------------------------------- 子进程：并发会议
+
+def build_cassette(latency: float):
+    """合成的回放记录：每个智能体的回复足够覆盖最大轮次和会议总结"""
+    from config import config
+    from services.cassette_service import Cassette, CassetteEntry, MODE_REPLAY
+
+    usage = {'prompt_tokens': 800, 'completion_tokens': 120, 'total_tokens': 920}
+    entries = []
+    for agent_id, role in enumerate(ROLES):
+        for index in range(config.meeting.max_rounds * 2 + 4):
+            entries.append(CassetteEntry(
+                agent_id=agent_id,
+                role=role,
+                content=f"{role}第{index}次发言：建议先明确预算和落地节奏，再评估技术风险与市场反馈。",
+                latency=latency,
+                usage=usage
+            ))
+    meeting = {
+        'topic': '人工智能战略',
+        'background': '讨论公司未来三年的人工智能投入方向',
+        'agents': [{'role': role, 'description': role} for role in ROLES]
+    }
+    return Cassette(MODE_REPLAY, entries, meeting, replay_latency=latency > 0)
+
+
+def run_meeting(latency: float) -> None:
+    """完整进行一场会议（初始化 -> 发言 -> 结束并保存）"""
+    from batch_runner import drive_meeting
+    from models import MeetingConfig
+    from services.meeting_service import MeetingService
+
+    cassette = build_cassette(latency)
+    service = MeetingService()
+    service.cassette = cassette
+    if not service.initialize_meeting(MeetingConfig(**cassette.meeting)):
+        raise RuntimeError("会议初始化失败")
+
+    result = drive_meeting(service)
+    if result.get('status') != 'success':
+        raise RuntimeError(f"会议失败: {result.get('error')}")
+
+    end_result = service.end_meeting()
+    if end_result.get('status') != 'success':
+        raise RuntimeError(f"结束会议失败: {end_result.get('error')}")
+    service.agent_service.clear_agents()
+
+
+def bench_meetings(meetings: int, latency: float) -> Dict[str, Any]:
+    """同时进行多场会议，返回统计结果"""
+    from config import config
+
+    output_dir = tempfile.mkdtemp(prefix='async_bench_meetings_')
+    config.meetings_save_dir = output_dir
+    config.meeting.prewarm_agents = False
+
+    # 先完成一场会议，模块导入和首次初始化不计入统计
+    run_meeting(0.0)
+
+    errors: List[str] = []
+    durations: List[float] = []
+    lags: List[float] = []
+    stop = threading.Event()
+
+    def heartbeat() -> None:
+        while not stop.is_set():
+            start = time.perf_counter()
+            time.sleep(HEARTBEAT_INTERVAL)
+            lags.append(time.perf_counter() - start - HEARTBEAT_INTERVAL)
+
+    def worker() -> None:
+        start = time.perf_counter()
+        try:
+            run_meeting(latency)
+            durations.append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(str(e))
+
+    monitor = threading.Thread(target=heartbeat, daemon=True)
+    monitor.start()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(meetings)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    monitor.join()
+    saved = len([name for name in os.listdir(output_dir) if os.path.isdir(os.path.join(output_dir, name))])
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    return {
+        'meetings': meetings,
+        'completed': len(durations),
+        'saved': saved,
+        'errors': errors[:3],
+        'elapsed_s': round(elapsed, 3),
+        'meetings_per_s': round(len(durations) / elapsed, 2) if elapsed else 0.0,
+        'meeting_p50_s': round(percentile(durations, 0.5), 3),
+        'meeting_p95_s': round(percentile(durations, 0.95), 3),
+        'loop_lag_p99_ms': round(percentile(lags, 0.99) * 1000, 2),
+        'loop_lag_max_ms': round(max(lags, default=0.0) * 1000, 2),
+        'peak_rss_mb': peak_rss_mb()
+    }
+
+
+# ---------------------------------------------------------------- 子进程：Web服务器
+
+def serve(mode: str, port: int) -> None:
+    """按该模式启动Web服务器（不预热模型、不启用登录）"""
+    from config import config
+    config.websocket.async_mode = mode
+    config.meeting.prewarm_agents = False
+    config.wechat.enable_login = False
+
+    import app_new
+    app, socketio = app_new.create_app()
+    if mode == 'threading':
+        socketio.run(app, host='127.0.0.1', port=port, debug=False, allow_unsafe_werkzeug=True)
+    else:
+        socketio.run(app, host='127.0.0.1', port=port, debug=False, log_output=False)
+
+
+# ---------------------------------------------------------------- 本进程：连接客户端
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, process: subprocess.Popen, timeout: float = 30.0) -> bool:
+    """等待服务器开始监听"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def receive(ws: Any, timeout: float = 10.0) -> str:
+    """接收一个 Engine.IO 数据包（超时抛出 TimeoutError）"""
+    packet = ws.receive(timeout=timeout)
+    if packet is None:
+        raise TimeoutError("等待服务器响应超时")
+    return packet
+
+
+def socketio_client(url: str, ready: threading.Barrier, release: threading.Event,
+                    results: List[Dict[str, float]], errors: List[str]) -> None:
+    """建立一个 Socket.IO 连接，发送 join_meeting 并等待回复，保持连接直到所有客户端完成"""
+    import simple_websocket
+
+    ws = None
+    try:
+        start = time.perf_counter()
+        ws = simple_websocket.Client(url)
+        if not receive(ws).startswith('0'):  # Engine.IO open
+            raise RuntimeError("握手失败")
+        ws.send('40')  # Socket.IO connect
+        while not receive(ws).startswith('40'):
+            pass
+        connected = time.perf_counter()
+
+        ws.send('42["join_meeting",{}]')
+        while True:
+            packet = receive(ws)
+            if packet == '2':  # 心跳
+                ws.send('3')
+            elif packet.startswith('42') and 'joined_meeting' in packet:
+                break
+        results.append({
+            'connect_ms': (connected - start) * 1000,
+            'roundtrip_ms': (time.perf_counter() - connected) * 1000
+        })
+    except Exception as e:
+        errors.append(f"{type(e).__name__}: {e}")
+    finally:
+        try:
+            ready.wait(timeout=120)
+        except threading.BrokenBarrierError:
+            pass
+        release.wait(timeout=120)
+        if ws is not None:
+            ws.close()
+
+
+def bench_connections(mode: str, connections: int) -> Dict[str, Any]:
+    """启动该模式的服务器并同时建立多个连接，返回统计结果"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.async_modes', '--worker', 'serve', '--mode', mode, '--port', str(port)],
+        cwd=BACKEND_DIR, env=dict(os.environ, WEBSOCKET_ASYNC_MODE=mode),
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    try:
+        if not wait_for_port(port, process):
+            stderr = process.stderr.read() if process.poll() is not None else ''
+            return {'error': f"服务器启动失败: {stderr.strip().splitlines()[-1] if stderr.strip() else '超时'}"}
+
+        idle_rss = process_rss_mb(process.pid)
+        url = f'ws://127.0.0.1:{port}/socket.io/?EIO=4&transport=websocket'
+        results: List[Dict[str, float]] = []
+        errors: List[str] = []
+        ready = threading.Barrier(connections + 1)
+        release = threading.Event()
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=socketio_client, args=(url, ready, release, results, errors), daemon=True)
+                   for _ in range(connections)]
+        for thread in threads:
+            thread.start()
+        try:
+            ready.wait(timeout=120)
+        except threading.BrokenBarrierError:
+            pass
+        elapsed = time.perf_counter() - start
+
+        # 所有连接保持打开时的服务器内存
+        busy_rss = process_rss_mb(process.pid)
+        release.set()
+        for thread in threads:
+            thread.join(timeout=10)
+
+        connect_ms = [item['connect_ms'] for item in results]
+        roundtrip_ms = [item['roundtrip_ms'] for item in results]
+        return {
+            'connections': connections,
+            'succeeded': len(results),
+            'errors': sorted(set(errors))[:3],
+            'elapsed_s': round(elapsed, 3),
+            'connect_p50_ms': round(percentile(connect_ms, 0.5), 2),
+            'connect_p95_ms': round(percentile(connect_ms, 0.95), 2),
+            'roundtrip_p50_ms': round(percentile(roundtrip_ms, 0.5), 2),
+            'roundtrip_p95_ms': round(percentile(roundtrip_ms, 0.95), 2),
+            'server_idle_rss_mb': idle_rss,
+            'server_busy_rss_mb': busy_rss
+        }
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+# ---------------------------------------------------------------- 本进程：汇总
+
+def mode_available(mode: str) -> Optional[str]:
+    """该模式需要的协程库是否已安装（已安装返回 None，否则返回原因）"""
+    if mode == 'threading':
+        return None
+    code = f"import async_runtime; async_runtime._require({mode!r})"
+    result = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, capture_output=True, text=True)
+    if result.returncode == 0:
+        return None
+    return result.stderr.strip().splitlines()[-1] if result.stderr.strip() else '不可用'
+
+
+def bench_meetings_in_subprocess(mode: str, meetings: int, latency: float) -> Dict[str, Any]:
+    """在子进程中运行并发会议基准"""
+    result = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.async_modes', '--worker', 'meetings', '--mode', mode,
+         '--meetings', str(meetings), '--latency', str(latency)],
+        cwd=BACKEND_DIR, env=dict(os.environ, WEBSOCKET_ASYNC_MODE=mode),
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        return {'error': lines[-1] if lines else f"退出码 {result.returncode}"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """打印对比表"""
+    print(f"并发会议: {report['meetings']} 场/worker, 模型延迟 {report['latency']}s")
+    print(f"  {'模式':<10} {'完成':>6} {'耗时(s)':>9} {'会议/s':>8} {'P95(s)':>8} {'循环滞后max(ms)':>16} {'内存(MB)':>9}")
+    for mode, item in report['results'].items():
+        stats = item.get('meetings')
+        if stats is None:
+            continue
+        if 'error' in stats:
+            print(f"  {mode:<10} 跳过: {stats['error']}")
+            continue
+        print(f"  {mode:<10} {stats['completed']:>6} {stats['elapsed_s']:>9.2f} {stats['meetings_per_s']:>8.2f} "
+              f"{stats['meeting_p95_s']:>8.2f} {stats['loop_lag_max_ms']:>16.2f} {stats['peak_rss_mb']:>9.1f}")
+
+    if report.get('connections') is None:
+        return
+    print(f"并发连接: {report['connections']} 个/worker")
+    print(f"  {'模式':<10} {'成功':>6} {'耗时(s)':>9} {'连接P95(ms)':>12} {'往返P95(ms)':>12} {'内存(MB)':>14}")
+    for mode, item in report['results'].items():
+        stats = item.get('connections')
+        if stats is None:
+            continue
+        if 'error' in stats:
+            print(f"  {mode:<10} 跳过: {stats['error']}")
+            continue
+        rss = f"{stats['server_idle_rss_mb']} -> {stats['server_busy_rss_mb']}"
+        print(f"  {mode:<10} {stats['succeeded']:>6} {stats['elapsed_s']:>9.2f} {stats['connect_p95_ms']:>12.2f} "
+              f"{stats['roundtrip_p95_ms']:>12.2f} {rss:>14}")
+        for error in stats['errors']:
+            print(f"      {error}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='异步模式基准')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES), help='对比的异步模式')
+    parser.add_argument('--meetings', type=int, default=50, help='每个worker同时进行的会议数')
+    parser.add_argument('--latency', type=float, default=0.05, help='模拟的模型调用耗时（秒）')
+    parser.add_argument('--connections', type=int, default=200, help='每个worker同时保持的连接数')
+    parser.add_argument('--skip-meetings', action='store_true', help='不运行并发会议基准')
+    parser.add_argument('--skip-sockets', action='store_true', help='不运行并发连接基准')
+    parser.add_argument('--json', action='store_true', help='以JSON输出结果')
+    # 子进程参数
+    parser.add_argument('--worker', choices=('meetings', 'serve'), help=argparse.SUPPRESS)
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        # 先打补丁再导入后端模块
+        from async_runtime import monkey_patch
+        monkey_patch(args.mode)
+        from logging_config import setup_logging
+        setup_logging(log_level='WARNING', enable_console=True, enable_file=False)
+
+        if args.worker == 'serve':
+            serve(args.mode, args.port)
+        else:
+            print(json.dumps(bench_meetings(args.meetings, args.latency)))
+        return 0
+
+    report: Dict[str, Any] = {
+        'meetings': None if args.skip_meetings else args.meetings,
+        'latency': args.latency,
+        'connections': None if args.skip_sockets else args.connections,
+        'results': {}
+    }
+    for mode in args.modes:
+        item: Dict[str, Any] = {}
+        reason = mode_available(mode)
+        if not args.skip_meetings:
+            item['meetings'] = {'error': reason} if reason else bench_meetings_in_subprocess(mode, args.meetings, args.latency)
+        if not args.skip_sockets:
+            item['connections'] = {'error': reason} if reason else bench_connections(mode, args.connections)
+        report['results'][mode] = item
+        print(f"  {mode} 完成", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
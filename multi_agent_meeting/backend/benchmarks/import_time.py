@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+导入耗时与worker启动耗时基准
+
+用法（在 backend 目录下）:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 400 --boot
+    python -m benchmarks.import_time --module services.meeting_service
+
+基于 `python -X importtime` 统计指定模块的累计导入耗时，超出预算或在导入阶段
+加载了重量级依赖（camel/openai等）时以非零状态码退出，可直接用于CI门禁。
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 导入阶段不允许加载的重量级模块，它们应在第一次使用时再导入
+FORBIDDEN_AT_IMPORT = ('camel', 'openai', 'qrcode', 'PIL', 'numpy', 'pyarrow')
+
+# -X importtime 输出格式: "import time:  self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def run_importtime(module: str) -> List[Tuple[str, int, int, int]]:
+    """在子进程中导入模块，返回 (模块名, 自身耗时us, 累计耗时us, 嵌套层级) 列表"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return entries
+
+
+def measure_boot_time(repeat: int) -> List[float]:
+    """测量从进程启动到 create_gunicorn_app() 完成的耗时（毫秒）"""
+    script = (
+        "import time, json; t0 = time.perf_counter(); "
+        "import app_new; app = app_new.create_gunicorn_app(); "
+        "print(json.dumps({'total_ms': (time.perf_counter() - t0) * 1000, "
+        "'create_ms': app.boot_time_ms}))"
+    )
+    env = dict(os.environ, LOG_ENABLE_CONSOLE='False', LOG_ENABLE_FILE='False')
+
+    timings = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-c', script],
+            cwd=BACKEND_DIR,
+            env=env,
+            capture_output=True,
+            text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"worker启动失败:\n{result.stderr[-2000:]}")
+        timings.append(json.loads(result.stdout.strip().splitlines()[-1])['total_ms'])
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='导入耗时与worker启动耗时基准')
+    parser.add_argument('--module', default='app_new', help='要测量的模块（默认 app_new）')
+    parser.add_argument('--budget-ms', type=float, default=500.0, help='累计导入耗时预算（毫秒）')
+    parser.add_argument('--top', type=int, default=15, help='展示累计耗时最高的前N个模块')
+    parser.add_argument('--boot', action='store_true', help='同时测量worker启动耗时')
+    parser.add_argument('--repeat', type=int, default=3, help='启动耗时重复测量次数')
+    parser.add_argument('--json', action='store_true', help='以JSON输出结果')
+    args = parser.parse_args()
+
+    entries = run_importtime(args.module)
+    cumulative: Dict[str, int] = {name: cum for name, _, cum, _ in entries}
+    total_ms = cumulative.get(args.module, 0) / 1000.0
+
+    loaded_roots = {name.split('.')[0] for name, _, _, _ in entries}
+    forbidden = sorted(root for root in FORBIDDEN_AT_IMPORT if root in loaded_roots)
+
+    top_level = sorted(
+        ((name, cum) for name, _, cum, level in entries if level <= 1),
+        key=lambda item: item[1],
+        reverse=True
+    )[:args.top]
+
+    report = {
+        'module': args.module,
+        'import_ms': round(total_ms, 2),
+        'budget_ms': args.budget_ms,
+        'within_budget': total_ms <= args.budget_ms,
+        'forbidden_imports': forbidden,
+        'top_imports_ms': [{'module': name, 'cumulative_ms': round(cum / 1000.0, 2)} for name, cum in top_level]
+    }
+
+    if args.boot:
+        timings = measure_boot_time(args.repeat)
+        report['boot_ms'] = {
+            'min': round(min(timings), 2),
+            'max': round(max(timings), 2),
+            'mean': round(sum(timings) / len(timings), 2)
+        }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f"模块 {args.module} 累计导入耗时: {report['import_ms']:.1f}ms (预算 {args.budget_ms:.0f}ms)")
+        print("累计耗时最高的导入:")
+        for item in report['top_imports_ms']:
+            print(f"  {item['cumulative_ms']:>9.1f}ms  {item['module']}")
+        if 'boot_ms' in report:
+            boot = report['boot_ms']
+            print(f"worker启动耗时: mean={boot['mean']:.1f}ms, min={boot['min']:.1f}ms, max={boot['max']:.1f}ms")
+        if forbidden:
+            print(f"导入阶段加载了重量级模块: {', '.join(forbidden)}")
+
+    if forbidden or not report['within_budget']:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会议消息存储基准
+
+用法（在 backend 目录下）:
+    python -m benchmarks.message_store
+    python -m benchmarks.message_store --messages 10000 --repeat 50
+
+对比旧的 `List[asdict(Message)]` 存储与 MessageStore 的内存占用（tracemalloc，
+按每1万条消息折算）以及 meeting_service.py 中常见扫描的耗时：
+对话历史拼接、会议记录生成、按发言人统计、CEO最新发言查找与状态序列化。
+"""
+
+import os
+import sys
+import time
+import random
+import copy
+import pickle
+import argparse
+import tracemalloc
+from collections import Counter
+from dataclasses import asdict
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Message, MessageStore
+
+ROLES = ['CEO', '技术总监', '市场总监', '财务总监', '产品经理', '运营总监']
+
+# 与 config.meeting.max_conversation_history 默认值保持一致
+HISTORY_WINDOW = 10
+
+
+def build_messages(count: int, seed: int = 42) -> List[Message]:
+    """生成模拟的会议消息"""
+    rng = random.Random(seed)
+    base = time.time()
+    messages = []
+    for index in range(count):
+        agent_id = rng.randrange(len(ROLES))
+        # 模拟模型返回的新字符串对象，角色名不共享
+        role = ''.join(list(ROLES[agent_id]))
+        content = f"第{index}条发言：" + "我认为需要进一步讨论具体的落地方案。" * rng.randint(2, 6)
+        messages.append(Message(agent_id, role, content, base + index, index))
+    return messages
+
+
+def check_round_trip(store: MessageStore) -> None:
+    """确认消息记录和 MessageStore 可以 pickle 与 deepcopy 往返"""
+    for message in store.tail(3):
+        assert pickle.loads(pickle.dumps(message)) == message
+        assert copy.deepcopy(message) == message
+    restored = pickle.loads(pickle.dumps(store))
+    assert restored.to_dicts() == store.to_dicts()
+    assert copy.deepcopy(store).to_dicts() == store.to_dicts()
+
+
+def measure_memory(build: Callable[[], object]) -> int:
+    """返回构建容器新增的内存（字节），不含消息正文"""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    container = build()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del container
+    return after - before
+
+
+def time_call(func: Callable[[], object], repeat: int) -> float:
+    """返回单次调用的平均耗时（微秒）"""
+    func()  # 预热
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1e6 / repeat
+
+
+def run(count: int = 10000, repeat: int = 20) -> Dict[str, Dict[str, float]]:
+    """运行基准，返回 {用例: {legacy, current, ratio}}"""
+    messages = build_messages(count)
+    legacy: List[Dict] = [asdict(message) for message in messages]
+    store = MessageStore(messages)
+    check_round_trip(store)
+
+    scale = 10000.0 / count
+    legacy_bytes = measure_memory(lambda: [asdict(message) for message in messages]) * scale
+    current_bytes = measure_memory(lambda: MessageStore(messages)) * scale
+
+    results = {
+        'memory_per_10k_kb': {
+            'legacy': round(legacy_bytes / 1024, 1),
+            'current': round(current_bytes / 1024, 1),
+            'ratio': round(legacy_bytes / current_bytes, 2) if current_bytes else 0.0
+        }
+    }
+
+    cases = {
+        'conversation_history': (
+            lambda: "会议对话历史：\n" + ''.join(
+                f"{m['role']}: {m['content']}\n" for m in legacy[-HISTORY_WINDOW:]),
+            lambda: "会议对话历史：\n" + ''.join(
+                f"{m.role}: {m.content}\n" for m in store.tail(HISTORY_WINDOW))
+        ),
+        'transcript': (
+            lambda: ''.join(f"[{m['timestamp']}] {m['role']}: {m['content']}\n\n" for m in legacy),
+            lambda: ''.join(f"[{m.timestamp}] {m.role}: {m.content}\n\n" for m in store)
+        ),
+        'speaker_scan': (
+            lambda: Counter(m['agent_id'] for m in legacy),
+            lambda: store.speaker_counts()
+        ),
+        'latest_ceo': (
+            lambda: next((m['content'] for m in reversed(legacy) if m['agent_id'] == 0), ''),
+            lambda: store.last_from(0)
+        ),
+        'state_to_dict': (
+            lambda: [asdict(Message(**m)) for m in legacy],
+            lambda: store.to_dicts()
+        ),
+    }
+
+    for name, (legacy_func, current_func) in cases.items():
+        legacy_us = time_call(legacy_func, repeat)
+        current_us = time_call(current_func, repeat)
+        results[name] = {
+            'legacy': round(legacy_us, 1),
+            'current': round(current_us, 1),
+            'ratio': round(legacy_us / current_us, 2) if current_us else 0.0
+        }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='会议消息存储基准')
+    parser.add_argument('--messages', type=int, default=10000, help='消息数量')
+    parser.add_argument('--repeat', type=int, default=20, help='每个用例的重复次数')
+    args = parser.parse_args()
+
+    print(f"消息数量: {args.messages}, 重复 {args.repeat} 次")
+    for name, result in run(args.messages, args.repeat).items():
+        unit = 'KB' if name.startswith('memory') else 'us'
+        print(f"  {name:<22} 旧实现 {result['legacy']:>10.1f}{unit}  新实现 {result['current']:>10.1f}{unit}  x{result['ratio']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+登录页压测
+
+用法（在 backend 目录下）:
+    python -m benchmarks.qr_login
+    python -m benchmarks.qr_login --clients 64 --pool-size 64 --think-ms 0   # 登录高峰
+    python -m benchmarks.qr_login --http     # 经Flask路由，包含JSON序列化和缓存头
+
+模拟用户并发打开登录页：生成登录二维码并获取二维码图片，每个用户两次加载之间间隔 --think-ms。
+对比两种方式的吞吐（页/秒）、延迟分位数和响应大小：
+- inline: 旧方式，在请求线程中渲染PNG并以base64内嵌在JSON响应中
+- pipeline: 预生成登录会话 + 渲染线程池 + 独立的图片接口
+会话保存在内存存储中，不影响 temp/sessions.db。持续超出渲染能力的负载（--think-ms 0 且
+请求数远大于预生成数量）下两种方式的吞吐都受限于渲染速度。
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Any, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import config
+from logging_config import setup_logging
+from services.session_store import MemorySessionStore
+from services.qr_service import QrRenderer, render_qr_image
+from services.wechat_service import WechatService
+
+
+def inline_page_load(service: WechatService) -> int:
+    """旧方式：请求线程内渲染PNG并base64内嵌，返回响应大小"""
+    result = service.generate_qr_code()
+    image = render_qr_image(result['qr_code_url'], 'png')
+    result['qr_code_base64'] = f"data:image/png;base64,{base64.b64encode(image).decode()}"
+    return len(json.dumps(result))
+
+
+def pipeline_page_load(service: WechatService, fmt: str) -> int:
+    """新方式：生成会话 + 独立获取图片，返回响应大小（JSON + 图片）"""
+    result = service.generate_qr_code()
+    image, _ = service.get_qr_image(result['session_id'], fmt)
+    return len(json.dumps(result)) + len(image)
+
+
+def http_page_load(client: Any, fmt: str) -> int:
+    """经Flask路由加载登录页"""
+    response = client.post('/api/auth/wechat/qrcode')
+    data = response.get_json()
+    image = client.get(data['qr_image_url'] if fmt == 'png' else data['qr_image_svg_url'])
+    if image.status_code != 200:
+        raise RuntimeError(f"获取二维码图片失败: {image.status_code}")
+    return len(response.data) + len(image.data)
+
+
+def run_load(page_load: Callable[[], int], clients: int, requests: int, think_time: float) -> Dict[str, Any]:
+    """clients 个并发用户各加载 requests 次登录页（吞吐按加载耗时计算，不含间隔）"""
+    latencies: List[float] = []
+    sizes: List[int] = []
+    lock = threading.Lock()
+
+    def client_loop() -> None:
+        for index in range(requests):
+            if index:
+                time.sleep(think_time)
+            start = time.perf_counter()
+            size = page_load()
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                sizes.append(size)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        for future in [executor.submit(client_loop) for _ in range(clients)]:
+            future.result()
+    elapsed = time.perf_counter() - start - think_time * (requests - 1)
+
+    latencies.sort()
+    return {
+        'pages': len(latencies),
+        'pages_per_sec': round(len(latencies) / max(elapsed, 1e-6), 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 3),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3),
+        'avg_bytes': round(sum(sizes) / len(sizes))
+    }
+
+
+def make_service(pool_size: int, workers: int) -> WechatService:
+    """创建使用内存会话存储的微信服务，并等待预生成完成"""
+    config.wechat.qr_pool_size = pool_size
+    service = WechatService(MemorySessionStore(), QrRenderer(workers, cache_size=max(256, pool_size * 4)))
+    service.fill_pool()
+    deadline = time.time() + 30
+    while pool_size and service.get_session_stats()['qr_pool']['ready'] < pool_size and time.time() < deadline:
+        time.sleep(0.01)
+    return service
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='登录页压测')
+    parser.add_argument('--clients', type=int, default=16, help='并发用户数')
+    parser.add_argument('--requests', type=int, default=5, help='每个用户加载登录页的次数')
+    parser.add_argument('--think-ms', type=float, default=200, help='每个用户两次加载之间的间隔（毫秒）')
+    parser.add_argument('--pool-size', type=int, default=config.wechat.qr_pool_size, help='预生成的登录会话数量')
+    parser.add_argument('--render-workers', type=int, default=config.wechat.qr_render_workers, help='渲染线程数')
+    parser.add_argument('--format', choices=['png', 'svg'], default='png', help='pipeline方式的图片格式')
+    parser.add_argument('--http', action='store_true', help='经Flask路由压测pipeline方式（需要安装Flask依赖）')
+    parser.add_argument('--json', action='store_true', help='以JSON输出结果')
+    args = parser.parse_args()
+
+    setup_logging(log_level='WARNING', enable_console=True, enable_file=False)
+
+    inline_service = make_service(0, args.render_workers)
+    pipeline_service = make_service(args.pool_size, args.render_workers)
+
+    if args.http:
+        import app_new
+        import services.wechat_service as wechat_module
+        config.meeting.prewarm_agents = False
+        wechat_module._wechat_service = pipeline_service
+        app, _ = app_new.create_app()
+        local = threading.local()
+
+        def pipeline_load() -> int:
+            if not hasattr(local, 'client'):
+                local.client = app.test_client()
+            return http_page_load(local.client, args.format)
+    else:
+        def pipeline_load() -> int:
+            return pipeline_page_load(pipeline_service, args.format)
+
+    think_time = args.think_ms / 1000
+    try:
+        report = {
+            'clients': args.clients,
+            'requests_per_client': args.requests,
+            'think_ms': args.think_ms,
+            'pool_size': args.pool_size,
+            'render_workers': args.render_workers,
+            'format': args.format,
+            'mode': 'http' if args.http else 'in_process',
+            'inline': run_load(lambda: inline_page_load(inline_service), args.clients, args.requests, think_time),
+            'pipeline': run_load(pipeline_load, args.clients, args.requests, think_time),
+            'pipeline_stats': pipeline_service.get_session_stats()
+        }
+    finally:
+        inline_service.renderer.shutdown()
+        pipeline_service.renderer.shutdown()
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f"登录页压测: {args.clients} 个并发用户 x {args.requests} 次 ({report['mode']}, "
+              f"pool={args.pool_size}, workers={args.render_workers}, format={args.format})")
+        for name in ('inline', 'pipeline'):
+            result = report[name]
+            print(f"  {name:<9} {result['pages_per_sec']:>8.1f} 页/秒  p50 {result['p50_ms']:>8.3f}ms  "
+                  f"p95 {result['p95_ms']:>8.3f}ms  max {result['max_ms']:>8.3f}ms  {result['avg_bytes']:>7} 字节/页")
+        pool = report['pipeline_stats']['qr_pool']
+        renderer = report['pipeline_stats']['qr_renderer']
+        print(f"  预生成命中 {pool['hits']}, 未命中 {pool['misses']}; 图片缓存命中 {renderer['hits']}, "
+              f"未命中 {renderer['misses']}, 渲染 {renderer['renders']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
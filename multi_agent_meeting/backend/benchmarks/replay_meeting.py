@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会议回放基准
+
+用法（在 backend 目录下）:
+    python -m benchmarks.replay_meeting saved_meetings/meeting_xxx_20250101_120000
+    python -m benchmarks.replay_meeting meeting_xxx --repeat 20
+    python -m benchmarks.replay_meeting path/to/cassette.json --replay-latency --latency-scale 0.1
+    python -m benchmarks.replay_meeting meeting_xxx --http   # 经Flask路由驱动，包含推送开销
+
+以录制（CASSETTE_MODE=record 保存的 cassette.json）或已保存会议的发言记录回放模型调用，
+不访问网络，分别统计初始化、会议编排、结束会议（总结+持久化）的耗时。
+回放产生的会议默认保存到临时目录，不影响 saved_meetings/。
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+from typing import Dict, List, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import config
+from logging_config import setup_logging
+from models import MeetingConfig
+from services.cassette_service import Cassette
+from services.meeting_service import MeetingService
+from services.job_service import job_runner, JOB_SUCCEEDED
+
+
+def resolve_source(source: str) -> str:
+    """解析回放来源：路径，或 saved_meetings/ 中的会议ID（取最新一次保存）"""
+    if os.path.exists(source):
+        return source
+
+    candidates = sorted(
+        name for name in os.listdir(config.meetings_save_dir)
+        if name.startswith(source) and os.path.isdir(os.path.join(config.meetings_save_dir, name))
+    )
+    if not candidates:
+        raise FileNotFoundError(f"找不到已保存的会议: {source}")
+    return os.path.join(config.meetings_save_dir, candidates[-1])
+
+
+def replay_in_process(cassette: Cassette) -> Dict[str, float]:
+    """直接调用 MeetingService 回放一场会议，返回各阶段耗时（毫秒）"""
+    from batch_runner import drive_meeting
+
+    meeting = cassette.meeting
+    service = MeetingService()
+    service.cassette = cassette
+
+    t0 = time.perf_counter()
+    ok = service.initialize_meeting(MeetingConfig(
+        topic=meeting.get('topic', ''),
+        background=meeting.get('background', ''),
+        agents=meeting.get('agents', [])
+    ))
+    if not ok:
+        raise RuntimeError("回放会议初始化失败")
+
+    t1 = time.perf_counter()
+    result = drive_meeting(service)
+    if result.get('status') != 'success':
+        raise RuntimeError(f"回放会议失败: {result.get('error')}")
+
+    t2 = time.perf_counter()
+    end_result = service.end_meeting()
+    if end_result.get('status') != 'success':
+        raise RuntimeError(f"结束回放会议失败: {end_result.get('error')}")
+    t3 = time.perf_counter()
+
+    return {
+        'init_ms': (t1 - t0) * 1000,
+        'orchestration_ms': (t2 - t1) * 1000,
+        'end_meeting_ms': (t3 - t2) * 1000,
+        'total_ms': (t3 - t0) * 1000,
+        'messages': len(service.state.messages)
+    }
+
+
+def replay_via_http(cassette: Cassette, client: Any, service: MeetingService) -> Dict[str, float]:
+    """经Flask路由回放一场会议（包含JSON序列化和Socket.IO推送）"""
+    service.cassette = cassette
+
+    t0 = time.perf_counter()
+    response = client.post('/api/start_meeting', json=cassette.meeting)
+    if response.status_code != 200:
+        raise RuntimeError(f"回放会议初始化失败: {response.get_json()}")
+
+    t1 = time.perf_counter()
+    result = client.post('/api/ceo_speak').get_json()
+    for _ in range(1000):
+        if result.get('status') != 'success':
+            if result.get('should_ceo_speak'):
+                result = client.post('/api/ceo_speak').get_json()
+                continue
+            raise RuntimeError(f"回放会议失败: {result.get('error')}")
+        if result.get('meeting_should_end') or result.get('meeting_ended'):
+            break
+        next_speaker_id = result['next_speaker_id']
+        if next_speaker_id == config.meeting.ceo_agent_id:
+            result = client.post('/api/ceo_speak').get_json()
+        else:
+            result = client.post(f'/api/agent_speak/{next_speaker_id}').get_json()
+
+    t2 = time.perf_counter()
+    response = client.post('/api/end_meeting')
+    if response.status_code != 200 or response.get_json().get('status') != 'success':
+        raise RuntimeError(f"结束回放会议失败: {response.get_json()}")
+    # 结束会议在后台任务中完成，计时包含等待任务完成
+    job = job_runner.wait(response.get_json()['job_id'])
+    if job is None or job['status'] != JOB_SUCCEEDED:
+        raise RuntimeError(f"结束回放会议失败: {job and job['error']}")
+    t3 = time.perf_counter()
+
+    return {
+        'init_ms': (t1 - t0) * 1000,
+        'orchestration_ms': (t2 - t1) * 1000,
+        'end_meeting_ms': (t3 - t2) * 1000,
+        'total_ms': (t3 - t0) * 1000,
+        'messages': len(service.state.messages)
+    }
+
+
+def summarize(runs: List[Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    """按阶段汇总（均值/最小/最大，毫秒）"""
+    summary = {}
+    for key in ('init_ms', 'orchestration_ms', 'end_meeting_ms', 'total_ms'):
+        values = [run[key] for run in runs]
+        summary[key] = {
+            'mean': round(sum(values) / len(values), 3),
+            'min': round(min(values), 3),
+            'max': round(max(values), 3)
+        }
+    return summary
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='会议回放基准')
+    parser.add_argument('source', help='cassette.json、已保存的会议目录或会议ID')
+    parser.add_argument('--repeat', type=int, default=5, help='回放次数')
+    parser.add_argument('--replay-latency', action='store_true', help='按录制的耗时等待')
+    parser.add_argument('--latency-scale', type=float, default=1.0, help='回放耗时缩放系数')
+    parser.add_argument('--http', action='store_true', help='经Flask路由回放（需要安装Flask依赖）')
+    parser.add_argument('--keep', action='store_true', help='回放产生的会议保存到 saved_meetings/')
+    parser.add_argument('--json', action='store_true', help='以JSON输出结果')
+    args = parser.parse_args()
+
+    setup_logging(log_level='WARNING', enable_console=True, enable_file=False)
+    cassette = Cassette.load(resolve_source(args.source), args.replay_latency, args.latency_scale)
+
+    output_dir = None
+    if not args.keep:
+        output_dir = tempfile.mkdtemp(prefix='replay_meetings_')
+        config.meetings_save_dir = output_dir
+
+    client = service = None
+    if args.http:
+        config.meeting.prewarm_agents = False
+        import app_new
+        app, _ = app_new.create_app()
+        client = app.test_client()
+        service = app.meeting_service
+
+    try:
+        runs = []
+        for _ in range(args.repeat):
+            if args.http:
+                runs.append(replay_via_http(cassette, client, service))
+            else:
+                runs.append(replay_in_process(cassette))
+    finally:
+        if output_dir:
+            shutil.rmtree(output_dir, ignore_errors=True)
+
+    report = {
+        'source': args.source,
+        'mode': 'http' if args.http else 'in_process',
+        'repeat': args.repeat,
+        'messages': runs[-1]['messages'],
+        'cassette': cassette.stats(),
+        'timings_ms': summarize(runs)
+    }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f"回放 {args.source} x{args.repeat} ({report['mode']}), 发言数 {report['messages']}")
+        print(f"  匹配: 指纹 {report['cassette']['fingerprint_hits']}, 顺序 {report['cassette']['sequence_hits']}")
+        for key, stats in report['timings_ms'].items():
+            print(f"  {key:<18} mean {stats['mean']:>10.3f}ms  min {stats['min']:>10.3f}ms  max {stats['max']:>10.3f}ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
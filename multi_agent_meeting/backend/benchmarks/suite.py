@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后端基准测试套件
+
+用法（在 backend 目录下）:
+    python -m benchmarks.suite run                          # 运行并保存到 benchmarks/baselines/latest.json
+    python -m benchmarks.suite run --output baseline.json --filter history
+    python -m benchmarks.suite run --compare benchmarks/baselines/baseline.json
+    python -m benchmarks.suite compare baseline.json latest.json --threshold 0.2
+
+覆盖会议服务中的扫描（对话历史、发言统计、下一位发言者，10/1k/10k条消息）、发言者路由（5/60个智能体）、
+CEO文本处理、会议保存（索引中已有1万场会议）、会议记录读取、MeetingState序列化
+和提示词渲染。结果以JSON保存，compare 命令将中位数耗时超出阈值的用例标记为回归，
+存在回归时以非零状态码退出，可直接用于CI门禁。
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import argparse
+import statistics
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Any, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import config
+from models import Agent, Message, MeetingState
+from prompts import PromptConfig
+from utils import (
+    post_process_ceo_content, check_ceo_wants_to_end_meeting,
+    save_meeting_content, get_latest_meeting_transcript
+)
+from services.meeting_service import MeetingService
+from benchmarks.text_processing import build_ceo_summary
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+# 默认回归阈值：中位数耗时比基线慢20%以上
+DEFAULT_THRESHOLD = 0.2
+
+MESSAGE_COUNTS = (10, 1000, 10000)
+INDEX_SIZE = 10000
+
+ROLES = ['CEO', '技术总监', '市场总监', '财务总监', '产品经理']
+
+# 发言者路由用例的智能体数量
+ROUTER_AGENT_COUNTS = (5, 60)
+
+
+def measure(func: Callable[[], Any], min_time: float = 0.2, rounds: int = 5) -> Dict[str, float]:
+    """
+    测量单次调用耗时（微秒）
+
+    先校准每轮调用次数使单轮耗时约为 min_time/rounds，再取多轮的中位数和最小值。
+    """
+    func()  # 预热
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / rounds or number >= 1 << 20:
+            break
+        number *= 2
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) * 1e6 / number)
+
+    return {
+        'median_us': round(statistics.median(samples), 3),
+        'min_us': round(min(samples), 3),
+        'number': number,
+        'rounds': rounds
+    }
+
+
+def build_meeting_service(message_count: int) -> MeetingService:
+    """构建包含指定数量消息的会议服务（智能体不创建模型，只用于编排逻辑）"""
+    service = MeetingService()
+    service.state.topic = "人工智能战略"
+    service.state.background = "讨论公司未来三年的人工智能投入方向"
+    for agent_id, role in enumerate(ROLES):
+        service.agent_service.add_agent(Agent(id=agent_id, role=role, description=role, api_key=''))
+
+    base = time.time()
+    rotation = len(ROLES)
+    for index in range(message_count):
+        agent_id = index % rotation
+        service._add_message(Message(
+            agent_id=agent_id,
+            role=ROLES[agent_id],
+            content=f"第{index}条发言：我认为需要进一步讨论具体的落地方案，并明确责任分工。",
+            timestamp=base + index,
+            round_number=index + 1
+        ))
+    return service
+
+
+def build_saved_meetings(save_dir: str, index_size: int) -> Dict[str, Any]:
+    """在临时目录中构建包含 index_size 场会议的索引，返回用于保存的会议数据"""
+    meeting_data = {
+        'meeting_id': 'meeting_benchmark',
+        'topic': '人工智能战略',
+        'background': '讨论公司未来三年的人工智能投入方向',
+        'start_time': time.time() - 600,
+        'end_time': time.time(),
+        'current_round': 20,
+        'messages': build_meeting_service(20).state.messages.to_dicts(),
+        'speaker_counts': {},
+        'participants': ROLES,
+        'summary': {'summary_content': build_ceo_summary(2000)}
+    }
+
+    save_meeting_content(meeting_data, save_dir)
+    with open(os.path.join(save_dir, 'meeting_index.json'), 'r', encoding='utf-8') as f:
+        saved_entry = json.load(f)[-1]
+
+    index = []
+    for i in range(index_size - 1):
+        entry = dict(saved_entry)
+        entry['meeting_id'] = f"meeting_{i}"
+        index.append(entry)
+    index.append(saved_entry)
+    with open(os.path.join(save_dir, 'meeting_index.json'), 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+
+    return meeting_data
+
+
+def build_cases() -> Tuple[List[Tuple[str, Callable[[], Any]]], Callable[[], None]]:
+    """构建所有基准用例，返回 (用例列表, 清理函数)"""
+    cases: List[Tuple[str, Callable[[], Any]]] = []
+
+    for count in MESSAGE_COUNTS:
+        service = build_meeting_service(count)
+        cases.append((f"meeting.conversation_history[{count}]", service._get_conversation_history))
+        cases.append((f"meeting.speaker_statistics[{count}]", service._get_speaker_statistics))
+        cases.append((f"meeting.next_speaker_by_order[{count}]", service._get_next_speaker_by_order))
+        cases.append((f"meeting.round_complete[{count}]", service._is_round_complete))
+
+    ceo_content = "接下来请大家重点讨论明年的预算分配和系统架构的安全风险，并给出具体的落地建议。"
+    for count in ROUTER_AGENT_COUNTS:
+        service = build_meeting_service(0)
+        agents = [(agent_id, f"{ROLES[agent_id % len(ROLES)]}{agent_id}", ROLES[agent_id % len(ROLES)])
+                  for agent_id in range(count)]
+        try:
+            service.agent_service.build_speaker_router(agents)
+        except RuntimeError:
+            continue  # 未安装 numpy
+        speaker_counts = {agent_id: agent_id % 3 for agent_id, _, _ in agents}
+        cases.append((f"agent.speaker_router_select[{count}]",
+                      lambda router=service.agent_service.speaker_router, speaker_counts=speaker_counts:
+                      router.select(ceo_content, speaker_counts, {1, 2}, config.meeting.speaker_fairness_weight)))
+
+    for count in (1000, 10000):
+        state: MeetingState = build_meeting_service(count).state
+        cases.append((f"models.meeting_state_to_dict[{count}]", state.to_dict))
+
+    for chars in (2000, 50000):
+        text = build_ceo_summary(chars)
+        cases.append((f"utils.post_process_ceo_content[{chars}]", lambda text=text: post_process_ceo_content(text, True, False)))
+        cases.append((f"utils.check_ceo_wants_to_end_meeting[{chars}]", lambda text=text: check_ceo_wants_to_end_meeting(text)))
+
+    history = build_meeting_service(config.meeting.max_conversation_history)._get_conversation_history()
+    speaker_stats = "各智能体发言次数：\n" + ''.join(f"- {role}: 3次\n" for role in ROLES)
+    topic, background = "人工智能战略", "讨论公司未来三年的人工智能投入方向"
+    cases.extend([
+        ("prompts.ceo_round_summary", lambda: PromptConfig.get_ceo_round_summary_input(topic, background, history, speaker_stats)),
+        ("prompts.ceo_force_end", lambda: PromptConfig.get_ceo_force_end_input(topic, background, history, speaker_stats, 12, 13)),
+        ("prompts.agent_input", lambda: PromptConfig.get_agent_input(topic, background, history, ROLES[1], ROLES[1])),
+        ("prompts.meeting_summary", lambda: PromptConfig.get_meeting_summary_input(topic, background, 20, 20, history)),
+        ("prompts.system_prompts", lambda: (PromptConfig.get_ceo_system_prompt(ROLES[0], ROLES[0]),
+                                           PromptConfig.get_agent_system_prompt(ROLES[1], ROLES[1]))),
+    ])
+
+    save_dir = tempfile.mkdtemp(prefix='benchmark_meetings_')
+    meeting_data = build_saved_meetings(save_dir, INDEX_SIZE)
+
+    # 使用不同的会议ID保存，避免影响会议记录读取用例的查找结果
+    save_data = dict(meeting_data, meeting_id='meeting_benchmark_save')
+
+    def save_once() -> None:
+        # 保存后移除新增的会议目录；索引每次追加一条，测量次数很少，规模变化可忽略
+        meeting_dir = save_meeting_content(save_data, save_dir)
+        shutil.rmtree(meeting_dir, ignore_errors=True)
+
+    cases.append((f"utils.save_meeting_content[index={INDEX_SIZE}]", save_once))
+    cases.append((f"utils.get_latest_meeting_transcript[index={INDEX_SIZE}]",
+                  lambda: get_latest_meeting_transcript(save_dir, 'meeting_benchmark')))
+
+    return cases, lambda: shutil.rmtree(save_dir, ignore_errors=True)
+
+
+# 写文件的用例单次耗时较长，且每次调用会改变索引规模，使用较短的测量时间
+SLOW_CASE_PREFIXES = ('utils.save_meeting_content',)
+
+
+def run_suite(name_filter: Optional[str] = None, min_time: float = 0.2, rounds: int = 5) -> Dict[str, Any]:
+    """运行基准套件，返回结果报告"""
+    cases, cleanup = build_cases()
+    results = {}
+    try:
+        for name, func in cases:
+            if name_filter and name_filter not in name:
+                continue
+            case_min_time = min_time / 4 if name.startswith(SLOW_CASE_PREFIXES) else min_time
+            results[name] = measure(func, case_min_time, rounds)
+            print(f"  {name:<52} {results[name]['median_us']:>14.3f}us", file=sys.stderr)
+    finally:
+        cleanup()
+
+    return {
+        'meta': {
+            'created_at': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine()
+        },
+        'results': results
+    }
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """对比两份报告，返回每个共同用例的变化（ratio > 1 表示变慢）"""
+    rows = []
+    for name, base in baseline.get('results', {}).items():
+        cur = current.get('results', {}).get(name)
+        if cur is None:
+            continue
+        ratio = cur['median_us'] / base['median_us'] if base['median_us'] else 1.0
+        rows.append({
+            'name': name,
+            'baseline_us': base['median_us'],
+            'current_us': cur['median_us'],
+            'ratio': round(ratio, 3),
+            'regression': ratio > 1 + threshold
+        })
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], threshold: float) -> int:
+    """打印对比结果，返回回归用例数量"""
+    regressions = [row for row in rows if row['regression']]
+    print(f"{'用例':<52} {'基线(us)':>14} {'当前(us)':>14} {'比值':>8}")
+    for row in rows:
+        flag = '  <-- 回归' if row['regression'] else ''
+        print(f"{row['name']:<52} {row['baseline_us']:>14.3f} {row['current_us']:>14.3f} {row['ratio']:>8.3f}{flag}")
+    print(f"共 {len(rows)} 个用例，{len(regressions)} 个超出阈值（+{threshold:.0%}）")
+    return len(regressions)
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='后端基准测试套件')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='运行基准并保存结果')
+    run_parser.add_argument('--output', default=os.path.join(BASELINE_DIR, 'latest.json'), help='结果文件')
+    run_parser.add_argument('--filter', help='只运行名称包含该字符串的用例')
+    run_parser.add_argument('--min-time', type=float, default=0.2, help='每个用例的测量时间（秒）')
+    run_parser.add_argument('--rounds', type=int, default=5, help='每个用例的测量轮数')
+    run_parser.add_argument('--compare', help='运行后与该基线对比')
+    run_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='回归阈值（比例）')
+
+    compare_parser = subparsers.add_parser('compare', help='对比两份结果')
+    compare_parser.add_argument('baseline', help='基线结果文件')
+    compare_parser.add_argument('current', help='当前结果文件')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='回归阈值（比例）')
+
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        report = run_suite(args.filter, args.min_time, args.rounds)
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存: {args.output}（{len(report['results'])} 个用例）")
+
+        if args.compare:
+            rows = compare_reports(load_report(args.compare), report, args.threshold)
+            return 1 if print_comparison(rows, args.threshold) else 0
+        return 0
+
+    rows = compare_reports(load_report(args.baseline), load_report(args.current), args.threshold)
+    return 1 if print_comparison(rows, args.threshold) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
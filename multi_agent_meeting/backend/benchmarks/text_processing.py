@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CEO文本处理基准
+
+用法（在 backend 目录下）:
+    python -m benchmarks.text_processing
+    python -m benchmarks.text_processing --chars 50000 --repeat 50
+
+对比逐关键词 `kw in text` 扫描的旧实现与预编译 KeywordMatcher 的新实现，
+输入为按真实CEO总结结构拼接的长文本。
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import (
+    check_ceo_wants_to_end_meeting, post_process_ceo_content,
+    OPENING_KEYWORDS, END_MEETING_KEYWORDS, SUMMARY_INDICATORS
+)
+
+# 组成长文本的句子片段
+SENTENCE_FRAGMENTS = [
+    "基于今天的深入讨论，我作为CEO为本轮讨论做总结。",
+    "技术团队提出了分阶段落地的架构方案，需要进一步评估成本。",
+    "市场部门强调用户体验与品牌一致性，这一点非常关键。",
+    "财务方面，预算需要在下季度重新审视，风险可控。",
+    "产品设计需要与运营执行紧密配合，确保功能按期交付。",
+    "我们需要明确责任分工和时间节点，避免执行偏差。",
+    "安全与合规是底线，监测机制必须提前建立。",
+    "关于数据治理，我们还需要补充更多事实依据。",
+]
+
+
+def build_ceo_summary(chars: int, seed: int = 42) -> str:
+    """生成指定长度、带段落结构的CEO总结文本"""
+    rng = random.Random(seed)
+    paragraphs: List[str] = []
+    length = 0
+    section = 1
+    while length < chars:
+        lines = [f"{section}、阶段性结论"]
+        lines.extend(rng.choice(SENTENCE_FRAGMENTS) for _ in range(rng.randint(3, 8)))
+        paragraph = '\n'.join(lines)
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+        section += 1
+    # 模拟模型输出的重复开场白和结尾
+    return "各位同事，上午好\n我们现在开始\n\n" + '\n\n'.join(paragraphs) + "\n\n总的来说，综上所述，感谢大家。"
+
+
+def legacy_check_ceo_wants_to_end_meeting(content: str) -> bool:
+    """旧实现：逐关键词扫描"""
+    content_lower = content.lower()
+    for keyword in END_MEETING_KEYWORDS:
+        if keyword in content_lower:
+            return True
+    summary_count = sum(1 for indicator in SUMMARY_INDICATORS if indicator in content_lower)
+    return summary_count >= 2 and "下一位" not in content_lower and "继续" not in content_lower
+
+
+def legacy_post_process_ceo_content(content: str) -> str:
+    """旧实现：每行对每个开场白关键词做一次子串扫描，再逐个执行清理正则"""
+    filtered_lines = []
+    skip_opening = False
+    for line in content.split('\n'):
+        line_lower = line.lower().strip()
+        if any(kw in line_lower for kw in OPENING_KEYWORDS):
+            skip_opening = True
+            continue
+        if skip_opening and (line.strip() == '' or line.startswith(('作为', '根据', '基于', '关于', '针对'))):
+            skip_opening = False
+        if not skip_opening:
+            filtered_lines.append(line)
+    content = '\n'.join(filtered_lines).strip()
+    content = re.sub(r'[😀-🙏🌀-🗿]', '', content)
+    for pattern in (r'~+', r'！+', r'？+', r'（.*?）'):
+        content = re.sub(pattern, '', content)
+    return re.sub(r'\s+', ' ', content).strip()
+
+
+def time_call(func: Callable[[str], object], text: str, repeat: int) -> float:
+    """返回单次调用的平均耗时（微秒）"""
+    func(text)  # 预热
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(text)
+    return (time.perf_counter() - start) * 1e6 / repeat
+
+
+def run(chars: int = 20000, repeat: int = 20) -> Dict[str, Dict[str, float]]:
+    """运行基准，返回 {用例: {legacy_us, current_us, speedup}}"""
+    text = build_ceo_summary(chars)
+    cases = {
+        'check_ceo_wants_to_end_meeting': (legacy_check_ceo_wants_to_end_meeting, check_ceo_wants_to_end_meeting),
+        'post_process_ceo_content': (legacy_post_process_ceo_content, lambda t: post_process_ceo_content(t, True, False)),
+    }
+
+    results = {}
+    for name, (legacy, current) in cases.items():
+        legacy_us = time_call(legacy, text, repeat)
+        current_us = time_call(current, text, repeat)
+        results[name] = {
+            'legacy_us': round(legacy_us, 1),
+            'current_us': round(current_us, 1),
+            'speedup': round(legacy_us / current_us, 2) if current_us else 0.0
+        }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='CEO文本处理基准')
+    parser.add_argument('--chars', type=int, default=20000, help='CEO总结文本长度（字符）')
+    parser.add_argument('--repeat', type=int, default=20, help='每个用例的重复次数')
+    args = parser.parse_args()
+
+    print(f"CEO总结长度: {args.chars} 字符, 重复 {args.repeat} 次")
+    for name, result in run(args.chars, args.repeat).items():
+        print(f"  {name:<34} 旧实现 {result['legacy_us']:>10.1f}us  新实现 {result['current_us']:>10.1f}us  x{result['speedup']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,23 +6,19 @@
 """
 
 import os
-import sys
+import json
 from typing import List, Dict, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
-# 设置控制台编码为UTF-8
-if sys.platform == "win32":
-    try:
-        import codecs
-        # 检查是否支持detach方法
-        if hasattr(sys.stdout, 'detach'):
-            sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
-            sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
-        # 设置控制台代码页为UTF-8
-        os.system("chcp 65001 > nul")
-    except Exception:
-        # 如果设置失败，忽略错误继续运行
-        pass
+# 模型路由：按调用类型选择模型端点
+ROUTE_CEO_ROUND = 'ceo_round'  # CEO开场与轮次总结
+ROUTE_CEO_FINAL = 'ceo_final'  # CEO最终总结（达到轮次或预算上限）
+ROUTE_AGENT = 'agent'  # 普通智能体发言
+ROUTE_MEETING_SUMMARY = 'meeting_summary'  # 结束会议时生成的会议总结
+MODEL_ROUTES = (ROUTE_CEO_ROUND, ROUTE_CEO_FINAL, ROUTE_AGENT, ROUTE_MEETING_SUMMARY)
+
+# 由 API_* 环境变量构成的默认端点名称
+DEFAULT_ENDPOINT = 'default'
 
 
 @dataclass
@@ -35,6 +31,18 @@ class APIConfig:
     timeout: int = 30
 
 
+@dataclass
+class ModelEndpointConfig:
+    """模型端点配置（同名端点共用模型实例池，即共用连接池）"""
+    name: str
+    model_type: str
+    base_url: str
+    temperature: float = 0.7
+    max_tokens: int = 4096
+    api_key_env: str = ""  # 从该环境变量读取API密钥，为空时使用智能体分配的密钥
+    extra_params: Dict[str, Any] = field(default_factory=dict)  # 其他生成参数（如 top_p）
+
+
 @dataclass
 class MeetingConfig:
     """会议配置"""
@@ -44,6 +52,16 @@ class MeetingConfig:
     auto_save_interval: int = 300  # 5分钟
     agent_count: int = 4  # 智能体数量
     ceo_agent_id: int = 0  # CEO智能体ID
+    agent_build_workers: int = 8  # 并行创建智能体的线程数
+    prewarm_agents: bool = True  # 启动后在后台预热模型实例
+    agent_pool_size: int = 1  # 每个API密钥预热/复用的模型实例数量
+    token_soft_budget: int = 0  # 单场会议软预算（令牌数），达到后缩小对话历史窗口，0表示不限制
+    token_hard_budget: int = 0  # 单场会议硬预算（令牌数），达到后强制CEO最终总结，0表示不限制
+    history_mode: str = "window"  # 智能体的对话历史：window（最近的消息）或 retrieval（按相关性检索）
+    history_top_k: int = 6  # retrieval 模式下检索的较早发言数
+    history_recent_turns: int = 4  # retrieval 模式下始终包含的最近发言数
+    speaker_selection: str = "order"  # 下一位发言者：order（按ID轮转）或 relevance（按与CEO发言的相关度）
+    speaker_fairness_weight: float = 0.1  # relevance 模式下每多发言一次扣除的分数
 
 
 @dataclass
@@ -60,7 +78,7 @@ class LoggingConfig:
 class WebSocketConfig:
     """WebSocket配置"""
     cors_allowed_origins: str = "*"
-    async_mode: str = "threading"
+    async_mode: str = "threading"  # threading / eventlet / gevent（协程模式在导入 app_new 时打补丁）
     ping_timeout: int = 60
     ping_interval: int = 25
     # 新增WebSocket优化配置
@@ -72,23 +90,138 @@ class WebSocketConfig:
     cors_credentials: bool = False  # 禁用CORS凭据以简化跨域
 
 
+@dataclass
+class AdminConfig:
+    """管理接口配置"""
+    token: str = ""  # 管理令牌，为空时禁用所有管理接口
+
+
+@dataclass
+class ProfilerConfig:
+    """采样分析器配置"""
+    sample_interval_ms: int = 10  # 采样间隔（毫秒）
+    default_duration: int = 30  # 默认采样时长（秒）
+    max_duration: int = 120  # 单次采样最大时长（秒）
+    max_stack_depth: int = 64  # 单个调用栈最大深度
+    top_n: int = 20  # 摘要中默认展示的函数数量
+
+
+@dataclass
+class WechatConfig:
+    """微信登录配置"""
+    app_id: str = ""
+    app_secret: str = ""
+    redirect_uri: str = ""
+    qr_code_expire_time: int = 300  # 二维码有效期（秒）
+    session_expire_time: int = 3600  # 用户会话有效期（秒）
+    enable_login: bool = True
+    qr_pool_size: int = 8  # 预生成的登录会话数量（0表示不预生成）
+    qr_render_workers: int = 2  # 二维码渲染线程数
+    qr_image_cache_size: int = 256  # 缓存的二维码图片数量
+    long_poll_timeout: int = 25  # 登录状态长轮询最长等待时间（秒）
+
+
+@dataclass
+class SessionStoreConfig:
+    """会话存储配置"""
+    backend: str = "memory"  # memory / sqlite / redis
+    path: str = ""  # sqlite 数据库文件，为空时使用 temp/sessions.db
+    redis_url: str = "redis://localhost:6379/0"
+    max_entries: int = 100000  # 最多保存的会话数量，超出后按最近最少使用淘汰
+    sweep_interval: int = 30  # 后台清理过期会话的间隔（秒）
+
+
+@dataclass
+class AdmissionConfig:
+    """准入控制配置"""
+    enabled: bool = True
+    max_in_flight: int = 8  # 同时进行的模型生成数量
+    max_queue: int = 16  # 排队等待的生成请求数量，超出时直接返回429
+    max_queue_wait: float = 5.0  # 排队最长等待时间（秒），超时返回429
+    user_max_in_flight: int = 2  # 每个用户同时进行的生成数量（0表示不限制）
+    user_meetings_per_hour: int = 0  # 每个用户每小时可开始的会议数量（0表示不限制）
+
+
+@dataclass
+class JobConfig:
+    """后台任务配置（结束会议、导出、重建索引等）"""
+    workers: int = 2  # 后台任务线程数
+    max_history: int = 200  # 保留的已完成任务数量
+
+
+@dataclass
+class OutputConfig:
+    """输出长度控制配置"""
+    enabled: bool = True
+    tokens_per_char: float = 1.0  # 每个字估算的输出令牌数，用于由字数限制推算 max_tokens
+    token_headroom: float = 1.5  # max_tokens 相对字数限制的余量倍数
+    trim_ratio: float = 1.5  # 输出超过字数限制的该倍数时按句子边界截断（0表示不截断）
+    stop_sequences: List[str] = field(default_factory=list)  # 停止序列（最多4个）
+    char_limits: Dict[str, int] = field(default_factory=dict)  # 按路由覆盖提示词中的字数限制
+
+
+@dataclass
+class AnalyticsConfig:
+    """会议分析导出配置"""
+    export_dir: str = ""  # Arrow IPC 文件的输出目录（为空时使用 saved_meetings/_analytics）
+    auto_export: bool = False  # 每场会议保存后在后台任务中增量导出
+
+
+@dataclass
+class KnowledgeConfig:
+    """私域知识检索配置"""
+    enabled: bool = False
+    source_dirs: List[str] = field(default_factory=list)  # 知识文档目录（markdown/文本）
+    index_dir: str = ""  # 索引文件目录（为空时使用 temp/knowledge_index）
+    chunk_chars: int = 400  # 每个片段的最大字数
+    chunk_overlap: int = 80  # 同一段落切分时相邻片段重叠的字数
+    top_k: int = 3  # 注入智能体输入的片段数上限
+    token_budget: int = 300  # 注入片段的令牌预算
+    min_score: float = 0.1  # 低于该相关度的片段不注入
+
+
+@dataclass
+class BreakoutConfig:
+    """分组讨论配置（大规模会议中智能体分组并行讨论，CEO只看各组纪要）"""
+    enabled: bool = False
+    min_agents: int = 8  # 非CEO智能体达到该数量时才分组
+    group_size: int = 4  # 每组的智能体数量
+    max_parallel: int = 4  # 同时进行讨论的组数
+    digest_chars: int = 120  # 纪要中每条发言保留的字数
+
+
+@dataclass
+class CassetteConfig:
+    """模型调用录制/回放配置"""
+    mode: str = "off"  # off / record / replay
+    path: str = ""  # 回放使用的 cassette.json 或已保存的会议目录
+    replay_latency: bool = False  # 回放时是否按录制的耗时等待
+    latency_scale: float = 1.0  # 回放耗时的缩放系数
+
+
 class Config:
     """主配置类"""
     
     def __init__(self):
-        # API密钥配置
+        # API密钥配置（API_KEYS 为逗号分隔的密钥列表，设置时替换默认密钥；智能体从密钥池分配密钥）
         self.api_keys: List[str] = [
+            key.strip() for key in os.getenv('API_KEYS', '').split(',') if key.strip()
+        ] or [
             "sk-be71c40c6090410dbd554490cf7629d5",
             "sk-f06a9bfd2bc1423991dd6d5094e1a2cd", 
             "sk-54022c1f872a4af1bc52fc9071b2a18d",
             "sk-d8dd47f48a8f433ca437ccf425f0c125"
         ]
+        # 每个密钥同时进行的模型调用上限（0表示不限制）
+        self.api_key_max_in_flight: int = int(os.getenv('API_KEY_MAX_IN_FLIGHT', '0'))
         
         # Flask配置
         self.flask_secret_key: str = os.getenv('FLASK_SECRET_KEY', 'multi_agent_meeting_secret_key')
         self.flask_host: str = os.getenv('FLASK_HOST', '0.0.0.0')
         self.flask_port: int = int(os.getenv('FLASK_PORT', '5000'))
         self.flask_debug: bool = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
+        # 前面的反向代理层数：大于0时按 X-Forwarded-For/X-Forwarded-Proto 还原客户端地址（只信任这么多层）
+        self.proxy_trusted_hops: int = int(os.getenv('PROXY_TRUSTED_HOPS', '0'))
         
         # API配置
         self.api = APIConfig(
@@ -99,6 +232,12 @@ class Config:
             timeout=int(os.getenv('API_TIMEOUT', '30'))
         )
         
+        # 模型路由表：调用类型 -> 按顺序尝试的端点（第一个失败时依次使用后备端点）
+        self.model_routes_file: str = os.getenv('MODEL_ROUTES_FILE', '')
+        self.model_endpoints: Dict[str, ModelEndpointConfig] = {}
+        self.model_routes: Dict[str, List[str]] = {}
+        self.load_model_routes(self.model_routes_file)
+        
         # 会议配置
         self.meeting = MeetingConfig(
             max_rounds=int(os.getenv('MEETING_MAX_ROUNDS', '13')),
@@ -106,7 +245,17 @@ class Config:
             max_conversation_history=int(os.getenv('MEETING_MAX_HISTORY', '20')),
             auto_save_interval=int(os.getenv('MEETING_AUTO_SAVE_INTERVAL', '300')),
             agent_count=int(os.getenv('MEETING_AGENT_COUNT', '4')),
-            ceo_agent_id=int(os.getenv('MEETING_CEO_AGENT_ID', '0'))
+            ceo_agent_id=int(os.getenv('MEETING_CEO_AGENT_ID', '0')),
+            agent_build_workers=int(os.getenv('MEETING_AGENT_BUILD_WORKERS', '8')),
+            prewarm_agents=os.getenv('MEETING_PREWARM_AGENTS', 'True').lower() == 'true',
+            agent_pool_size=int(os.getenv('MEETING_AGENT_POOL_SIZE', '1')),
+            token_soft_budget=int(os.getenv('MEETING_TOKEN_SOFT_BUDGET', '0')),
+            token_hard_budget=int(os.getenv('MEETING_TOKEN_HARD_BUDGET', '0')),
+            history_mode=os.getenv('MEETING_HISTORY_MODE', 'window').lower(),
+            history_top_k=int(os.getenv('MEETING_HISTORY_TOP_K', '6')),
+            history_recent_turns=int(os.getenv('MEETING_HISTORY_RECENT_TURNS', '4')),
+            speaker_selection=os.getenv('MEETING_SPEAKER_SELECTION', 'order').lower(),
+            speaker_fairness_weight=float(os.getenv('MEETING_SPEAKER_FAIRNESS_WEIGHT', '0.1'))
         )
         
         # 日志配置
@@ -126,29 +275,180 @@ class Config:
             ping_interval=int(os.getenv('WEBSOCKET_PING_INTERVAL', '25'))
         )
         
+        # 管理接口配置
+        self.admin = AdminConfig(
+            token=os.getenv('ADMIN_TOKEN', '')
+        )
+        
+        # 采样分析器配置
+        self.profiler = ProfilerConfig(
+            sample_interval_ms=int(os.getenv('PROFILER_SAMPLE_INTERVAL_MS', '10')),
+            default_duration=int(os.getenv('PROFILER_DEFAULT_DURATION', '30')),
+            max_duration=int(os.getenv('PROFILER_MAX_DURATION', '120')),
+            max_stack_depth=int(os.getenv('PROFILER_MAX_STACK_DEPTH', '64')),
+            top_n=int(os.getenv('PROFILER_TOP_N', '20'))
+        )
+        
+        # 微信登录配置
+        self.wechat = WechatConfig(
+            app_id=os.getenv('WECHAT_APP_ID', ''),
+            app_secret=os.getenv('WECHAT_APP_SECRET', ''),
+            redirect_uri=os.getenv('WECHAT_REDIRECT_URI', ''),
+            qr_code_expire_time=int(os.getenv('WECHAT_QR_EXPIRE_TIME', '300')),
+            session_expire_time=int(os.getenv('WECHAT_SESSION_EXPIRE_TIME', '3600')),
+            enable_login=os.getenv('WECHAT_ENABLE_LOGIN', 'True').lower() == 'true',
+            qr_pool_size=int(os.getenv('WECHAT_QR_POOL_SIZE', '8')),
+            qr_render_workers=int(os.getenv('WECHAT_QR_RENDER_WORKERS', '2')),
+            qr_image_cache_size=int(os.getenv('WECHAT_QR_IMAGE_CACHE_SIZE', '256')),
+            long_poll_timeout=int(os.getenv('WECHAT_LONG_POLL_TIMEOUT', '25'))
+        )
+        
+        # 会话存储配置
+        self.session_store = SessionStoreConfig(
+            backend=os.getenv('SESSION_STORE_BACKEND', 'memory').lower(),
+            path=os.getenv('SESSION_STORE_PATH', ''),
+            redis_url=os.getenv('SESSION_STORE_REDIS_URL', 'redis://localhost:6379/0'),
+            max_entries=int(os.getenv('SESSION_STORE_MAX_ENTRIES', '100000')),
+            sweep_interval=int(os.getenv('SESSION_STORE_SWEEP_INTERVAL', '30'))
+        )
+        
+        # 准入控制配置
+        self.admission = AdmissionConfig(
+            enabled=os.getenv('ADMISSION_ENABLED', 'True').lower() == 'true',
+            max_in_flight=int(os.getenv('ADMISSION_MAX_IN_FLIGHT', '8')),
+            max_queue=int(os.getenv('ADMISSION_MAX_QUEUE', '16')),
+            max_queue_wait=float(os.getenv('ADMISSION_MAX_QUEUE_WAIT', '5.0')),
+            user_max_in_flight=int(os.getenv('ADMISSION_USER_MAX_IN_FLIGHT', '2')),
+            user_meetings_per_hour=int(os.getenv('ADMISSION_USER_MEETINGS_PER_HOUR', '0'))
+        )
+        
+        # 后台任务配置
+        self.jobs = JobConfig(
+            workers=int(os.getenv('JOBS_WORKERS', '2')),
+            max_history=int(os.getenv('JOBS_MAX_HISTORY', '200'))
+        )
+        
+        # 输出长度控制配置
+        self.output = OutputConfig(
+            enabled=os.getenv('OUTPUT_GOVERNOR_ENABLED', 'True').lower() == 'true',
+            tokens_per_char=float(os.getenv('OUTPUT_TOKENS_PER_CHAR', '1.0')),
+            token_headroom=float(os.getenv('OUTPUT_TOKEN_HEADROOM', '1.5')),
+            trim_ratio=float(os.getenv('OUTPUT_TRIM_RATIO', '1.5')),
+            stop_sequences=[
+                stop for stop in os.getenv('OUTPUT_STOP_SEQUENCES', '【本次任务】|对话历史:|发言统计:').split('|') if stop
+            ],
+            char_limits={
+                route.strip(): int(limit)
+                for route, _, limit in (
+                    item.partition('=') for item in os.getenv('OUTPUT_CHAR_LIMITS', '').split(',') if item.strip()
+                )
+            }
+        )
+        
+        # 录制/回放配置
+        self.cassette = CassetteConfig(
+            mode=os.getenv('CASSETTE_MODE', 'off').lower(),
+            path=os.getenv('CASSETTE_PATH', ''),
+            replay_latency=os.getenv('CASSETTE_REPLAY_LATENCY', 'False').lower() == 'true',
+            latency_scale=float(os.getenv('CASSETTE_LATENCY_SCALE', '1.0'))
+        )
+        
         # 文件路径配置
         self.logs_dir: str = os.path.join(os.path.dirname(__file__), 'logs')
         self.temp_dir: str = os.path.join(os.path.dirname(__file__), 'temp')
         self.meetings_save_dir: str = os.path.join(os.path.dirname(__file__), 'saved_meetings')
         
-        # 确保目录存在
+        # 会议分析导出配置
+        self.analytics = AnalyticsConfig(
+            export_dir=os.getenv('ANALYTICS_EXPORT_DIR', '') or os.path.join(self.meetings_save_dir, '_analytics'),
+            auto_export=os.getenv('ANALYTICS_AUTO_EXPORT', 'False').lower() == 'true'
+        )
+        
+        # 私域知识检索配置（多个目录用系统路径分隔符分隔）
+        default_knowledge_dir = os.path.normpath(
+            os.path.join(os.path.dirname(__file__), '..', '..', 'Legion', '私域知识')
+        )
+        self.knowledge = KnowledgeConfig(
+            enabled=os.getenv('KNOWLEDGE_ENABLED', 'False').lower() == 'true',
+            source_dirs=[
+                path.strip() for path in
+                (os.getenv('KNOWLEDGE_SOURCE_DIRS', '') or default_knowledge_dir).split(os.pathsep) if path.strip()
+            ],
+            index_dir=os.getenv('KNOWLEDGE_INDEX_DIR', '') or os.path.join(self.temp_dir, 'knowledge_index'),
+            chunk_chars=int(os.getenv('KNOWLEDGE_CHUNK_CHARS', '400')),
+            chunk_overlap=int(os.getenv('KNOWLEDGE_CHUNK_OVERLAP', '80')),
+            top_k=int(os.getenv('KNOWLEDGE_TOP_K', '3')),
+            token_budget=int(os.getenv('KNOWLEDGE_TOKEN_BUDGET', '300')),
+            min_score=float(os.getenv('KNOWLEDGE_MIN_SCORE', '0.1'))
+        )
+        
+        # 分组讨论配置
+        self.breakout = BreakoutConfig(
+            enabled=os.getenv('BREAKOUT_ENABLED', 'False').lower() == 'true',
+            min_agents=int(os.getenv('BREAKOUT_MIN_AGENTS', '8')),
+            group_size=int(os.getenv('BREAKOUT_GROUP_SIZE', '4')),
+            max_parallel=int(os.getenv('BREAKOUT_MAX_PARALLEL', '4')),
+            digest_chars=int(os.getenv('BREAKOUT_DIGEST_CHARS', '120'))
+        )
+    
+    def ensure_directories(self) -> None:
+        """确保运行所需目录存在（在应用启动时调用，导入配置不产生文件系统副作用）"""
         os.makedirs(self.logs_dir, exist_ok=True)
         os.makedirs(self.temp_dir, exist_ok=True)
         os.makedirs(self.meetings_save_dir, exist_ok=True)
     
-    def get_api_key(self, index: int) -> str:
-        """获取指定索引的API密钥"""
-        if 0 <= index < len(self.api_keys):
-            return self.api_keys[index]
-        return self.api_keys[0]  # 默认返回第一个
+    def load_model_routes(self, path: str = '') -> None:
+        """
+        加载模型路由表
+        
+        未配置时所有调用类型都使用由 API_* 构成的默认端点。路由文件为JSON：
+        {"endpoints": {名称: {model_type, base_url, temperature, max_tokens, api_key_env, extra_params}},
+         "routes": {调用类型: [端点名称, ...]}}，端点未填写的字段取 API_* 的值，未配置的调用类型使用默认端点。
+        """
+        endpoints = {
+            DEFAULT_ENDPOINT: ModelEndpointConfig(
+                name=DEFAULT_ENDPOINT,
+                model_type=self.api.model_type,
+                base_url=self.api.base_url,
+                temperature=self.api.temperature,
+                max_tokens=self.api.max_tokens
+            )
+        }
+        routes = {route: [DEFAULT_ENDPOINT] for route in MODEL_ROUTES}
+        
+        if path:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for name, options in data.get('endpoints', {}).items():
+                endpoints[name] = ModelEndpointConfig(
+                    name=name,
+                    model_type=options.get('model_type', self.api.model_type),
+                    base_url=options.get('base_url', self.api.base_url),
+                    temperature=float(options.get('temperature', self.api.temperature)),
+                    max_tokens=int(options.get('max_tokens', self.api.max_tokens)),
+                    api_key_env=options.get('api_key_env', ''),
+                    extra_params=dict(options.get('extra_params', {}))
+                )
+            for route, names in data.get('routes', {}).items():
+                routes[route] = [names] if isinstance(names, str) else list(names)
+        
+        self.model_endpoints = endpoints
+        self.model_routes = routes
     
     def validate_config(self) -> List[str]:
         """验证配置"""
         errors = []
         
         # 验证API密钥
-        if not self.api_keys or len(self.api_keys) < 4:
-            errors.append("API密钥配置不完整，需要至少4个密钥")
+        if not self.api_keys:
+            errors.append("API密钥配置不完整，需要至少1个密钥")
+        
+        if self.api_key_max_in_flight < 0:
+            errors.append("每个密钥的并发调用上限不能为负数")
+        
+        # 验证异步模式
+        if self.websocket.async_mode not in ('threading', 'eventlet', 'gevent'):
+            errors.append("WebSocket异步模式必须是 threading、eventlet 或 gevent")
         
         # 验证Flask配置
         if not self.flask_secret_key:
@@ -180,6 +480,133 @@ class Config:
         if self.meeting.ceo_agent_id < 0:
             errors.append("CEO智能体ID不能为负数")
         
+        if self.meeting.agent_build_workers <= 0:
+            errors.append("智能体创建线程数必须大于0")
+        
+        if self.meeting.token_soft_budget < 0 or self.meeting.token_hard_budget < 0:
+            errors.append("会议令牌预算不能为负数")
+        
+        if 0 < self.meeting.token_hard_budget < self.meeting.token_soft_budget:
+            errors.append("会议令牌硬预算不能小于软预算")
+        
+        if self.meeting.history_mode not in ('window', 'retrieval'):
+            errors.append("对话历史模式必须是 window 或 retrieval")
+        
+        if self.meeting.history_top_k < 0 or self.meeting.history_recent_turns < 0:
+            errors.append("检索的历史发言数不能为负数")
+        
+        if self.meeting.speaker_selection not in ('order', 'relevance'):
+            errors.append("发言者选择方式必须是 order 或 relevance")
+        
+        if self.meeting.speaker_fairness_weight < 0:
+            errors.append("发言公平性权重不能为负数")
+        
+        # 验证采样分析器配置
+        if self.profiler.sample_interval_ms <= 0:
+            errors.append("采样间隔必须大于0毫秒")
+        
+        if self.profiler.max_duration <= 0:
+            errors.append("采样最大时长必须大于0")
+        
+        # 验证微信登录配置
+        if self.wechat.qr_pool_size < 0:
+            errors.append("预生成登录会话数量不能为负数")
+        
+        if self.wechat.qr_render_workers <= 0:
+            errors.append("二维码渲染线程数必须大于0")
+        
+        if self.wechat.qr_image_cache_size <= 0:
+            errors.append("二维码图片缓存数量必须大于0")
+        
+        if self.wechat.long_poll_timeout <= 0:
+            errors.append("登录状态长轮询等待时间必须大于0")
+        
+        # 验证会话存储配置
+        if self.session_store.backend not in ('memory', 'sqlite', 'redis'):
+            errors.append("会话存储后端必须是 memory、sqlite 或 redis")
+        
+        if self.session_store.max_entries <= 0:
+            errors.append("会话存储容量必须大于0")
+        
+        if self.session_store.sweep_interval <= 0:
+            errors.append("会话清理间隔必须大于0")
+        
+        # 验证模型路由表
+        for route, names in self.model_routes.items():
+            if route not in MODEL_ROUTES:
+                errors.append(f"未知的模型路由: {route}（可选 {', '.join(MODEL_ROUTES)}）")
+            if not names:
+                errors.append(f"模型路由 {route} 没有配置端点")
+            for name in names:
+                if name not in self.model_endpoints:
+                    errors.append(f"模型路由 {route} 引用了不存在的端点: {name}")
+        
+        for endpoint in self.model_endpoints.values():
+            if endpoint.max_tokens <= 0:
+                errors.append(f"模型端点 {endpoint.name} 的 max_tokens 必须大于0")
+            if endpoint.api_key_env and not os.getenv(endpoint.api_key_env):
+                errors.append(f"模型端点 {endpoint.name} 的API密钥环境变量未设置: {endpoint.api_key_env}")
+        
+        if self.proxy_trusted_hops < 0:
+            errors.append("反向代理层数不能为负数")
+        
+        # 验证准入控制配置
+        if self.admission.max_in_flight <= 0:
+            errors.append("同时进行的生成数量必须大于0")
+        
+        if self.admission.max_queue < 0 or self.admission.max_queue_wait < 0:
+            errors.append("生成排队数量和等待时间不能为负数")
+        
+        if self.admission.user_max_in_flight < 0 or self.admission.user_meetings_per_hour < 0:
+            errors.append("用户配额不能为负数")
+        
+        # 验证后台任务配置
+        if self.jobs.workers <= 0:
+            errors.append("后台任务线程数必须大于0")
+        
+        if self.jobs.max_history <= 0:
+            errors.append("保留的已完成任务数量必须大于0")
+        
+        # 验证输出长度控制配置
+        if self.output.tokens_per_char <= 0 or self.output.token_headroom < 1:
+            errors.append("每字令牌数必须大于0，令牌余量倍数不能小于1")
+        
+        if self.output.trim_ratio and self.output.trim_ratio < 1:
+            errors.append("输出截断倍数不能小于1（0表示不截断）")
+        
+        if len(self.output.stop_sequences) > 4:
+            errors.append("停止序列最多4个")
+        
+        for route, limit in self.output.char_limits.items():
+            if route not in MODEL_ROUTES:
+                errors.append(f"字数限制中未知的模型路由: {route}")
+            if limit < 0:
+                errors.append(f"模型路由 {route} 的字数限制不能为负数")
+        
+        # 验证私域知识检索配置
+        if self.knowledge.chunk_chars <= 0 or not 0 <= self.knowledge.chunk_overlap < self.knowledge.chunk_chars:
+            errors.append("知识片段字数必须大于0，重叠字数必须小于片段字数")
+        
+        if self.knowledge.top_k < 0 or self.knowledge.token_budget < 0:
+            errors.append("知识片段数和令牌预算不能为负数")
+        
+        # 验证分组讨论配置
+        if self.breakout.group_size < 2 or self.breakout.min_agents < self.breakout.group_size:
+            errors.append("分组讨论每组至少2个智能体，分组阈值不能小于每组人数")
+        
+        if self.breakout.max_parallel <= 0 or self.breakout.digest_chars <= 0:
+            errors.append("分组讨论并行组数和纪要字数必须大于0")
+        
+        # 验证录制/回放配置
+        if self.cassette.mode not in ('off', 'record', 'replay'):
+            errors.append("录制/回放模式必须是 off、record 或 replay")
+        
+        if self.cassette.mode == 'replay' and not self.cassette.path:
+            errors.append("回放模式需要配置 CASSETTE_PATH")
+        
+        if self.cassette.latency_scale < 0:
+            errors.append("回放耗时缩放系数不能为负数")
+        
         return errors
     
     def to_dict(self) -> Dict[str, Any]:
@@ -188,14 +615,17 @@ class Config:
             'flask': {
                 'host': self.flask_host,
                 'port': self.flask_port,
-                'debug': self.flask_debug
+                'debug': self.flask_debug,
+                'proxy_trusted_hops': self.proxy_trusted_hops
             },
             'api': {
                 'base_url': self.api.base_url,
                 'model_type': self.api.model_type,
                 'temperature': self.api.temperature,
                 'max_tokens': self.api.max_tokens,
-                'timeout': self.api.timeout
+                'timeout': self.api.timeout,
+                'key_count': len(self.api_keys),
+                'key_max_in_flight': self.api_key_max_in_flight
             },
             'meeting': {
                 'max_rounds': self.meeting.max_rounds,
@@ -203,7 +633,17 @@ class Config:
                 'max_conversation_history': self.meeting.max_conversation_history,
                 'auto_save_interval': self.meeting.auto_save_interval,
                 'agent_count': self.meeting.agent_count,
-                'ceo_agent_id': self.meeting.ceo_agent_id
+                'ceo_agent_id': self.meeting.ceo_agent_id,
+                'agent_build_workers': self.meeting.agent_build_workers,
+                'prewarm_agents': self.meeting.prewarm_agents,
+                'agent_pool_size': self.meeting.agent_pool_size,
+                'token_soft_budget': self.meeting.token_soft_budget,
+                'token_hard_budget': self.meeting.token_hard_budget,
+                'history_mode': self.meeting.history_mode,
+                'history_top_k': self.meeting.history_top_k,
+                'history_recent_turns': self.meeting.history_recent_turns,
+                'speaker_selection': self.meeting.speaker_selection,
+                'speaker_fairness_weight': self.meeting.speaker_fairness_weight
             },
             'logging': {
                 'level': self.logging.level,
@@ -218,6 +658,94 @@ class Config:
                 'ping_timeout': self.websocket.ping_timeout,
                 'ping_interval': self.websocket.ping_interval
             },
+            'admin': {
+                'enabled': bool(self.admin.token)
+            },
+            'profiler': {
+                'sample_interval_ms': self.profiler.sample_interval_ms,
+                'default_duration': self.profiler.default_duration,
+                'max_duration': self.profiler.max_duration,
+                'max_stack_depth': self.profiler.max_stack_depth,
+                'top_n': self.profiler.top_n
+            },
+            'wechat': {
+                'app_id': self.wechat.app_id,
+                'redirect_uri': self.wechat.redirect_uri,
+                'qr_code_expire_time': self.wechat.qr_code_expire_time,
+                'session_expire_time': self.wechat.session_expire_time,
+                'enable_login': self.wechat.enable_login,
+                'qr_pool_size': self.wechat.qr_pool_size,
+                'qr_render_workers': self.wechat.qr_render_workers,
+                'qr_image_cache_size': self.wechat.qr_image_cache_size,
+                'long_poll_timeout': self.wechat.long_poll_timeout
+            },
+            'session_store': {
+                'backend': self.session_store.backend,
+                'path': self.session_store.path,
+                'max_entries': self.session_store.max_entries,
+                'sweep_interval': self.session_store.sweep_interval
+            },
+            'model_routes': {
+                'file': self.model_routes_file,
+                'routes': self.model_routes,
+                'endpoints': {
+                    name: {
+                        'model_type': endpoint.model_type,
+                        'base_url': endpoint.base_url,
+                        'temperature': endpoint.temperature,
+                        'max_tokens': endpoint.max_tokens,
+                        'api_key_env': endpoint.api_key_env
+                    }
+                    for name, endpoint in self.model_endpoints.items()
+                }
+            },
+            'admission': {
+                'enabled': self.admission.enabled,
+                'max_in_flight': self.admission.max_in_flight,
+                'max_queue': self.admission.max_queue,
+                'max_queue_wait': self.admission.max_queue_wait,
+                'user_max_in_flight': self.admission.user_max_in_flight,
+                'user_meetings_per_hour': self.admission.user_meetings_per_hour
+            },
+            'jobs': {
+                'workers': self.jobs.workers,
+                'max_history': self.jobs.max_history
+            },
+            'output': {
+                'enabled': self.output.enabled,
+                'tokens_per_char': self.output.tokens_per_char,
+                'token_headroom': self.output.token_headroom,
+                'trim_ratio': self.output.trim_ratio,
+                'stop_sequences': self.output.stop_sequences,
+                'char_limits': self.output.char_limits
+            },
+            'cassette': {
+                'mode': self.cassette.mode,
+                'path': self.cassette.path,
+                'replay_latency': self.cassette.replay_latency,
+                'latency_scale': self.cassette.latency_scale
+            },
+            'analytics': {
+                'export_dir': self.analytics.export_dir,
+                'auto_export': self.analytics.auto_export
+            },
+            'knowledge': {
+                'enabled': self.knowledge.enabled,
+                'source_dirs': self.knowledge.source_dirs,
+                'index_dir': self.knowledge.index_dir,
+                'chunk_chars': self.knowledge.chunk_chars,
+                'chunk_overlap': self.knowledge.chunk_overlap,
+                'top_k': self.knowledge.top_k,
+                'token_budget': self.knowledge.token_budget,
+                'min_score': self.knowledge.min_score
+            },
+            'breakout': {
+                'enabled': self.breakout.enabled,
+                'min_agents': self.breakout.min_agents,
+                'group_size': self.breakout.group_size,
+                'max_parallel': self.breakout.max_parallel,
+                'digest_chars': self.breakout.digest_chars
+            },
             'paths': {
                 'logs_dir': self.logs_dir,
                 'temp_dir': self.temp_dir,
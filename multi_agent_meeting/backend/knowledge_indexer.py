@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+私域知识索引
+将知识文档目录（默认 Legion/私域知识）切分为片段，增量建立 BM25 + 向量索引（需要安装 numpy）
+
+用法（在 backend 目录下）:
+    python knowledge_indexer.py                       # 增量更新（只处理变化的文件）
+    python knowledge_indexer.py --rebuild             # 全部重新建立
+    python knowledge_indexer.py --query "需求拆解流程" --top-k 5
+
+索引目录为 KNOWLEDGE_INDEX_DIR（默认 temp/knowledge_index），服务运行时以内存映射方式加载。
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+# 添加当前目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils import setup_console_encoding
+from config import config
+from logging_config import setup_logging
+from services.knowledge_service import KnowledgeIndex
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='私域知识索引')
+    parser.add_argument('--source-dir', action='append', help='知识文档目录（可重复，默认 KNOWLEDGE_SOURCE_DIRS）')
+    parser.add_argument('--index-dir', default=config.knowledge.index_dir, help='索引目录')
+    parser.add_argument('--rebuild', action='store_true', help='全部重新建立索引')
+    parser.add_argument('--query', help='检索测试：输出最相关的片段及耗时')
+    parser.add_argument('--top-k', type=int, default=config.knowledge.top_k, help='检索的片段数')
+    args = parser.parse_args()
+
+    setup_console_encoding()
+    setup_logging(log_level='WARNING', enable_console=True, enable_file=False)
+
+    index = KnowledgeIndex(args.source_dir or config.knowledge.source_dirs, args.index_dir)
+    result = index.rebuild() if args.rebuild else index.refresh()
+
+    if args.query:
+        started = time.perf_counter()
+        hits = index.search(args.query, args.top_k)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        result = {
+            'query': args.query,
+            'elapsed_ms': round(elapsed_ms, 3),
+            'hits': [{'source': chunk.label(), 'score': round(score, 4), 'text': chunk.text} for chunk, score in hits]
+        }
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
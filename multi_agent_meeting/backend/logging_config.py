@@ -6,26 +6,11 @@
 """
 
 import os
-import sys
 import logging
 import logging.handlers
 from datetime import datetime
 from typing import Optional
 
-# 设置控制台编码为UTF-8
-if sys.platform == "win32":
-    try:
-        import codecs
-        # 检查是否支持detach方法
-        if hasattr(sys.stdout, 'detach'):
-            sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
-            sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
-        # 设置控制台代码页为UTF-8
-        os.system("chcp 65001 > nul")
-    except Exception:
-        # 如果设置失败，忽略错误继续运行
-        pass
-
 
 class ColoredFormatter(logging.Formatter):
     """彩色日志格式化器"""
@@ -145,10 +130,3 @@ def get_logger(name: str = 'multi_agent_meeting') -> logging.Logger:
     """
     return logging.getLogger(name)
 
-
-# 创建默认logger
-default_logger = setup_logging(
-    log_level=os.getenv('LOG_LEVEL', 'INFO'),
-    enable_console=True,
-    enable_file=True
-)
@@ -5,26 +5,14 @@
 定义系统中使用的数据结构
 """
 
-import os
 import sys
-from dataclasses import dataclass, asdict
-from typing import Optional, Any, Dict, List
+import time
+from array import array
+from collections import Counter
+from dataclasses import dataclass, asdict, field
+from typing import Optional, Any, Dict, List, Set, Tuple, Iterable, Iterator, Union
 from datetime import datetime
 
-# 设置控制台编码为UTF-8
-if sys.platform == "win32":
-    try:
-        import codecs
-        # 检查是否支持detach方法
-        if hasattr(sys.stdout, 'detach'):
-            sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
-            sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
-        # 设置控制台代码页为UTF-8
-        os.system("chcp 65001 > nul")
-    except Exception:
-        # 如果设置失败，忽略错误继续运行
-        pass
-
 
 @dataclass
 class Agent:
@@ -35,6 +23,10 @@ class Agent:
     api_key: str
     agent: Optional[Any] = None  # CAMEL ChatAgent实例
     model: Optional[Any] = None  # 模型实例
+    endpoint: str = ""  # 首选模型端点名称（agent/model 对应该端点）
+    # 按 (路由, 端点名称) 创建的 ChatAgent 和模型实例（其他路由或后备端点首次使用时创建）
+    endpoint_agents: Dict[Tuple[str, str], Any] = field(default_factory=dict, repr=False)
+    endpoint_models: Dict[Tuple[str, str], Any] = field(default_factory=dict, repr=False)
     
     def to_dict(self) -> Dict:
         """转换为字典"""
@@ -44,9 +36,9 @@ class Agent:
         return f"Agent(id={self.id}, role='{self.role}', description='{self.description[:50]}...')"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Message:
-    """消息数据结构"""
+    """消息数据结构（不可变，使用 __slots__ 减少内存占用）"""
     agent_id: int
     role: str
     content: str
@@ -55,7 +47,24 @@ class Message:
     
     def to_dict(self) -> Dict:
         """转换为字典"""
-        return asdict(self)
+        return {
+            'agent_id': self.agent_id,
+            'role': self.role,
+            'content': self.content,
+            'timestamp': self.timestamp,
+            'round_number': self.round_number
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Message':
+        """从字典创建消息"""
+        return cls(
+            agent_id=int(data.get('agent_id', -1)),
+            role=data.get('role', ''),
+            content=data.get('content', ''),
+            timestamp=float(data.get('timestamp', 0.0)),
+            round_number=int(data.get('round_number', 0))
+        )
     
     def get_formatted_time(self) -> str:
         """获取格式化的时间"""
@@ -100,6 +109,75 @@ class MeetingConfig:
         return errors
 
 
+class MessageStore:
+    """
+    紧凑的会议消息存储
+    
+    消息以不可变的 Message 记录保存，角色名称做字符串驻留；agent_id 额外保存为
+    列式数组，按发言人查找和统计（last_from、speaker_counts）无需逐条访问对象。
+    只有在序列化边界（接口响应、保存会议）才通过 to_dicts() 生成字典。
+    """
+    __slots__ = ('_records', 'agent_ids')
+    
+    def __init__(self, messages: Iterable[Union[Message, Dict]] = ()):
+        self._records: List[Message] = []
+        self.agent_ids = array('i')
+        for message in messages:
+            self.append(message)
+    
+    def append(self, message: Union[Message, Dict]) -> Message:
+        """追加消息，返回实际保存的记录"""
+        if not isinstance(message, Message):
+            message = Message.from_dict(message)
+        
+        role = sys.intern(message.role)
+        if role is not message.role:
+            message = Message(message.agent_id, role, message.content, message.timestamp, message.round_number)
+        
+        self._records.append(message)
+        self.agent_ids.append(message.agent_id)
+        return message
+    
+    def last_from(self, agent_id: int) -> Optional[Message]:
+        """指定智能体最近的一条消息（没有时返回 None）"""
+        agent_ids = self.agent_ids
+        for index in range(len(agent_ids) - 1, -1, -1):
+            if agent_ids[index] == agent_id:
+                return self._records[index]
+        return None
+    
+    def speaker_counts(self) -> Dict[int, int]:
+        """按 agent_id 统计发言次数"""
+        return dict(Counter(self.agent_ids))
+    
+    def tail(self, count: int) -> List[Message]:
+        """最近的 count 条消息"""
+        if count <= 0:
+            return []
+        return self._records[-count:]
+    
+    def to_dicts(self, start: int = 0, stop: Optional[int] = None) -> List[Dict]:
+        """序列化为字典列表"""
+        return [message.to_dict() for message in self._records[start:stop]]
+    
+    @classmethod
+    def from_dicts(cls, messages: Iterable[Dict]) -> 'MessageStore':
+        """从字典列表（如保存的 messages.json）恢复"""
+        return cls(messages)
+    
+    def __len__(self) -> int:
+        return len(self._records)
+    
+    def __iter__(self) -> Iterator[Message]:
+        return iter(self._records)
+    
+    def __getitem__(self, index):
+        return self._records[index]
+    
+    def __repr__(self) -> str:
+        return f"MessageStore(size={len(self._records)})"
+
+
 @dataclass
 class MeetingState:
     """会议状态数据结构"""
@@ -109,7 +187,7 @@ class MeetingState:
     topic: str = ""
     background: str = ""
     agents: List[Dict] = None
-    messages: List[Dict] = None
+    messages: MessageStore = None
     current_speaker_id: int = 0
     meeting_id: Optional[str] = None
     start_time: Optional[float] = None
@@ -121,13 +199,28 @@ class MeetingState:
         if self.agents is None:
             self.agents = []
         if self.messages is None:
-            self.messages = []
+            self.messages = MessageStore()
+        elif not isinstance(self.messages, MessageStore):
+            self.messages = MessageStore(self.messages)
         if self.speaker_counts is None:
-            self.speaker_counts = {}
+            self.speaker_counts = self.messages.speaker_counts()
     
     def to_dict(self) -> Dict:
-        """转换为字典"""
-        return asdict(self)
+        """转换为字典（消息只在此处序列化一次，不做深拷贝）"""
+        return {
+            'is_active': self.is_active,
+            'current_round': self.current_round,
+            'topic': self.topic,
+            'background': self.background,
+            'agents': [dict(agent) for agent in self.agents],
+            'messages': self.messages.to_dicts(),
+            'current_speaker_id': self.current_speaker_id,
+            'meeting_id': self.meeting_id,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'is_ending': self.is_ending,
+            'speaker_counts': dict(self.speaker_counts)
+        }
     
     def get_duration(self) -> Optional[float]:
         """获取会议持续时间（秒）"""
@@ -143,6 +236,72 @@ class MeetingState:
         return not self.is_active or self.is_ending
 
 
+@dataclass
+class TurnState:
+    """
+    会议轮转状态
+    
+    由 MeetingService._add_message 在每条消息写入时以 O(1) 增量更新，
+    发言顺序判断无需再扫描消息列表。CEO每次发言开启新一轮讨论。
+    """
+    discussion_round: int = 0  # 当前讨论轮次（CEO发言次数）
+    last_speaker_id: Optional[int] = None  # 最近一位发言者
+    spoken_this_round: Set[int] = field(default_factory=set)  # 本轮已发言的非CEO智能体
+    
+    def record(self, agent_id: int, ceo_agent_id: int) -> None:
+        """记录一次发言"""
+        if agent_id == ceo_agent_id:
+            self.discussion_round += 1
+            self.spoken_this_round = set()
+        else:
+            self.spoken_this_round.add(agent_id)
+        self.last_speaker_id = agent_id
+    
+    def to_dict(self) -> Dict:
+        """转换为字典"""
+        return {
+            'discussion_round': self.discussion_round,
+            'last_speaker_id': self.last_speaker_id,
+            'spoken_this_round': sorted(self.spoken_this_round)
+        }
+
+
+@dataclass
+class TokenUsage:
+    """令牌用量统计"""
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0  # 命中前缀缓存的输入令牌
+    uncached_tokens: int = 0  # 未命中缓存的输入令牌
+    
+    @property
+    def total_tokens(self) -> int:
+        """输入与输出令牌总数"""
+        return self.prompt_tokens + self.completion_tokens
+    
+    def add(self, usage: Dict[str, int]) -> None:
+        """累计一次调用的用量（usage 由 utils.extract_token_usage 生成）"""
+        self.calls += 1
+        self.prompt_tokens += usage.get('prompt_tokens', 0)
+        self.completion_tokens += usage.get('completion_tokens', 0)
+        self.cached_tokens += usage.get('cached_tokens', 0)
+        self.uncached_tokens += usage.get('uncached_tokens', 0)
+    
+    def to_dict(self) -> Dict:
+        """转换为字典（含总数和缓存命中率）"""
+        prompt_total = self.cached_tokens + self.uncached_tokens
+        return {
+            'calls': self.calls,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'total_tokens': self.total_tokens,
+            'cached_tokens': self.cached_tokens,
+            'uncached_tokens': self.uncached_tokens,
+            'cache_hit_rate': round(self.cached_tokens / prompt_total, 4) if prompt_total else 0.0
+        }
+
+
 @dataclass
 class SpeakerDecision:
     """发言人决策结果"""
@@ -196,3 +355,72 @@ class MeetingSummary:
             return f"{minutes}分钟{seconds}秒"
         else:
             return f"{seconds}秒"
+
+
+@dataclass
+class User:
+    """用户数据结构（微信登录）"""
+    id: str
+    openid: str
+    nickname: str
+    avatar_url: str
+    created_at: float
+    last_login_at: float
+    
+    def to_dict(self) -> Dict:
+        """转换为字典"""
+        return asdict(self)
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'User':
+        """从字典创建"""
+        return cls(**data)
+
+
+@dataclass
+class WechatLoginSession:
+    """微信扫码登录会话"""
+    session_id: str
+    qr_code_url: str
+    qr_code_ticket: str
+    state: str  # waiting / scanned / confirmed
+    created_at: float
+    expires_at: float
+    user_id: Optional[str] = None
+    openid: Optional[str] = None
+    
+    def is_expired(self) -> bool:
+        """是否已过期"""
+        return time.time() >= self.expires_at
+    
+    def to_dict(self) -> Dict:
+        """转换为字典"""
+        return asdict(self)
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'WechatLoginSession':
+        """从字典创建"""
+        return cls(**data)
+
+
+@dataclass
+class UserSession:
+    """用户登录会话"""
+    session_id: str
+    user_id: str
+    created_at: float
+    expires_at: float
+    is_active: bool = True
+    
+    def is_expired(self) -> bool:
+        """是否已过期"""
+        return time.time() >= self.expires_at
+    
+    def to_dict(self) -> Dict:
+        """转换为字典"""
+        return asdict(self)
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'UserSession':
+        """从字典创建"""
+        return cls(**data)
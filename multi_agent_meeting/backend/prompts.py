@@ -53,13 +53,20 @@ class PromptConfig:
 
 请用中文回复,保持专业和友好的语气."""
 
-    # CEO轮次总结输入模板
-    CEO_ROUND_SUMMARY_TEMPLATE = """会议主题:{topic}
+    # 会议上下文前缀模板
+    # 所有输入都以"会议主题/会议背景/对话历史"开头，对话历史只在末尾追加，
+    # 每次调用变化的内容（发言统计、当前轮次、任务说明）统一放在分隔标记之后，
+    # 使"系统提示+上下文前缀"在调用之间逐字节不变，便于命中服务端的前缀缓存
+    MEETING_CONTEXT_TEMPLATE = """会议主题:{topic}
 会议背景:{background}
 
-对话历史:{conversation_history}
+对话历史:{conversation_history}"""
 
-发言统计:{speaker_stats}
+    # 上下文前缀与本次任务说明之间的分隔标记
+    TURN_INSTRUCTION_SEPARATOR = "\n\n【本次任务】\n"
+
+    # CEO轮次总结任务模板
+    CEO_ROUND_SUMMARY_TEMPLATE = """发言统计:{speaker_stats}
 
 作为CEO,请对本轮讨论进行总结,包括:
 1. 总结本轮讨论的主要观点和成果
@@ -73,23 +80,15 @@ class PromptConfig:
 - 如果议题已经讨论充分,可以适当时候结束会议
 - 如果认为讨论已经足够深入,可以宣布会议结束并总结会议成果"""
 
-    # CEO会议开始输入模板
-    CEO_MEETING_START_TEMPLATE = """会议主题:{topic}
-会议背景:{background}
-
-作为CEO,请开始这次会议,介绍会议主题和背景,并宣布会议开始."""
-
-    # CEO强制结束会议输入模板
-    CEO_FORCE_END_TEMPLATE = """会议主题:{topic}
-会议背景:{background}
-
-对话历史:{conversation_history}
+    # CEO会议开始任务模板
+    CEO_MEETING_START_TEMPLATE = """作为CEO,请开始这次会议,介绍会议主题和背景,并宣布会议开始."""
 
-发言统计:{speaker_stats}
+    # CEO强制结束会议任务模板
+    CEO_FORCE_END_TEMPLATE = """发言统计:{speaker_stats}
 
 当前轮次:{current_round}/{max_rounds}
 
-作为CEO,会议已达到最大轮次限制({max_rounds}轮),现在需要强制结束会议.
+作为CEO,{end_reason},现在需要强制结束会议.
 
 请为这次会议生成最终的深度总结发言,要求:
 
@@ -136,13 +135,8 @@ class PromptConfig:
 感谢各位同事的积极参与和宝贵建议.今天的会议到此结束."
 """
 
-    # 智能体输入模板
-    AGENT_INPUT_TEMPLATE = """会议主题:{topic}
-会议背景:{background}
-
-对话历史:{conversation_history}
-
-作为{role},请基于你的专业背景{description},对当前讨论的话题提供专业见解.
+    # 智能体任务模板
+    AGENT_INPUT_TEMPLATE = """作为{role},请基于你的专业背景{description},对当前讨论的话题提供专业见解.
 
 重要提醒:
 1. 请保持专业和建设性的态度
@@ -153,14 +147,21 @@ class PromptConfig:
 6. 确保内容的真实性,不得自己创造数据和事实
 7. 保持专业语气,避免使用表情符号或过于随意的表达"""
 
-    # 会议总结生成模板
-    MEETING_SUMMARY_TEMPLATE = """会议主题:{topic}
-会议背景:{background}
-会议轮次:{current_round}
-总发言数:{total_messages}
+    # 私域知识参考资料（每次调用检索的结果不同，放在本次任务说明之前）
+    KNOWLEDGE_CONTEXT_TEMPLATE = """参考资料(来自私域知识库,引用时请注明方括号中的出处):
+{snippets}
+
+"""
+
+    # 分组讨论说明（放在智能体任务说明之前，组内发言随组内讨论追加）
+    BREAKOUT_CONTEXT_TEMPLATE = """本轮为分组讨论:你在第{group_number}组,本组成员:{members}.
+请围绕CEO安排的议题与组内成员讨论,回应组内已有的观点,本组发言将汇总成纪要提交给CEO.
+{group_history}
+"""
 
-会议讨论内容:
-{conversation_summary}
+    # 会议总结生成任务模板
+    MEETING_SUMMARY_TEMPLATE = """会议轮次:{current_round}
+总发言数:{total_messages}
 
 作为CEO,请为这次会议生成一份专业的总结报告,包括:
 1. 会议主要成果
@@ -181,55 +182,83 @@ class PromptConfig:
         return cls.AGENT_SYSTEM_PROMPT.format(role=role, description=description)
     
     @classmethod
-    def get_ceo_round_summary_input(cls, topic: str, background: str, 
-                                   conversation_history: str, speaker_stats: str) -> str:
-        """获取CEO轮次总结输入"""
-        return cls.CEO_ROUND_SUMMARY_TEMPLATE.format(
+    def build_turn_input(cls, topic: str, background: str, conversation_history: str, instruction: str) -> str:
+        """
+        组装智能体输入：稳定的上下文前缀在前，本次任务说明在末尾
+        
+        Args:
+            topic: 会议主题
+            background: 会议背景
+            conversation_history: 对话历史（只追加，保证前缀稳定）
+            instruction: 本次任务说明
+        
+        Returns:
+            完整的输入内容
+        """
+        context = cls.MEETING_CONTEXT_TEMPLATE.format(
             topic=topic,
             background=background,
-            conversation_history=conversation_history,
-            speaker_stats=speaker_stats
+            conversation_history=conversation_history
         )
+        return context + cls.TURN_INSTRUCTION_SEPARATOR + instruction
+    
+    @classmethod
+    def get_ceo_round_summary_input(cls, topic: str, background: str, 
+                                   conversation_history: str, speaker_stats: str) -> str:
+        """获取CEO轮次总结输入"""
+        instruction = cls.CEO_ROUND_SUMMARY_TEMPLATE.format(speaker_stats=speaker_stats)
+        return cls.build_turn_input(topic, background, conversation_history, instruction)
     
     @classmethod
-    def get_ceo_meeting_start_input(cls, topic: str, background: str) -> str:
+    def get_ceo_meeting_start_input(cls, topic: str, background: str,
+                                    conversation_history: str = "这是会议的开始。") -> str:
         """获取CEO会议开始输入"""
-        return cls.CEO_MEETING_START_TEMPLATE.format(topic=topic, background=background)
+        return cls.build_turn_input(topic, background, conversation_history, cls.CEO_MEETING_START_TEMPLATE)
     
     @classmethod
     def get_ceo_force_end_input(cls, topic: str, background: str, 
                                conversation_history: str, speaker_stats: str,
-                               current_round: int, max_rounds: int) -> str:
+                               current_round: int, max_rounds: int, end_reason: str = None) -> str:
         """获取CEO强制结束会议输入"""
-        return cls.CEO_FORCE_END_TEMPLATE.format(
+        instruction = cls.CEO_FORCE_END_TEMPLATE.format(
             topic=topic,
-            background=background,
-            conversation_history=conversation_history,
             speaker_stats=speaker_stats,
             current_round=current_round,
-            max_rounds=max_rounds
+            max_rounds=max_rounds,
+            end_reason=end_reason or f"会议已达到最大轮次限制({max_rounds}轮)"
         )
+        return cls.build_turn_input(topic, background, conversation_history, instruction)
     
     @classmethod
     def get_agent_input(cls, topic: str, background: str, conversation_history: str,
-                       role: str, description: str) -> str:
-        """获取智能体输入"""
-        return cls.AGENT_INPUT_TEMPLATE.format(
-            topic=topic,
-            background=background,
-            conversation_history=conversation_history,
-            role=role,
-            description=description
+                       role: str, description: str, knowledge: str = "") -> str:
+        """获取智能体输入（knowledge 为检索到的私域知识片段，为空时不添加参考资料）"""
+        instruction = cls.AGENT_INPUT_TEMPLATE.format(role=role, description=description)
+        if knowledge:
+            instruction = cls.KNOWLEDGE_CONTEXT_TEMPLATE.format(snippets=knowledge) + instruction
+        return cls.build_turn_input(topic, background, conversation_history, instruction)
+    
+    @classmethod
+    def get_breakout_agent_input(cls, topic: str, background: str, conversation_history: str,
+                                 role: str, description: str, group_number: int, members: str,
+                                 group_history: str, knowledge: str = "") -> str:
+        """获取分组讨论中智能体的输入（会议对话历史作为稳定前缀，组内发言放在本次任务说明中）"""
+        breakout = cls.BREAKOUT_CONTEXT_TEMPLATE.format(
+            group_number=group_number,
+            members=members,
+            group_history=group_history or "你是本组第一位发言者."
         )
+        instruction = breakout + cls.AGENT_INPUT_TEMPLATE.format(role=role, description=description)
+        if knowledge:
+            instruction = cls.KNOWLEDGE_CONTEXT_TEMPLATE.format(snippets=knowledge) + instruction
+        return cls.build_turn_input(topic, background, conversation_history, instruction)
     
     @classmethod
     def get_meeting_summary_input(cls, topic: str, background: str, current_round: int,
                                  total_messages: int, conversation_summary: str) -> str:
         """获取会议总结输入"""
-        return cls.MEETING_SUMMARY_TEMPLATE.format(
-            topic=topic,
-            background=background,
+        instruction = cls.MEETING_SUMMARY_TEMPLATE.format(
             current_round=current_round,
-            total_messages=total_messages,
-            conversation_summary=conversation_summary
+            total_messages=total_messages
         )
+        return cls.build_turn_input(topic, background, conversation_summary, instruction)
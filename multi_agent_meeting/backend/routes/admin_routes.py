@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+管理相关API路由
+仅在配置了 ADMIN_TOKEN 时可用，请求需携带 X-Admin-Token 头
+"""
+
+import os
+import hmac
+from functools import wraps
+from flask import Blueprint, request, jsonify, send_file
+
+from services.profiler_service import profiler_service
+from services.usage_service import usage_ledger
+from services.analytics_service import submit_export_job
+from services.knowledge_service import submit_reindex_job
+from logging_config import get_logger
+from config import config
+
+logger = get_logger(__name__)
+
+# 创建蓝图
+admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
+
+
+def is_admin_request() -> bool:
+    """请求是否携带有效的管理令牌（未配置 ADMIN_TOKEN 时总是 False）"""
+    if not config.admin.token:
+        return False
+    return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), config.admin.token)
+
+
+def admin_required(view):
+    """校验管理令牌"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not config.admin.token:
+            logger.warning(f"管理接口未启用: path={request.path}")
+            return jsonify({"status": "error", "error": "管理接口未启用"}), 403
+
+        if not is_admin_request():
+            logger.warning(f"管理令牌校验失败: path={request.path}, remote={request.remote_addr}")
+            return jsonify({"status": "error", "error": "无权访问"}), 403
+
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@admin_bp.route('/profile', methods=['POST'])
+@admin_required
+def start_profile():
+    """启动采样分析"""
+    logger.info("收到启动采样分析请求")
+
+    try:
+        data = request.get_json(silent=True) or {}
+
+        run = profiler_service.start(
+            duration=data.get('seconds'),
+            interval_ms=data.get('interval_ms'),
+            top_n=data.get('top_n')
+        )
+
+        return jsonify({"status": "success", "profile": run.to_dict()}), 202
+
+    except RuntimeError as e:
+        logger.warning(f"启动采样分析失败: {e}")
+        return jsonify({"status": "error", "error": str(e)}), 409
+    except Exception as e:
+        logger.error(f"启动采样分析失败: error={e}")
+        return jsonify({"status": "error", "error": str(e)}), 500
+
+
+@admin_bp.route('/profile', methods=['GET'])
+@admin_required
+def list_profiles():
+    """获取最近的采样任务"""
+    runs = profiler_service.list_runs()
+    return jsonify({
+        "status": "success",
+        "running": profiler_service.is_running(),
+        "profiles": [run.to_dict() for run in runs]
+    })
+
+
+@admin_bp.route('/profile/<run_id>', methods=['GET'])
+@admin_required
+def get_profile(run_id):
+    """获取采样结果（含Top-N摘要）"""
+    run = profiler_service.get_run(run_id)
+    if run is None:
+        return jsonify({"status": "error", "error": "采样任务不存在"}), 404
+
+    return jsonify({"status": "success", "profile": run.to_dict()})
+
+
+@admin_bp.route('/profile/<run_id>/flamegraph', methods=['GET'])
+@admin_required
+def download_flamegraph(run_id):
+    """下载折叠栈文件"""
+    run = profiler_service.get_run(run_id)
+    if run is None:
+        return jsonify({"status": "error", "error": "采样任务不存在"}), 404
+
+    if run.status != 'completed' or not run.output_file or not os.path.exists(run.output_file):
+        return jsonify({"status": "error", "error": "采样结果尚未生成", "profile_status": run.status}), 409
+
+    return send_file(
+        run.output_file,
+        as_attachment=True,
+        download_name=os.path.basename(run.output_file),
+        mimetype='text/plain'
+    )
+
+
+@admin_bp.route('/usage', methods=['GET'])
+@admin_required
+def get_usage():
+    """获取按用户和API密钥累计的令牌用量"""
+    return jsonify({"status": "success", "usage": usage_ledger.to_dict()})
+
+
+@admin_bp.route('/analytics/export', methods=['POST'])
+@admin_required
+def export_analytics():
+    """在后台任务中增量导出会议分析文件（进度通过 job_update 事件推送）"""
+    logger.info("收到会议分析导出请求")
+    return jsonify({"status": "success", "job": submit_export_job()}), 202
+
+
+@admin_bp.route('/knowledge/reindex', methods=['POST'])
+@admin_required
+def reindex_knowledge():
+    """在后台任务中更新私域知识索引（force=true 时全部重新建立）"""
+    data = request.get_json(silent=True) or {}
+    force = bool(data.get('force', False))
+    logger.info(f"收到私域知识索引更新请求: force={force}")
+    return jsonify({"status": "success", "job": submit_reindex_job(force)}), 202
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+登录相关API路由
+微信扫码登录：生成二维码、获取二维码图片、查询状态、确认登录、用户会话校验与登出
+"""
+
+from functools import wraps
+from typing import Optional
+from flask import Blueprint, request, jsonify, url_for, Response
+
+from services.wechat_service import get_wechat_service
+from logging_config import get_logger
+from config import config
+
+logger = get_logger(__name__)
+
+# 创建蓝图
+auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
+
+# 用户会话请求头
+USER_SESSION_HEADER = 'X-User-Session'
+
+
+def get_request_user_id() -> Optional[str]:
+    """当前请求的用户ID：只来自请求头中经过校验的用户会话，未登录时为None"""
+    user_session_id = request.headers.get(USER_SESSION_HEADER)
+    if user_session_id and config.wechat.enable_login:
+        user = get_wechat_service().verify_user_session(user_session_id)
+        if user is not None:
+            return user.id
+    return None
+
+
+def get_admission_key() -> str:
+    """准入配额的用户标识：已登录用户为用户ID，匿名请求按客户端地址计算（客户端无法通过自报标识重置配额）"""
+    return get_request_user_id() or f"anon:{request.remote_addr}"
+
+
+def login_enabled(view):
+    """未启用微信登录时拒绝请求"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not config.wechat.enable_login:
+            return jsonify({"status": "error", "error": "微信登录未启用"}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@auth_bp.route('/wechat/qrcode', methods=['POST'])
+@login_enabled
+def create_qrcode():
+    """生成登录二维码（响应只包含会话信息和图片地址，图片通过独立接口获取）"""
+    result = get_wechat_service().generate_qr_code()
+    if result['status'] != 'success':
+        return jsonify(result), 500
+
+    session_id = result['session_id']
+    result['qr_image_url'] = url_for('auth.qrcode_image', session_id=session_id, fmt='png')
+    result['qr_image_svg_url'] = url_for('auth.qrcode_image', session_id=session_id, fmt='svg')
+    return jsonify(result)
+
+
+@auth_bp.route('/wechat/qrcode/<session_id>.<fmt>', methods=['GET'])
+@login_enabled
+def qrcode_image(session_id, fmt):
+    """获取登录二维码图片（png/svg），同一会话的图片不会变化，可由浏览器和CDN缓存"""
+    etag = f"{session_id}.{fmt}"
+    if etag in request.if_none_match:
+        return Response(status=304)
+
+    try:
+        image = get_wechat_service().get_qr_image(session_id, fmt)
+    except Exception as e:
+        logger.error(f"获取登录二维码图片失败: session_id={session_id}, error={e}")
+        return jsonify({"status": "error", "error": "二维码生成失败"}), 500
+
+    if image is None:
+        return jsonify({"status": "error", "error": "二维码不存在或已过期"}), 404
+
+    content, mimetype = image
+    response = Response(content, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f"public, max-age={config.wechat.qr_code_expire_time}, immutable"
+    return response
+
+
+@auth_bp.route('/wechat/status/<session_id>', methods=['GET'])
+@login_enabled
+def login_status(session_id):
+    """查询扫码登录状态"""
+    result = get_wechat_service().check_login_status(session_id)
+    return jsonify(result), (200 if result['status'] == 'success' else 404)
+
+
+@auth_bp.route('/wechat/status/<session_id>/wait', methods=['GET'])
+@login_enabled
+def wait_login_status(session_id):
+    """
+    长轮询扫码登录状态
+    
+    参数 state 为客户端已知的状态，状态变化时立即返回，否则最多等待 timeout 秒（不超过 WECHAT_LONG_POLL_TIMEOUT）
+    """
+    timeout = min(request.args.get('timeout', config.wechat.long_poll_timeout, type=float),
+                  config.wechat.long_poll_timeout)
+    result = get_wechat_service().wait_for_login_status(session_id, request.args.get('state'), max(timeout, 0))
+    return jsonify(result), (200 if result['status'] == 'success' else 404)
+
+
+@auth_bp.route('/wechat/confirm/<session_id>', methods=['POST'])
+@login_enabled
+def confirm_login(session_id):
+    """确认登录"""
+    data = request.get_json(silent=True) or {}
+    result = get_wechat_service().confirm_login(session_id, data.get('code'))
+    return jsonify(result), (200 if result['status'] == 'success' else 400)
+
+
+@auth_bp.route('/wechat/callback', methods=['GET'])
+@login_enabled
+def wechat_callback():
+    """微信授权回调（state 为登录会话ID）"""
+    session_id = request.args.get('state', '')
+    result = get_wechat_service().confirm_login(session_id, request.args.get('code'))
+    return jsonify(result), (200 if result['status'] == 'success' else 400)
+
+
+@auth_bp.route('/me', methods=['GET'])
+@login_enabled
+def current_user():
+    """获取当前登录用户"""
+    user = get_wechat_service().verify_user_session(request.headers.get(USER_SESSION_HEADER, ''))
+    if user is None:
+        return jsonify({"status": "error", "error": "未登录或会话已过期"}), 401
+    return jsonify({"status": "success", "user": user.to_dict()})
+
+
+@auth_bp.route('/logout', methods=['POST'])
+@login_enabled
+def logout():
+    """登出"""
+    result = get_wechat_service().logout(request.headers.get(USER_SESSION_HEADER, ''))
+    return jsonify(result), (200 if result['status'] == 'success' else 500)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台任务相关API路由
+查询结束会议、导出、重建索引等后台任务的状态和结果（实时进度通过 Socket.IO 的 job_update 事件推送）
+普通请求只能看到自己提交的任务，携带管理令牌的请求可以看到全部任务
+"""
+
+from typing import Optional
+
+from flask import Blueprint, request, jsonify
+
+from services.job_service import job_runner
+from routes.auth_routes import get_admission_key
+from routes.admin_routes import is_admin_request
+from logging_config import get_logger
+from config import config
+
+logger = get_logger(__name__)
+
+# 创建蓝图
+job_bp = Blueprint('jobs', __name__, url_prefix='/api/jobs')
+
+
+def get_job_owner() -> Optional[str]:
+    """当前请求可查看的任务提交者（管理员为 None，即不限）"""
+    return None if is_admin_request() else get_admission_key()
+
+
+@job_bp.route('', methods=['GET'])
+def list_jobs():
+    """最近的后台任务（可按 kind 过滤）"""
+    limit = min(max(request.args.get('limit', 50, type=int), 1), config.jobs.max_history)
+    jobs = job_runner.list_jobs(request.args.get('kind'), limit, get_job_owner())
+    return jsonify({"status": "success", "jobs": jobs})
+
+
+@job_bp.route('/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    查询后台任务
+    
+    参数 wait 为最长等待秒数（不超过 WECHAT_LONG_POLL_TIMEOUT），任务完成时立即返回，用于无法使用Socket.IO的客户端
+    """
+    wait = min(max(request.args.get('wait', 0, type=float), 0), config.wechat.long_poll_timeout)
+    owner = get_job_owner()
+    job = job_runner.wait(job_id, wait, owner) if wait else job_runner.get(job_id, owner)
+    if job is None:
+        return jsonify({"status": "error", "error": "任务不存在"}), 404
+    return jsonify({"status": "success", "job": job})
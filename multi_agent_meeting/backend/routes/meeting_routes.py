@@ -12,24 +12,53 @@ import json
 from datetime import datetime
 from flask import Blueprint, request, jsonify, send_file
 
-from utils import setup_console_encoding, get_latest_meeting_transcript
+from utils import get_latest_meeting_transcript
 
 from models import MeetingConfig
 from services.meeting_service import MeetingService
+from services.admission_service import admission_controller, AdmissionRejected
+from services.model_router import model_router
+from services.output_governor import output_governor
+from services.job_service import job_runner
+from services.knowledge_service import knowledge_index
+from services.key_pool import key_pool
+from routes.auth_routes import get_request_user_id, get_admission_key
 from logging_config import get_logger
 from flask import current_app
 from config import config
 
-# 设置控制台编码
-setup_console_encoding()
-
 logger = get_logger(__name__)
 
 # 创建蓝图
 meeting_bp = Blueprint('meeting', __name__, url_prefix='/api')
 
-# 创建会议服务实例
-meeting_service = MeetingService()
+# 幂等键请求头（客户端重试同一发言请求时保持不变）
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+# 会议服务实例（首次请求或创建应用时再实例化，避免导入路由模块时产生副作用）
+_meeting_service = None
+
+
+def get_meeting_service() -> MeetingService:
+    """获取全局会议服务实例"""
+    global _meeting_service
+    if _meeting_service is None:
+        _meeting_service = MeetingService()
+    return _meeting_service
+
+
+def too_many_requests(rejection: AdmissionRejected):
+    """过载或超出配额时的429响应"""
+    logger.warning(f"请求被拒绝: path={request.path}, reason={rejection.reason}, retry_after={rejection.retry_after}")
+    response = jsonify({
+        "status": "error",
+        "error": "服务繁忙，请稍后重试",
+        "reason": rejection.reason,
+        "retry_after": rejection.retry_after
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(rejection.retry_after)
+    return response
 
 
 @meeting_bp.route('/health', methods=['GET'])
@@ -39,14 +68,20 @@ def health_check():
     
     try:
         # 检查会议服务状态
-        meeting_status = meeting_service.get_meeting_status()
+        meeting_status = get_meeting_service().get_meeting_status()
         
         health_data = {
             "status": "healthy",
             "timestamp": datetime.now().isoformat(),
             "service": "multi-agent-meeting-backend",
             "version": "2.0.0",
-            "meeting_status": meeting_status
+            "meeting_status": meeting_status,
+            "admission": admission_controller.stats(),
+            "model_routes": model_router.stats(),
+            "output_lengths": output_governor.stats(),
+            "jobs": job_runner.stats(),
+            "knowledge": knowledge_index.stats(),
+            "api_keys": key_pool.stats()
         }
         
         logger.debug("健康检查成功")
@@ -93,8 +128,25 @@ def start_meeting():
             logger.warning(f"会议配置验证失败: {errors}")
             return jsonify({"status": "error", "error": "; ".join(errors)}), 400
         
-        # 初始化会议
-        success = meeting_service.initialize_meeting(meeting_config)
+        # 过载或超出用户会议配额时拒绝新会议（配额按登录用户或客户端地址计算）
+        admission_key = get_admission_key()
+        quota_started_at = None
+        if config.admission.enabled:
+            try:
+                quota_started_at = admission_controller.admit_meeting(admission_key)
+            except AdmissionRejected as e:
+                return too_many_requests(e)
+        
+        # 初始化会议（令牌用量只归属到已登录用户）
+        success = False
+        try:
+            success = get_meeting_service().initialize_meeting(
+                meeting_config, user_id=get_request_user_id(), admission_key=admission_key
+            )
+        finally:
+            if not success:
+                # 会议未能开始，不占用用户会议配额
+                admission_controller.cancel_meeting(admission_key, quota_started_at)
         
         if success:
             logger.info("会议启动成功")
@@ -114,9 +166,12 @@ def ceo_speak():
     logger.info("收到CEO发言请求")
     
     try:
-        result = meeting_service.ceo_speak()
+        result = get_meeting_service().ceo_speak(request.headers.get(IDEMPOTENCY_HEADER), get_admission_key())
         
-        if result['status'] == 'success':
+        if result.get('replayed') or result.get('deduplicated'):
+            # 重复请求：消息已由首次请求推送
+            logger.info("CEO发言请求重复，返回已有结果")
+        elif result['status'] == 'success':
             # 添加消息ID防止重复
             message_with_id = {
                 **result['message'],
@@ -133,6 +188,8 @@ def ceo_speak():
         response.headers['Content-Type'] = 'application/json; charset=utf-8'
         return response
         
+    except AdmissionRejected as e:
+        return too_many_requests(e)
     except Exception as e:
         logger.error(f"CEO发言处理失败: error={e}")
         return jsonify({"status": "error", "error": str(e)}), 500
@@ -144,9 +201,14 @@ def agent_speak(agent_id):
     logger.info(f"收到智能体发言请求: agent_id={agent_id}")
     
     try:
-        result = meeting_service.agent_speak(agent_id)
+        result = get_meeting_service().agent_speak(
+            agent_id, request.headers.get(IDEMPOTENCY_HEADER), get_admission_key()
+        )
         
-        if result['status'] == 'success':
+        if result.get('replayed') or result.get('deduplicated'):
+            # 重复请求：消息已由首次请求推送
+            logger.info(f"智能体发言请求重复，返回已有结果: agent_id={agent_id}")
+        elif result['status'] == 'success':
             # 添加消息ID防止重复
             message_with_id = {
                 **result['message'],
@@ -163,21 +225,59 @@ def agent_speak(agent_id):
         response.headers['Content-Type'] = 'application/json; charset=utf-8'
         return response
         
+    except AdmissionRejected as e:
+        return too_many_requests(e)
     except Exception as e:
         logger.error(f"智能体发言处理失败: agent_id={agent_id}, error={e}")
         return jsonify({"status": "error", "error": str(e)}), 500
 
 
+@meeting_bp.route('/breakout_round', methods=['POST'])
+def breakout_round():
+    """分组讨论（各组并行讨论，每条发言通过WebSocket推送；各组的每次发言分别占用生成名额）"""
+    logger.info("收到分组讨论请求")
+    
+    try:
+        result = get_meeting_service().breakout_round(request.headers.get(IDEMPOTENCY_HEADER))
+        
+        if result.get('replayed') or result.get('deduplicated'):
+            # 重复请求：消息已由首次请求推送
+            logger.info("分组讨论请求重复，返回已有结果")
+        elif result['status'] == 'success':
+            timestamp = int(time.time() * 1000)
+            for index, message in enumerate(result['messages']):
+                # 添加消息ID防止重复
+                message_with_id = {
+                    **message,
+                    'message_id': f"breakout_{message['agent_id']}_{result['current_round']}_{timestamp}_{index}"
+                }
+                current_app.socketio.emit('new_message', message_with_id, ensure_ascii=False)
+            logger.info(f"分组讨论成功: round={result['current_round']}, groups={len(result['groups'])}, "
+                        f"messages={len(result['messages'])}")
+        else:
+            logger.warning(f"分组讨论失败: {result.get('error')}")
+        
+        response = jsonify(result)
+        response.headers['Content-Type'] = 'application/json; charset=utf-8'
+        return response
+        
+    except AdmissionRejected as e:
+        return too_many_requests(e)
+    except Exception as e:
+        logger.error(f"分组讨论处理失败: error={e}")
+        return jsonify({"status": "error", "error": str(e)}), 500
+
+
 @meeting_bp.route('/end_meeting', methods=['POST'])
 def end_meeting():
-    """结束会议"""
+    """结束会议（立即返回任务ID，总结生成和保存在后台完成，进度和总结通过 job_update 事件推送）"""
     logger.info("收到结束会议请求")
     
     try:
-        result = meeting_service.end_meeting()
+        result = get_meeting_service().end_meeting_async()
         
         if result['status'] == 'success':
-            logger.info("会议结束成功")
+            logger.info(f"结束会议任务已提交: job_id={result['job_id']}")
         else:
             logger.warning(f"会议结束失败: {result.get('error')}")
         
@@ -194,6 +294,8 @@ def download_transcript():
     logger.info("收到下载会议记录请求")
     
     try:
+        meeting_service = get_meeting_service()
+        
         # 获取当前会议状态
         state = meeting_service.get_meeting_state()
         
@@ -259,7 +361,7 @@ def restart_meeting():
     logger.info("收到重启会议请求")
     
     try:
-        result = meeting_service.restart_meeting()
+        result = get_meeting_service().restart_meeting()
         
         if result['status'] == 'success':
             logger.info("会议重启成功")
@@ -279,6 +381,7 @@ def meeting_status():
     logger.debug("收到获取会议状态请求")
     
     try:
+        meeting_service = get_meeting_service()
         state = meeting_service.get_meeting_state()
         meeting_status_data = meeting_service.get_meeting_status()
         
@@ -288,7 +391,9 @@ def meeting_status():
             "meeting_state": {
                 **state.to_dict(),
                 "max_rounds": meeting_status_data.get("max_rounds", config.meeting.max_rounds),
-                "current_round": meeting_status_data.get("current_round", state.current_round)
+                "current_round": meeting_status_data.get("current_round", state.current_round),
+                "prompt_cache": meeting_status_data.get("prompt_cache"),
+                "token_usage": meeting_status_data.get("token_usage")
             }
         }
         
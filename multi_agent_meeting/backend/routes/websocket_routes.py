@@ -5,18 +5,27 @@ WebSocket相关路由
 """
 
 from flask import request
-from flask_socketio import emit
-
-from utils import setup_console_encoding
+from flask_socketio import emit, join_room, leave_room
 
+from services.wechat_service import get_wechat_service
+from services.job_service import job_runner
+from routes.job_routes import get_job_owner
 from logging_config import get_logger
-
-# 设置控制台编码
-setup_console_encoding()
+from config import config
 
 logger = get_logger(__name__)
 
 
+def login_room(session_id: str) -> str:
+    """登录会话对应的Socket.IO房间"""
+    return f"login_{session_id}"
+
+
+def job_room(job_id: str) -> str:
+    """后台任务对应的Socket.IO房间"""
+    return f"job_{job_id}"
+
+
 def register_websocket_events(socketio):
     """注册WebSocket事件处理器"""
     
@@ -37,6 +46,55 @@ def register_websocket_events(socketio):
         logger.info(f"客户端加入会议: session_id={request.sid}, data={data}")
         emit('joined_meeting', {'message': '已加入会议'})
     
+    @socketio.on('watch_login')
+    def handle_watch_login(data):
+        """订阅扫码登录状态（替代轮询 /api/auth/wechat/status），订阅后立即推送一次当前状态"""
+        session_id = (data or {}).get('session_id', '')
+        if not config.wechat.enable_login or not session_id:
+            emit('login_status', {'session_id': session_id, 'status': 'error', 'error': '无效的登录会话'})
+            return
+        
+        join_room(login_room(session_id))
+        emit('login_status', {'session_id': session_id, **get_wechat_service().check_login_status(session_id)})
+    
+    @socketio.on('unwatch_login')
+    def handle_unwatch_login(data):
+        """取消订阅扫码登录状态"""
+        session_id = (data or {}).get('session_id', '')
+        if session_id:
+            leave_room(login_room(session_id))
+    
+    if config.wechat.enable_login:
+        def push_login_status(session_id, status):
+            socketio.emit('login_status', {'session_id': session_id, **status}, to=login_room(session_id))
+        
+        get_wechat_service().add_state_listener(push_login_status)
+    
+    @socketio.on('watch_job')
+    def handle_watch_job(data):
+        """订阅后台任务状态（只能订阅自己提交的任务），订阅后立即推送一次当前状态"""
+        job_id = (data or {}).get('job_id', '')
+        job = job_runner.get(job_id, get_job_owner()) if job_id else None
+        if job is None:
+            emit('job_update', {'job_id': job_id, 'status': 'error', 'error': '任务不存在'})
+            return
+        
+        join_room(job_room(job_id))
+        emit('job_update', job)
+    
+    @socketio.on('unwatch_job')
+    def handle_unwatch_job(data):
+        """取消订阅后台任务状态"""
+        job_id = (data or {}).get('job_id', '')
+        if job_id:
+            leave_room(job_room(job_id))
+    
+    def push_job_update(job):
+        """推送后台任务状态（结束会议的进度和最终总结等）给订阅了该任务的客户端"""
+        socketio.emit('job_update', job, to=job_room(job['job_id']))
+    
+    job_runner.add_listener(push_job_update)
+    
     @socketio.on('error')
     def handle_error(error):
         """处理错误"""
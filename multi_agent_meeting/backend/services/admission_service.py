@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+准入控制服务模块
+限制同时进行的模型生成数量和排队时间，超出容量时拒绝请求并给出建议的重试时间，
+并按用户限制并发生成数和单位时间内开始的会议数
+"""
+
+import math
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional, Any, Deque, Iterator
+
+from config import config
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 用户会议配额的统计窗口（秒）
+MEETING_QUOTA_WINDOW = 3600
+
+# 生成耗时的指数移动平均系数，用于估算重试时间
+DURATION_EWMA_ALPHA = 0.2
+
+
+class AdmissionRejected(Exception):
+    """请求被准入控制拒绝"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    准入控制器
+
+    生成请求最多同时进行 max_in_flight 个，其余最多 max_queue 个排队等待 max_queue_wait 秒，
+    排队已满或等待超时则拒绝。新会议只在没有排队时接受，过载时优先保证进行中的会议。
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, max_queue_wait: float,
+                 user_max_in_flight: int = 0, user_meetings_per_hour: int = 0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_queue_wait = max_queue_wait
+        self.user_max_in_flight = user_max_in_flight
+        self.user_meetings_per_hour = user_meetings_per_hour
+
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._user_in_flight: Dict[str, int] = {}
+        self._user_meetings: Dict[str, Deque[float]] = {}
+        self._avg_duration = 10.0  # 生成耗时估计（秒），随实际耗时更新
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {}
+
+    def _reject(self, reason: str, retry_after: float) -> AdmissionRejected:
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        return AdmissionRejected(reason, max(1, int(math.ceil(retry_after))))
+
+    def _estimated_wait(self) -> float:
+        """按当前排队情况估算需要等待的时间（秒）"""
+        return self._avg_duration * (self._waiting + 1) / self.max_in_flight
+
+    @contextmanager
+    def generation(self, user_id: Optional[str] = None) -> Iterator[None]:
+        """
+        占用一个生成名额，结束后释放
+
+        Raises:
+            AdmissionRejected: 排队已满、等待超时或超出用户并发配额
+        """
+        with self._cond:
+            if user_id and self.user_max_in_flight and \
+                    self._user_in_flight.get(user_id, 0) >= self.user_max_in_flight:
+                raise self._reject('user_concurrency', self._avg_duration)
+
+            if self._in_flight >= self.max_in_flight:
+                if self._waiting >= self.max_queue:
+                    raise self._reject('queue_full', self._estimated_wait())
+
+                self._waiting += 1
+                try:
+                    admitted = self._cond.wait_for(lambda: self._in_flight < self.max_in_flight,
+                                                   timeout=self.max_queue_wait)
+                finally:
+                    self._waiting -= 1
+                if not admitted:
+                    raise self._reject('queue_timeout', self._estimated_wait())
+
+            self._in_flight += 1
+            self.admitted += 1
+            if user_id:
+                self._user_in_flight[user_id] = self._user_in_flight.get(user_id, 0) + 1
+
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            duration = time.time() - start_time
+            with self._cond:
+                self._in_flight -= 1
+                self._avg_duration += DURATION_EWMA_ALPHA * (duration - self._avg_duration)
+                if user_id:
+                    remaining = self._user_in_flight.get(user_id, 0) - 1
+                    if remaining > 0:
+                        self._user_in_flight[user_id] = remaining
+                    else:
+                        self._user_in_flight.pop(user_id, None)
+                self._cond.notify()
+
+    def admit_meeting(self, user_id: Optional[str] = None) -> Optional[float]:
+        """
+        检查是否可以开始新会议（并计入用户会议配额）
+
+        Returns:
+            计入用户会议配额的开始时间（会议未能开始时交给 cancel_meeting 撤销），未计入时为None
+
+        Raises:
+            AdmissionRejected: 生成已满或有请求在排队，或超出用户会议配额
+        """
+        now = time.time()
+        with self._cond:
+            if self._waiting or self._in_flight >= self.max_in_flight:
+                raise self._reject('overloaded', self._estimated_wait())
+
+            if user_id and self.user_meetings_per_hour:
+                started = self._user_meetings.setdefault(user_id, deque())
+                while started and started[0] <= now - MEETING_QUOTA_WINDOW:
+                    started.popleft()
+                if len(started) >= self.user_meetings_per_hour:
+                    raise self._reject('user_meeting_quota', started[0] + MEETING_QUOTA_WINDOW - now)
+                started.append(now)
+                return now
+        return None
+
+    def cancel_meeting(self, user_id: Optional[str], started_at: Optional[float]) -> None:
+        """撤销未能开始的会议占用的用户会议配额"""
+        if not user_id or started_at is None:
+            return
+        with self._cond:
+            started = self._user_meetings.get(user_id)
+            if started and started_at in started:
+                started.remove(started_at)
+
+    def stats(self) -> Dict[str, Any]:
+        """准入统计"""
+        with self._cond:
+            return {
+                'in_flight': self._in_flight,
+                'waiting': self._waiting,
+                'max_in_flight': self.max_in_flight,
+                'max_queue': self.max_queue,
+                'avg_generation_seconds': round(self._avg_duration, 3),
+                'admitted': self.admitted,
+                'rejected': dict(self.rejected)
+            }
+
+
+# 全局准入控制器
+admission_controller = AdmissionController(
+    max_in_flight=config.admission.max_in_flight,
+    max_queue=config.admission.max_queue,
+    max_queue_wait=config.admission.max_queue_wait,
+    user_max_in_flight=config.admission.user_max_in_flight,
+    user_meetings_per_hour=config.admission.user_meetings_per_hour
+)
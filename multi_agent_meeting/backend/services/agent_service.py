@@ -6,24 +6,88 @@
 """
 
 import time
-from typing import Dict, List, Optional, Any
-
-from utils import setup_console_encoding
-from camel.agents import ChatAgent
-from camel.messages import BaseMessage
-from camel.types import ModelPlatformType
-from camel.models import ModelFactory
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, Future
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Callable, Collection, ContextManager, Sequence, Tuple, TYPE_CHECKING
 
 from models import Agent, Message, SpeakerDecision
-from config import config
+from config import config, ModelEndpointConfig, ROUTE_CEO_ROUND, ROUTE_AGENT
 from logging_config import get_logger
 from prompts import PromptConfig
+from utils import extract_token_usage
+from services.usage_service import MeetingUsage, usage_ledger
+from services.cassette_service import Cassette
+from services.model_router import model_router
+from services.output_governor import output_governor
+from services.speaker_router import SpeakerRouter
+from services.key_pool import key_pool
 
-# 设置控制台编码
-setup_console_encoding()
+if TYPE_CHECKING:
+    from camel.messages import BaseMessage
 
 logger = get_logger(__name__)
 
+# CEO发言关键词 -> 对应角色关键词（角色命中时，这些CEO发言关键词并入该角色的路由向量）
+KEYWORD_MAPPINGS = [
+    (['技术', '架构', '系统', '开发', '算法', '工程师'], ['技术', '开发', '架构', '工程师', '专家']),
+    (['市场', '用户', '营销', '推广', '品牌'], ['市场', '营销', '推广', '品牌']),
+    (['产品', '设计', '体验', '功能'], ['产品', '设计', '体验']),
+    (['运营', '管理', '执行', '实施', '生产'], ['运营', '管理', '执行', '生产']),
+    (['财务', '成本', '预算', '投资'], ['财务', '会计', '预算']),
+    (['安全', '风险', '预警', '监测'], ['安全', '风险', '监测'])
+]
+
+
+# 创建智能体/预生成开场白使用的共享线程池
+_build_executor: Optional[ThreadPoolExecutor] = None
+_build_executor_lock = threading.Lock()
+
+
+def get_build_executor() -> ThreadPoolExecutor:
+    """获取共享的智能体构建线程池"""
+    global _build_executor
+    if _build_executor is None:
+        with _build_executor_lock:
+            if _build_executor is None:
+                _build_executor = ThreadPoolExecutor(
+                    max_workers=config.meeting.agent_build_workers,
+                    thread_name_prefix='agent-builder'
+                )
+    return _build_executor
+
+
+@lru_cache(maxsize=256)
+def _render_system_message(is_ceo: bool, role: str, description: str) -> 'BaseMessage':
+    """渲染系统消息，按 (是否CEO, 角色, 描述) 缓存，相同角色重复开会时无需重新渲染"""
+    from camel.messages import BaseMessage
+    
+    if is_ceo:
+        content = PromptConfig.get_ceo_system_prompt(role, description)
+    else:
+        content = PromptConfig.get_agent_system_prompt(role, description)
+    
+    return BaseMessage.make_assistant_message(
+        role_name=role,
+        content=content
+    )
+
+
+def make_user_message(content: str) -> 'BaseMessage':
+    """
+    创建发送给智能体的用户消息
+    
+    CAMEL（及其依赖的openai）导入较慢，延迟到第一次使用时再导入，
+    以缩短进程/worker启动时间。
+    """
+    from camel.messages import BaseMessage
+    
+    return BaseMessage.make_user_message(
+        role_name="用户",
+        content=content
+    )
+
 
 class AgentService:
     """智能体服务类"""
@@ -31,6 +95,22 @@ class AgentService:
     def __init__(self):
         self.agents: List[Agent] = []
         self.logger = logger
+        # 智能体并行创建时保护列表
+        self._agents_lock = threading.Lock()
+        # ID索引与发言轮转顺序，在智能体增删时重建，查询均为O(1)
+        self._agents_by_id: Dict[int, Agent] = {}
+        self._rotation: List[int] = []  # 非CEO智能体ID（按ID顺序）
+        self._rotation_index: Dict[int, int] = {}
+        # 当前会议的令牌用量
+        self.usage = MeetingUsage()
+        # 按API密钥限制并发调用：api_key -> 上下文管理器（为空时不限制；配置了每密钥上限时使用密钥池，批量运行时另行设置）
+        self.key_limiter: Optional[Callable[[str], ContextManager]] = (
+            key_pool.limit if config.api_key_max_in_flight > 0 else None
+        )
+        # 模型调用录制/回放（为空时直接调用模型）
+        self.cassette: Optional[Cassette] = None
+        # 按相关度选择下一位发言者
+        self.speaker_router = SpeakerRouter(KEYWORD_MAPPINGS)
     
     def create_agent(self, agent_id: int, role: str, description: str, api_key: str) -> Agent:
         """
@@ -55,6 +135,13 @@ class AgentService:
                 api_key=api_key
             )
             
+            # 回放模式下使用回放智能体，不创建模型实例
+            cassette = self.cassette
+            if cassette is not None and cassette.replaying:
+                agent.agent = cassette.replay_agent(agent_id, role)
+                self.logger.info(f"回放智能体创建成功: {agent}")
+                return agent
+            
             # 初始化模型
             self._initialize_model(agent)
             
@@ -68,33 +155,97 @@ class AgentService:
             self.logger.error(f"创建智能体失败: ID={agent_id}, role='{role}', error={e}")
             raise
     
+    def route_for(self, agent: Agent) -> str:
+        """智能体发言使用的模型路由（CEO为轮次总结，其他为普通发言）"""
+        return ROUTE_CEO_ROUND if agent.id == config.meeting.ceo_agent_id else ROUTE_AGENT
+    
     def _initialize_model(self, agent: Agent) -> None:
-        """初始化模型"""
+        """初始化首选端点的模型（优先复用预热池中的模型实例）"""
         self.logger.debug(f"初始化模型: agent_id={agent.id}, role='{agent.role}'")
         
         try:
-            model = ModelFactory.create(
-                model_platform=ModelPlatformType.OPENAI_COMPATIBILITY_MODEL,
-                model_type=config.api.model_type,
-                url=config.api.base_url,
-                api_key=agent.api_key,
-                model_config_dict={
-                    "temperature": config.api.temperature,
-                    "max_tokens": config.api.max_tokens
-                }
-            )
-            agent.model = model
-            self.logger.debug(f"模型初始化成功: agent_id={agent.id}")
+            route = self.route_for(agent)
+            endpoint = model_router.primary_endpoint(route)
+            agent.endpoint = endpoint.name
+            agent.model = model_router.acquire_model(endpoint, route, model_router.api_key_for(endpoint, agent.api_key))
+            agent.endpoint_models[(route, endpoint.name)] = agent.model
+            self.logger.debug(f"模型初始化成功: agent_id={agent.id}, endpoint={endpoint.name}")
             
         except Exception as e:
             self.logger.error(f"模型初始化失败: agent_id={agent.id}, error={e}")
             raise
     
+    def _endpoint_agent(self, agent: Agent, route: str, endpoint: ModelEndpointConfig) -> Any:
+        """获取智能体在某个路由和端点上的 ChatAgent（首次使用时创建）"""
+        chat_agent = agent.endpoint_agents.get((route, endpoint.name))
+        if chat_agent is not None:
+            return chat_agent
+        
+        from camel.agents import ChatAgent
+        
+        model = model_router.acquire_model(endpoint, route, model_router.api_key_for(endpoint, agent.api_key))
+        agent.endpoint_models[(route, endpoint.name)] = model
+        chat_agent = ChatAgent(
+            system_message=self._create_system_message(agent),
+            model=model
+        )
+        agent.endpoint_agents[(route, endpoint.name)] = chat_agent
+        self.logger.debug(f"创建端点智能体: agent_id={agent.id}, route={route}, endpoint={endpoint.name}")
+        return chat_agent
+    
+    def release_agent_models(self, agent: Agent) -> None:
+        """将智能体在各端点上的模型实例归还预热池"""
+        for (route, name), model in agent.endpoint_models.items():
+            endpoint = config.model_endpoints.get(name)
+            if endpoint is not None:
+                model_router.release_model(endpoint, route, model_router.api_key_for(endpoint, agent.api_key), model)
+        agent.endpoint_models.clear()
+        agent.endpoint_agents.clear()
+    
+    def prewarm(self, api_keys: List[str]) -> None:
+        """
+        预热智能体外壳
+        
+        导入CAMEL、为CEO和普通智能体的首选端点按API密钥创建模型实例放入池中，并构建一次
+        ChatAgent以预热分词器等首次使用开销，使第一场会议的创建耗时与后续会议一致。
+        """
+        start_time = time.time()
+        
+        try:
+            from camel.agents import ChatAgent
+            
+            warm_model = None
+            for route in (ROUTE_CEO_ROUND, ROUTE_AGENT):
+                endpoint = model_router.primary_endpoint(route)
+                for api_key in dict.fromkeys(model_router.api_key_for(endpoint, key) for key in api_keys):
+                    for _ in range(model_router.missing(endpoint, route, api_key)):
+                        model = model_router.build_model(endpoint, route, api_key)
+                        warm_model = warm_model or model
+                        model_router.release_model(endpoint, route, api_key, model)
+            
+            if warm_model is not None:
+                ChatAgent(
+                    system_message=_render_system_message(False, "预热", "预热"),
+                    model=warm_model
+                )
+            
+            self.logger.info(f"智能体预热完成: keys={len(set(api_keys))}, duration={time.time() - start_time:.2f}s")
+            
+        except Exception as e:
+            # 预热失败不影响正常创建流程
+            self.logger.warning(f"智能体预热失败: error={e}")
+    
+    def prewarm_async(self, api_keys: List[str]) -> Future:
+        """在后台线程中预热"""
+        return get_build_executor().submit(self.prewarm, list(api_keys))
+    
     def _create_camel_agent(self, agent: Agent) -> None:
         """创建CAMEL智能体"""
         self.logger.debug(f"创建CAMEL智能体: agent_id={agent.id}, role='{agent.role}'")
         
         try:
+            from camel.agents import ChatAgent
+            
             # 创建系统提示
             system_message = self._create_system_message(agent)
             
@@ -103,6 +254,7 @@ class AgentService:
                 system_message=system_message,
                 model=agent.model
             )
+            agent.endpoint_agents[(self.route_for(agent), agent.endpoint)] = agent.agent
             
             self.logger.debug(f"CAMEL智能体创建成功: agent_id={agent.id}")
             
@@ -110,24 +262,44 @@ class AgentService:
             self.logger.error(f"CAMEL智能体创建失败: agent_id={agent.id}, error={e}")
             raise
     
-    def _create_system_message(self, agent: Agent) -> BaseMessage:
+    def _create_system_message(self, agent: Agent) -> 'BaseMessage':
         """创建系统消息"""
-        if agent.id == config.meeting.ceo_agent_id:  # CEO智能体
-            content = PromptConfig.get_ceo_system_prompt(agent.role, agent.description)
-        else:  # 其他智能体
-            content = PromptConfig.get_agent_system_prompt(agent.role, agent.description)
-        
-        return BaseMessage.make_assistant_message(
-            role_name=agent.role,
-            content=content
+        return _render_system_message(
+            agent.id == config.meeting.ceo_agent_id,
+            agent.role,
+            agent.description
         )
     
     def get_agent_by_id(self, agent_id: int) -> Optional[Agent]:
         """根据ID获取智能体"""
-        for agent in self.agents:
-            if agent.id == agent_id:
-                return agent
-        return None
+        return self._agents_by_id.get(agent_id)
+    
+    def non_ceo_count(self) -> int:
+        """非CEO智能体数量"""
+        return len(self._rotation)
+    
+    def first_in_rotation(self) -> Optional[int]:
+        """发言轮转中的第一个非CEO智能体"""
+        rotation = self._rotation
+        return rotation[0] if rotation else None
+    
+    def next_in_rotation(self, agent_id: Optional[int]) -> Optional[int]:
+        """发言轮转中某个智能体之后的下一位（非CEO或未知ID时返回第一位）"""
+        rotation = self._rotation
+        if not rotation:
+            return None
+        index = self._rotation_index.get(agent_id)
+        if index is None:
+            return rotation[0]
+        return rotation[(index + 1) % len(rotation)]
+    
+    def _rebuild_index(self) -> None:
+        """重建ID索引和轮转顺序（调用方需持有 _agents_lock）"""
+        ceo_id = config.meeting.ceo_agent_id
+        self._agents_by_id = {agent.id: agent for agent in self.agents}
+        rotation = [agent.id for agent in self.agents if agent.id != ceo_id]
+        self._rotation_index = {agent_id: index for index, agent_id in enumerate(rotation)}
+        self._rotation = rotation
     
     def get_agent_by_role(self, role: str) -> Optional[Agent]:
         """根据角色名称获取智能体"""
@@ -141,65 +313,164 @@ class AgentService:
         return self.agents.copy()
     
     def clear_agents(self) -> None:
-        """清空所有智能体"""
+        """清空所有智能体，模型实例归还预热池，API密钥归还密钥池"""
         self.logger.info("清空所有智能体")
-        self.agents.clear()
+        with self._agents_lock:
+            agents, self.agents = self.agents, []
+            self._rebuild_index()
+        self.speaker_router.clear()
+        for agent in agents:
+            self.release_agent_models(agent)
+            key_pool.release(agent.api_key)
     
     def add_agent(self, agent: Agent) -> None:
-        """添加智能体到列表"""
-        self.agents.append(agent)
+        """添加智能体到列表（按ID有序，支持并行创建）"""
+        with self._agents_lock:
+            index = len(self.agents)
+            while index > 0 and self.agents[index - 1].id > agent.id:
+                index -= 1
+            self.agents.insert(index, agent)
+            self._rebuild_index()
         self.logger.info(f"添加智能体到列表: {agent}")
     
     def remove_agent(self, agent_id: int) -> bool:
         """移除智能体"""
-        for i, agent in enumerate(self.agents):
-            if agent.id == agent_id:
-                removed_agent = self.agents.pop(i)
-                self.logger.info(f"移除智能体: {removed_agent}")
-                return True
+        with self._agents_lock:
+            for i, agent in enumerate(self.agents):
+                if agent.id == agent_id:
+                    removed_agent = self.agents.pop(i)
+                    self._rebuild_index()
+                    self.logger.info(f"移除智能体: {removed_agent}")
+                    return True
         return False
     
-    def generate_response(self, agent: Agent, user_message: BaseMessage) -> str:
+    def generate_response(self, agent: Agent, user_message: 'BaseMessage', route: Optional[str] = None) -> str:
         """
         生成智能体回复
         
+        按路由表依次尝试端点，调用失败时使用下一个后备端点。
+        
         Args:
             agent: 智能体实例
             user_message: 用户消息
+            route: 模型路由（为空时按智能体角色选择）
         
         Returns:
             智能体回复内容
         """
-        self.logger.debug(f"生成智能体回复: agent_id={agent.id}, role='{agent.role}'")
+        route = route or self.route_for(agent)
+        self.logger.debug(f"生成智能体回复: agent_id={agent.id}, role='{agent.role}', route={route}")
         
         try:
             if not agent.agent:
                 raise ValueError(f"智能体 {agent.role} 未正确初始化")
             
-            start_time = time.time()
-            response = agent.agent.step(user_message)
-            end_time = time.time()
+            # 回放模式下直接使用回放智能体
+            cassette = self.cassette
+            if cassette is not None and cassette.replaying:
+                return self._step(agent, agent.agent, agent.api_key, user_message, route,
+                                  model_router.requested_tokens(model_router.primary_endpoint(route), route))
             
-            content = response.msgs[0].content
-            duration = end_time - start_time
-            
-            self.logger.info(f"智能体回复生成成功: agent_id={agent.id}, duration={duration:.2f}s, content_length={len(content)}")
-            self.logger.debug(f"智能体回复内容: agent_id={agent.id}, content='{content[:100]}...'")
-            
-            return content
+            endpoints = model_router.endpoints_for(route)
+            for index, endpoint in enumerate(endpoints):
+                try:
+                    content = self._step(agent, self._endpoint_agent(agent, route, endpoint),
+                                         model_router.api_key_for(endpoint, agent.api_key), user_message, route,
+                                         model_router.requested_tokens(endpoint, route))
+                except Exception as e:
+                    model_router.record(endpoint, False)
+                    if index + 1 >= len(endpoints):
+                        raise
+                    model_router.record_fallback(route, endpoint, endpoints[index + 1], e)
+                    continue
+                model_router.record(endpoint, True)
+                return content
             
         except Exception as e:
-            self.logger.error(f"生成智能体回复失败: agent_id={agent.id}, error={e}")
+            self.logger.error(f"生成智能体回复失败: agent_id={agent.id}, route={route}, error={e}")
             raise
     
-    def decide_next_speaker(self, ceo_content: str, agents: List[Agent], speaker_counts: Dict[int, int] = None) -> SpeakerDecision:
+    def _step(self, agent: Agent, chat_agent: Any, api_key: str, user_message: 'BaseMessage', route: str,
+              requested_tokens: int) -> str:
+        """使用指定的 ChatAgent 调用一次模型，回复按路由的输出策略截断"""
+        # 输入已包含完整的会议上下文，每次调用前清空记忆，只保留系统提示，
+        # 使请求始终为"系统提示 + 稳定前缀 + 本次任务"，前缀缓存才能命中
+        chat_agent.reset()
+        
+        limiter = self.key_limiter
+        with limiter(api_key) if limiter else nullcontext():
+            start_time = time.time()
+            response = chat_agent.step(user_message)
+            end_time = time.time()
+        
+        info = response.info or {}
+        duration = end_time - start_time
+        usage = extract_token_usage(info.get('usage'))
+        self._record_usage(agent, usage, api_key)
+        
+        raw_content = response.msgs[0].content
+        truncated = 'length' in (info.get('termination_reasons') or ())
+        content = output_governor.apply(route, agent.role, raw_content, requested_tokens,
+                                        usage['completion_tokens'], truncated)
+        if len(content) < len(raw_content):
+            self.logger.info(f"回复超长已截断: agent_id={agent.id}, route={route}, "
+                             f"length={len(raw_content)} -> {len(content)}, truncated={truncated}")
+        
+        cassette = self.cassette
+        if cassette is not None and cassette.recording:
+            cassette.record(agent.id, agent.role, user_message.content, content, duration, usage)
+        
+        self.logger.info(f"智能体回复生成成功: agent_id={agent.id}, route={route}, duration={duration:.2f}s, "
+                         f"content_length={len(content)}, prompt_tokens={usage['prompt_tokens']}, "
+                         f"cached_tokens={usage['cached_tokens']}, uncached_tokens={usage['uncached_tokens']}")
+        self.logger.debug(f"智能体回复内容: agent_id={agent.id}, content='{content[:100]}...'")
+        
+        return content
+    
+    def _record_usage(self, agent: Agent, usage: Dict[str, int], api_key: Optional[str] = None) -> None:
+        """记录一次调用的令牌用量（会议/智能体/用户/API密钥）"""
+        meeting_usage = self.usage
+        meeting_usage.record(agent.id, usage)
+        usage_ledger.record(meeting_usage.user_id, api_key or agent.api_key, usage)
+    
+    def reset_usage(self, meeting_id: Optional[str] = None, user_id: Optional[str] = None) -> None:
+        """开始新的用量统计（初始化或重启会议时调用）"""
+        self.usage = MeetingUsage(meeting_id, user_id)
+    
+    def get_prompt_cache_stats(self) -> Dict[str, Any]:
+        """获取前缀缓存统计（含命中率）"""
+        total = self.usage.total.to_dict()
+        return {
+            'calls': total['calls'],
+            'prompt_tokens': total['prompt_tokens'],
+            'cached_tokens': total['cached_tokens'],
+            'uncached_tokens': total['uncached_tokens'],
+            'hit_rate': total['cache_hit_rate']
+        }
+    
+    def build_speaker_router(self, agents: Sequence[Tuple[int, str, str]]) -> None:
+        """
+        会议开始时预先计算发言者路由的智能体向量
+        
+        Args:
+            agents: [(智能体ID, 角色, 职责描述)]（CEO会被排除）
+        """
+        ceo_id = config.meeting.ceo_agent_id
+        self.speaker_router.build([agent for agent in agents if agent[0] != ceo_id])
+    
+    def decide_next_speaker(self, ceo_content: str, agents: List[Agent], speaker_counts: Dict[int, int] = None,
+                            exclude: Collection[int] = ()) -> SpeakerDecision:
         """
         决定下一个发言人
         
+        按CEO发言与各智能体角色职责的相关度选择（点名优先，多发言的智能体扣分），
+        发言者路由不可用或没有可选的智能体时使用轮询策略。
+        
         Args:
             ceo_content: CEO发言内容
             agents: 智能体列表
             speaker_counts: 发言次数统计
+            exclude: 不参与选择的智能体ID（如本轮已发言的）
         
         Returns:
             发言人决策结果
@@ -207,100 +478,36 @@ class AgentService:
         self.logger.debug(f"决定下一个发言人: content_length={len(ceo_content)}, speaker_counts={speaker_counts}")
         
         try:
-            ceo_content_lower = ceo_content.lower()
-            
-            # 首先尝试从CEO发言中提取具体的角色名称
-            for agent in agents:
-                if agent.id == config.meeting.ceo_agent_id:
-                    continue  # 排除CEO
-                agent_role_lower = agent.role.lower()
-                
-                # 检查CEO发言中是否包含该角色的完整名称或关键词
-                if (agent_role_lower in ceo_content_lower or 
-                    any(word in ceo_content_lower for word in agent_role_lower.split()) or
-                    any(word in agent_role_lower for word in ceo_content_lower.split() if len(word) > 2)):
-                    
-                    decision = SpeakerDecision(
-                        agent_id=agent.id,
-                        agent_role=agent.role,
-                        decision_reason=f"CEO明确指定了角色: {agent.role}",
-                        confidence=0.9
-                    )
-                    
-                    self.logger.info(f"CEO指定发言人: {decision}")
-                    return decision
-            
-            # 如果没有明确指定，使用关键词匹配策略
-            # decision = self._keyword_based_decision(ceo_content_lower, agents, speaker_counts)
+            if not self.speaker_router.ready:
+                self.build_speaker_router([(agent.id, agent.role, agent.description) for agent in agents])
+            decision = self.speaker_router.select(
+                ceo_content, speaker_counts, exclude, config.meeting.speaker_fairness_weight
+            )
             if decision:
-                self.logger.info(f"关键词匹配发言人: {decision}")
+                self.logger.info(f"相关度选择发言人: {decision}")
                 return decision
-            
-            # 使用轮询策略，优先选择发言次数最少的智能体
-            decision = self._round_robin_decision(agents, speaker_counts)
-            self.logger.info(f"轮询选择发言人: {decision}")
-            return decision
-            
         except Exception as e:
-            self.logger.error(f"决定下一个发言人失败: error={e}")
-            # 返回默认选择
-            return SpeakerDecision(
-                agent_id=1,
-                agent_role=agents[1].role if len(agents) > 1 else "智能体1",
-                decision_reason="默认选择",
-                confidence=0.1
-            )
-    
-    def _keyword_based_decision(self, ceo_content_lower: str, agents: List[Agent], speaker_counts: Dict[int, int] = None) -> Optional[SpeakerDecision]:
-        """基于关键词的决策"""
-        keyword_mappings = [
-            (['技术', '架构', '系统', '开发', '算法', '工程师'], ['技术', '开发', '架构', '工程师', '专家']),
-            (['市场', '用户', '营销', '推广', '品牌'], ['市场', '营销', '推广', '品牌']),
-            (['产品', '设计', '体验', '功能'], ['产品', '设计', '体验']),
-            (['运营', '管理', '执行', '实施', '生产'], ['运营', '管理', '执行', '生产']),
-            (['财务', '成本', '预算', '投资'], ['财务', '会计', '预算']),
-            (['安全', '风险', '预警', '监测'], ['安全', '风险', '监测'])
-        ]
-        
-        for ceo_keywords, agent_keywords in keyword_mappings:
-            if any(keyword in ceo_content_lower for keyword in ceo_keywords):
-                # 找到匹配的智能体，优先选择发言次数最少的
-                matching_agents = []
-                for agent in agents:
-                    if agent.id == config.meeting.ceo_agent_id:
-                        continue  # 排除CEO
-                    if any(agent_keyword in agent.role.lower() for agent_keyword in agent_keywords):
-                        matching_agents.append(agent)
-                
-                if matching_agents:
-                    # 如果有发言统计，选择发言次数最少的
-                    if speaker_counts:
-                        best_agent = min(matching_agents, key=lambda a: speaker_counts.get(a.id, 0))
-                    else:
-                        best_agent = matching_agents[0]
-                    
-                    return SpeakerDecision(
-                        agent_id=best_agent.id,
-                        agent_role=best_agent.role,
-                        decision_reason=f"关键词匹配: {ceo_keywords} -> {best_agent.role}",
-                        confidence=0.7
-                    )
+            self.logger.warning(f"发言者路由不可用，使用轮询策略: error={e}")
         
-        return None
+        ceo_id = config.meeting.ceo_agent_id
+        non_ceo_agents = [agent for agent in agents if agent.id != ceo_id]
+        candidates = [agent for agent in non_ceo_agents if agent.id not in exclude] or non_ceo_agents
+        decision = self._round_robin_decision(candidates, speaker_counts)
+        self.logger.info(f"轮询选择发言人: {decision}")
+        return decision
     
     def _round_robin_decision(self, agents: List[Agent], speaker_counts: Dict[int, int] = None) -> SpeakerDecision:
-        """轮询决策"""
-        if len(agents) <= 1:
+        """轮询决策（只在非CEO智能体中选择，一个都没有时才回到CEO）"""
+        non_ceo_agents = [agent for agent in agents if agent.id != config.meeting.ceo_agent_id]
+        
+        if not non_ceo_agents:
             return SpeakerDecision(
-                agent_id=0,
+                agent_id=config.meeting.ceo_agent_id,
                 agent_role="CEO",
                 decision_reason="没有其他智能体",
                 confidence=0.1
             )
         
-        # 获取非CEO智能体
-        non_ceo_agents = [agent for agent in agents if agent.id != config.meeting.ceo_agent_id]
-        
         if speaker_counts:
             # 选择发言次数最少的智能体
             target_agent = min(non_ceo_agents, key=lambda a: speaker_counts.get(a.id, 0))
@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会议分析导出服务模块
+将 saved_meetings/ 增量导出为按日期分区的列式文件（Arrow IPC），供跨会议统计使用：
+- meetings: 每场会议一行（轮次、时长、令牌用量等）
+- turns: 每次发言一行（角色、字数、间隔、调用耗时和令牌用量等）
+
+导出进度（高水位）按会议索引 meeting_index.json 的条目数记录，每次只追加新保存的会议。
+文件不压缩，查询时以内存映射方式读取，不复制数据。需要安装 pyarrow。
+"""
+
+import os
+import json
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Iterator, Tuple
+
+from config import config
+from logging_config import get_logger
+from utils import atomic_write_json
+from async_runtime import run_blocking
+
+logger = get_logger(__name__)
+
+# 分析表
+TABLE_MEETINGS = 'meetings'
+TABLE_TURNS = 'turns'
+ANALYTICS_TABLES = (TABLE_MEETINGS, TABLE_TURNS)
+
+# 导出状态（高水位）文件
+STATE_FILENAME = '_state.json'
+STATE_VERSION = 1
+
+# 分区目录前缀：<表>/date=YYYY-MM-DD/part-000001.arrow
+PARTITION_PREFIX = 'date='
+PART_SUFFIX = '.arrow'
+
+# 导出后台任务类型
+JOB_ANALYTICS_EXPORT = 'analytics_export'
+
+_export_lock = threading.Lock()
+
+
+def _require_pyarrow() -> Any:
+    """导入 pyarrow（可选依赖）"""
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        raise RuntimeError("会议分析导出需要安装 pyarrow 包: pip install pyarrow")
+    return pyarrow
+
+
+def _schemas(pa: Any) -> Dict[str, Any]:
+    """各表的列定义（显式指定类型，缺失值为 null）"""
+    return {
+        TABLE_MEETINGS: pa.schema([
+            ('meeting_id', pa.string()),
+            ('meeting_dir', pa.string()),
+            ('date', pa.string()),
+            ('topic', pa.string()),
+            ('start_time', pa.float64()),
+            ('end_time', pa.float64()),
+            ('duration_seconds', pa.float64()),
+            ('total_rounds', pa.int32()),
+            ('total_messages', pa.int32()),
+            ('participants', pa.list_(pa.string())),
+            ('calls', pa.int64()),
+            ('prompt_tokens', pa.int64()),
+            ('completion_tokens', pa.int64()),
+            ('total_tokens', pa.int64()),
+            ('cached_tokens', pa.int64()),
+            ('cache_hit_rate', pa.float64()),
+            ('save_timestamp', pa.string())
+        ]),
+        TABLE_TURNS: pa.schema([
+            ('meeting_id', pa.string()),
+            ('date', pa.string()),
+            ('seq', pa.int32()),
+            ('round_number', pa.int32()),
+            ('agent_id', pa.int32()),
+            ('role', pa.string()),
+            ('is_ceo', pa.bool_()),
+            ('content_chars', pa.int32()),
+            ('timestamp', pa.float64()),
+            ('gap_seconds', pa.float64()),  # 与上一条发言（第一条为会议开始）的间隔
+            ('latency_seconds', pa.float64()),  # 模型调用耗时（仅录制模式保存的会议有）
+            ('prompt_tokens', pa.int64()),
+            ('completion_tokens', pa.int64()),
+            ('content', pa.string())
+        ])
+    }
+
+
+@contextmanager
+def _locked_export(export_dir: str) -> Iterator[None]:
+    """串行化导出：进程内使用线程锁，支持时再加文件锁以兼容多进程"""
+    with _export_lock:
+        os.makedirs(export_dir, exist_ok=True)
+        lock_file = open(os.path.join(export_dir, '_state.lock'), 'a')
+        try:
+            try:
+                import fcntl
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            except ImportError:
+                pass  # Windows下仅使用进程内锁
+            yield
+        finally:
+            lock_file.close()
+
+
+def _read_json(path: str, default: Any = None) -> Any:
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _meeting_date(info: Dict[str, Any]) -> str:
+    """会议的分区日期（按开始时间，缺失时按保存时间）"""
+    if info.get('start_time'):
+        return datetime.fromtimestamp(info['start_time']).strftime('%Y-%m-%d')
+    return (info.get('save_timestamp') or datetime.now().isoformat())[:10]
+
+
+def _cassette_calls(meeting_dir: str) -> Dict[Tuple[int, str], deque]:
+    """录制模式保存的会议：(智能体ID, 回复内容) -> 调用记录（按调用顺序）"""
+    calls: Dict[Tuple[int, str], deque] = defaultdict(deque)
+    cassette = _read_json(os.path.join(meeting_dir, 'cassette.json'), {})
+    for entry in cassette.get('entries', []):
+        calls[(entry.get('agent_id'), entry.get('content'))].append(entry)
+    return calls
+
+
+def meeting_rows(meeting_dir: str, index_entry: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    读取一场已保存的会议，转换为 meetings 表的一行和 turns 表的多行
+
+    Args:
+        meeting_dir: 会议目录
+        index_entry: 会议索引中的条目
+    """
+    info = _read_json(os.path.join(meeting_dir, 'meeting_info.json'), {})
+    messages = _read_json(os.path.join(meeting_dir, 'messages.json'), [])
+    usage = (info.get('token_usage') or {}).get('total') or {}
+    meeting_id = info.get('meeting_id') or index_entry.get('meeting_id')
+    date = _meeting_date(info)
+    start_time = info.get('start_time')
+    end_time = info.get('end_time')
+
+    meeting = {
+        'meeting_id': meeting_id,
+        'meeting_dir': index_entry.get('meeting_dir'),
+        'date': date,
+        'topic': info.get('topic', ''),
+        'start_time': start_time,
+        'end_time': end_time,
+        'duration_seconds': end_time - start_time if start_time and end_time else None,
+        'total_rounds': info.get('total_rounds'),
+        'total_messages': info.get('total_messages', len(messages)),
+        'participants': info.get('participants', []),
+        'calls': usage.get('calls'),
+        'prompt_tokens': usage.get('prompt_tokens'),
+        'completion_tokens': usage.get('completion_tokens'),
+        'total_tokens': usage.get('total_tokens'),
+        'cached_tokens': usage.get('cached_tokens'),
+        'cache_hit_rate': usage.get('cache_hit_rate'),
+        'save_timestamp': info.get('save_timestamp') or index_entry.get('save_timestamp')
+    }
+
+    calls = _cassette_calls(meeting_dir)
+    ceo_id = config.meeting.ceo_agent_id
+    turns = []
+    previous = start_time
+    for seq, message in enumerate(messages):
+        content = message.get('content', '')
+        timestamp = message.get('timestamp')
+        matched = calls.get((message.get('agent_id'), content))
+        call = matched.popleft() if matched else {}
+        call_usage = call.get('usage') or {}
+        turns.append({
+            'meeting_id': meeting_id,
+            'date': date,
+            'seq': seq,
+            'round_number': message.get('round_number'),
+            'agent_id': message.get('agent_id'),
+            'role': message.get('role', ''),
+            'is_ceo': message.get('agent_id') == ceo_id,
+            'content_chars': len(content),
+            'timestamp': timestamp,
+            'gap_seconds': timestamp - previous if timestamp and previous else None,
+            'latency_seconds': call.get('latency') if call else None,
+            'prompt_tokens': call_usage.get('prompt_tokens'),
+            'completion_tokens': call_usage.get('completion_tokens'),
+            'content': content
+        })
+        previous = timestamp or previous
+
+    return meeting, turns
+
+
+class AnalyticsExporter:
+    """
+    会议分析增量导出器
+
+    每次导出为每个日期分区写入一个新的 part 文件（先写临时文件再重命名），全部写完后才推进高水位。
+    中途失败时留下的、序号大于已完成导出次数的 part 文件在下次导出前删除，不会重复。
+    """
+
+    def __init__(self, save_dir: Optional[str] = None, export_dir: Optional[str] = None):
+        self.save_dir = save_dir or config.meetings_save_dir
+        self.export_dir = export_dir or config.analytics.export_dir
+
+    def _state_path(self) -> str:
+        return os.path.join(self.export_dir, STATE_FILENAME)
+
+    def load_state(self) -> Dict[str, Any]:
+        """导出状态：index_offset 为已导出的会议索引条目数，run 为已完成的导出次数"""
+        state = _read_json(self._state_path(), None)
+        if state is None:
+            return {'version': STATE_VERSION, 'index_offset': 0, 'run': 0, 'last_meeting_dir': None,
+                    'meetings': 0, 'turns': 0}
+        return state
+
+    def _write_part(self, pa: Any, schema: Any, table_name: str, date: str,
+                    rows: List[Dict[str, Any]], run: int) -> str:
+        partition_dir = os.path.join(self.export_dir, table_name, f"{PARTITION_PREFIX}{date}")
+        os.makedirs(partition_dir, exist_ok=True)
+        path = os.path.join(partition_dir, f"part-{run:06d}{PART_SUFFIX}")
+        temp_path = f"{path}.tmp"
+
+        table = pa.Table.from_pylist(rows, schema=schema)
+        with pa.OSFile(temp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, schema) as writer:
+                writer.write_table(table)
+        os.replace(temp_path, path)
+        return path
+
+    def _remove_orphans(self, completed_run: int) -> None:
+        """删除未完成的导出写入的 part 文件"""
+        for table_name in ANALYTICS_TABLES:
+            for path in partition_files(table_name, self.export_dir):
+                run = int(os.path.basename(path)[len('part-'):-len(PART_SUFFIX)])
+                if run > completed_run:
+                    logger.warning(f"删除未完成导出的文件: {path}")
+                    os.remove(path)
+
+    def export(self, report: Optional[Any] = None) -> Dict[str, Any]:
+        """
+        导出上次导出之后保存的会议
+
+        Args:
+            report: 进度回调（后台任务中使用）
+
+        Returns:
+            导出结果（新增会议数、发言数、写入的文件）
+        """
+        pa = _require_pyarrow()
+        schemas = _schemas(pa)
+        report = report or (lambda progress, stage: None)
+
+        with _locked_export(self.export_dir):
+            state = self.load_state()
+            index = _read_json(os.path.join(self.save_dir, 'meeting_index.json'), [])
+            offset = state['index_offset']
+
+            rewritten = offset and (offset > len(index) or
+                                    index[offset - 1].get('meeting_dir') != state.get('last_meeting_dir'))
+            if rewritten:
+                raise RuntimeError("会议索引与导出状态不一致（索引被重写？），请使用 --rebuild 重新导出")
+
+            pending = index[offset:]
+            if not pending:
+                return {'status': 'success', 'meetings': 0, 'turns': 0, 'skipped': 0, 'files': [],
+                        'index_offset': offset}
+
+            report(0.05, f'正在读取 {len(pending)} 场会议')
+            rows: Dict[str, Dict[str, List[Dict[str, Any]]]] = {
+                TABLE_MEETINGS: defaultdict(list),
+                TABLE_TURNS: defaultdict(list)
+            }
+            skipped = 0
+            for count, entry in enumerate(pending, 1):
+                meeting_dir = os.path.join(self.save_dir, entry.get('meeting_dir', ''))
+                if not os.path.isdir(meeting_dir):
+                    skipped += 1
+                    logger.warning(f"会议目录不存在，跳过导出: {meeting_dir}")
+                    continue
+                # 读取和解析会议文件（协程模式下在原生线程中进行）
+                meeting, turns = run_blocking(meeting_rows, meeting_dir, entry)
+                rows[TABLE_MEETINGS][meeting['date']].append(meeting)
+                for turn in turns:
+                    rows[TABLE_TURNS][turn['date']].append(turn)
+                if count % 100 == 0:
+                    report(0.05 + 0.6 * count / len(pending), f'已读取 {count}/{len(pending)} 场会议')
+
+            report(0.7, '正在写入列式文件')
+            self._remove_orphans(state['run'])
+            run = state['run'] + 1
+            files = []
+            for table_name, partitions in rows.items():
+                for date, partition_rows in sorted(partitions.items()):
+                    files.append(run_blocking(self._write_part, pa, schemas[table_name], table_name, date,
+                                              partition_rows, run))
+
+            meetings = sum(len(partition) for partition in rows[TABLE_MEETINGS].values())
+            turns = sum(len(partition) for partition in rows[TABLE_TURNS].values())
+            state.update({
+                'index_offset': len(index),
+                'run': run,
+                'last_meeting_dir': index[-1].get('meeting_dir'),
+                'meetings': state.get('meetings', 0) + meetings,
+                'turns': state.get('turns', 0) + turns,
+                'updated_at': datetime.now().isoformat()
+            })
+            atomic_write_json(self._state_path(), state)
+
+        logger.info(f"会议分析导出完成: meetings={meetings}, turns={turns}, files={len(files)}, skipped={skipped}")
+        return {'status': 'success', 'meetings': meetings, 'turns': turns, 'skipped': skipped,
+                'files': files, 'index_offset': len(index)}
+
+    def rebuild(self, report: Optional[Any] = None) -> Dict[str, Any]:
+        """删除已导出的文件并从头导出"""
+        import shutil
+
+        with _locked_export(self.export_dir):
+            for table_name in ANALYTICS_TABLES:
+                shutil.rmtree(os.path.join(self.export_dir, table_name), ignore_errors=True)
+            if os.path.exists(self._state_path()):
+                os.remove(self._state_path())
+        return self.export(report)
+
+
+def submit_export_job() -> Dict[str, Any]:
+    """在后台任务中增量导出（已有进行中的导出任务时返回该任务）"""
+    from services.job_service import job_runner, JOB_FINISHED_STATES
+
+    existing = job_runner.find(JOB_ANALYTICS_EXPORT)
+    if existing is not None and existing['status'] not in JOB_FINISHED_STATES:
+        return existing
+    return job_runner.submit(JOB_ANALYTICS_EXPORT, AnalyticsExporter().export).to_dict()
+
+
+def partition_files(table_name: str, export_dir: Optional[str] = None,
+                    start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[str]:
+    """表在日期范围（含两端，YYYY-MM-DD）内的 part 文件"""
+    table_dir = os.path.join(export_dir or config.analytics.export_dir, table_name)
+    if not os.path.isdir(table_dir):
+        return []
+
+    files = []
+    for partition in sorted(os.listdir(table_dir)):
+        if not partition.startswith(PARTITION_PREFIX):
+            continue
+        date = partition[len(PARTITION_PREFIX):]
+        if (start_date and date < start_date) or (end_date and date > end_date):
+            continue
+        partition_dir = os.path.join(table_dir, partition)
+        files.extend(
+            os.path.join(partition_dir, name) for name in sorted(os.listdir(partition_dir))
+            if name.endswith(PART_SUFFIX)
+        )
+    return files
+
+
+def read_table(table_name: str, export_dir: Optional[str] = None, start_date: Optional[str] = None,
+               end_date: Optional[str] = None, columns: Optional[List[str]] = None) -> Any:
+    """
+    以内存映射方式读取分析表
+
+    Args:
+        table_name: meetings 或 turns
+        export_dir: 导出目录（默认 ANALYTICS_EXPORT_DIR）
+        start_date/end_date: 分区日期范围（YYYY-MM-DD，含两端）
+        columns: 只读取的列
+
+    Returns:
+        pyarrow.Table（数据引用映射的文件，不复制到内存）
+    """
+    pa = _require_pyarrow()
+    schema = _schemas(pa)[table_name]
+    if columns:
+        schema = pa.schema([schema.field(name) for name in columns])
+
+    tables = []
+    for path in partition_files(table_name, export_dir, start_date, end_date):
+        source = pa.memory_map(path, 'r')
+        table = pa.ipc.open_file(source).read_all()
+        tables.append(table.select(columns) if columns else table)
+
+    if not tables:
+        return schema.empty_table()
+    return pa.concat_tables(tables)
+
+
+def summarize(export_dir: Optional[str] = None, start_date: Optional[str] = None,
+              end_date: Optional[str] = None) -> Dict[str, Any]:
+    """常用的跨会议统计：按角色的发言长度和调用耗时、结束所需轮次、令牌用量"""
+    turns = read_table(TABLE_TURNS, export_dir, start_date, end_date,
+                       ['role', 'content_chars', 'latency_seconds', 'completion_tokens'])
+    meetings = read_table(TABLE_MEETINGS, export_dir, start_date, end_date,
+                          ['total_rounds', 'duration_seconds', 'total_tokens', 'cached_tokens'])
+
+    by_role = turns.group_by('role').aggregate([
+        ('content_chars', 'count'),
+        ('content_chars', 'mean'),
+        ('content_chars', 'max'),
+        ('latency_seconds', 'mean'),
+        ('completion_tokens', 'mean')
+    ]).to_pylist()
+
+    def mean(column: str) -> Optional[float]:
+        values = [value for value in meetings.column(column).to_pylist() if value is not None]
+        return round(sum(values) / len(values), 3) if values else None
+
+    return {
+        'meetings': meetings.num_rows,
+        'turns': turns.num_rows,
+        'avg_rounds': mean('total_rounds'),
+        'avg_duration_seconds': mean('duration_seconds'),
+        'avg_total_tokens': mean('total_tokens'),
+        'avg_cached_tokens': mean('cached_tokens'),
+        'by_role': sorted(by_role, key=lambda row: row['role'])
+    }
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型调用录制/回放服务模块
+录制每次模型调用的 (请求指纹 -> 回复, 耗时)，并可在进程内确定性地回放，
+用于在不访问网络的情况下单独测量编排、持久化和推送的开销
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Any
+
+from config import config
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 录制文件名（随会议保存在会议目录中）
+CASSETTE_FILENAME = 'cassette.json'
+CASSETTE_VERSION = 1
+
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+
+
+class CassetteExhaustedError(RuntimeError):
+    """回放记录已用完（会议流程与录制时不一致）"""
+
+
+def request_fingerprint(agent_id: int, role: str, content: str) -> str:
+    """请求指纹：智能体 + 输入内容"""
+    raw = f"{agent_id}\x00{role}\x00{content}".encode('utf-8')
+    return hashlib.sha256(raw).hexdigest()[:24]
+
+
+@dataclass
+class CassetteEntry:
+    """一次模型调用的录制结果"""
+    agent_id: int
+    role: str
+    content: str
+    fingerprint: Optional[str] = None  # 由已保存会议转换而来时没有请求指纹
+    latency: float = 0.0  # 调用耗时（秒）
+    usage: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        """转换为字典"""
+        return asdict(self)
+
+
+class _ReplayMessage:
+    """回放回复消息（与 ChatAgent 回复中的消息接口一致）"""
+
+    def __init__(self, content: str):
+        self.content = content
+
+
+class _ReplayResponse:
+    """回放回复（与 ChatAgent.step 的返回值接口一致）"""
+
+    def __init__(self, content: str, usage: Dict[str, int]):
+        self.msgs = [_ReplayMessage(content)]
+        self.info = {'usage': usage}
+
+
+class ReplayAgent:
+    """替代 ChatAgent 的回放智能体，不创建模型实例，也不访问网络"""
+
+    def __init__(self, cassette: 'Cassette', agent_id: int, role: str):
+        self.cassette = cassette
+        self.agent_id = agent_id
+        self.role = role
+
+    def reset(self) -> None:
+        """与 ChatAgent.reset 接口一致（回放无记忆）"""
+
+    def step(self, input_message: Any) -> _ReplayResponse:
+        entry = self.cassette.next_response(self.agent_id, self.role, input_message.content)
+        if self.cassette.replay_latency and entry.latency:
+            time.sleep(entry.latency * self.cassette.latency_scale)
+        return _ReplayResponse(entry.content, dict(entry.usage))
+
+
+class Cassette:
+    """
+    一场会议的模型调用录制
+
+    回放时优先按请求指纹匹配，找不到时按该智能体的调用顺序取下一条，
+    因此也可以回放由已保存会议（只有发言内容，没有请求）转换而来的录制。
+    """
+
+    def __init__(self, mode: str, entries: List[CassetteEntry] = None,
+                 meeting: Optional[Dict[str, Any]] = None,
+                 replay_latency: bool = False, latency_scale: float = 1.0):
+        self.mode = mode
+        self.entries: List[CassetteEntry] = entries or []
+        self.meeting: Dict[str, Any] = meeting or {}  # 录制时的会议配置（topic/background/agents）
+        self.replay_latency = replay_latency
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._used: List[bool] = []
+        self._by_agent: Dict[int, List[int]] = {}
+        self.fingerprint_hits = 0
+        self.sequence_hits = 0
+        self.rewind()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == MODE_RECORD
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == MODE_REPLAY
+
+    def start(self, meeting: Dict[str, Any]) -> None:
+        """开始一场会议：录制模式清空记录，回放模式回到开头"""
+        with self._lock:
+            if self.recording:
+                self.entries = []
+                self.meeting = dict(meeting)
+        self.rewind()
+
+    def rewind(self) -> None:
+        """重置回放位置"""
+        with self._lock:
+            self._used = [False] * len(self.entries)
+            self._by_agent = {}
+            for index, entry in enumerate(self.entries):
+                self._by_agent.setdefault(entry.agent_id, []).append(index)
+            self.fingerprint_hits = 0
+            self.sequence_hits = 0
+
+    def record(self, agent_id: int, role: str, request_content: str, response_content: str,
+               latency: float, usage: Dict[str, int]) -> None:
+        """录制一次调用"""
+        entry = CassetteEntry(
+            agent_id=agent_id,
+            role=role,
+            content=response_content,
+            fingerprint=request_fingerprint(agent_id, role, request_content),
+            latency=round(latency, 4),
+            usage=dict(usage)
+        )
+        with self._lock:
+            self.entries.append(entry)
+
+    def next_response(self, agent_id: int, role: str, request_content: str) -> CassetteEntry:
+        """取出与请求匹配的录制回复"""
+        fingerprint = request_fingerprint(agent_id, role, request_content)
+        with self._lock:
+            candidates = [index for index in self._by_agent.get(agent_id, []) if not self._used[index]]
+            if not candidates:
+                raise CassetteExhaustedError(f"回放记录已用完: agent_id={agent_id}, role='{role}'")
+
+            chosen = next((index for index in candidates if self.entries[index].fingerprint == fingerprint), None)
+            if chosen is None:
+                chosen = candidates[0]
+                self.sequence_hits += 1
+            else:
+                self.fingerprint_hits += 1
+
+            self._used[chosen] = True
+            return self.entries[chosen]
+
+    def replay_agent(self, agent_id: int, role: str) -> ReplayAgent:
+        """创建回放智能体"""
+        return ReplayAgent(self, agent_id, role)
+
+    def stats(self) -> Dict[str, int]:
+        """回放匹配统计"""
+        with self._lock:
+            return {
+                'entries': len(self.entries),
+                'used': sum(self._used),
+                'fingerprint_hits': self.fingerprint_hits,
+                'sequence_hits': self.sequence_hits
+            }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为可保存的字典"""
+        with self._lock:
+            return {
+                'version': CASSETTE_VERSION,
+                'meeting': self.meeting,
+                'entries': [entry.to_dict() for entry in self.entries]
+            }
+
+    @classmethod
+    def load(cls, path: str, replay_latency: bool = False, latency_scale: float = 1.0) -> 'Cassette':
+        """
+        加载回放记录
+
+        Args:
+            path: cassette.json 文件，或已保存的会议目录（目录中没有 cassette.json 时
+                  由 messages.json 和 summary.json 按发言顺序转换，无请求指纹和耗时）
+        """
+        meeting_dir = path if os.path.isdir(path) else None
+        cassette_file = os.path.join(path, CASSETTE_FILENAME) if meeting_dir else path
+
+        if os.path.exists(cassette_file):
+            with open(cassette_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            entries = [CassetteEntry(**entry) for entry in data.get('entries', [])]
+            meeting = data.get('meeting', {})
+        elif meeting_dir:
+            entries, meeting = cls._entries_from_saved_meeting(meeting_dir)
+        else:
+            raise FileNotFoundError(f"回放记录不存在: {path}")
+
+        logger.info(f"加载回放记录: path={path}, entries={len(entries)}")
+        return cls(MODE_REPLAY, entries, meeting, replay_latency, latency_scale)
+
+    @staticmethod
+    def _entries_from_saved_meeting(meeting_dir: str):
+        """由已保存会议的发言记录生成回放记录"""
+        def read_json(name: str, default: Any) -> Any:
+            file_path = os.path.join(meeting_dir, name)
+            if not os.path.exists(file_path):
+                return default
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        info = read_json('meeting_info.json', {})
+        messages = read_json('messages.json', [])
+        summary = read_json('summary.json', {})
+
+        entries = [
+            CassetteEntry(agent_id=msg['agent_id'], role=msg.get('role', ''), content=msg.get('content', ''))
+            for msg in messages
+        ]
+
+        # 结束会议时CEO生成的总结也是一次模型调用
+        participants = info.get('participants', [])
+        ceo_id = config.meeting.ceo_agent_id
+        if summary.get('summary_content'):
+            entries.append(CassetteEntry(
+                agent_id=ceo_id,
+                role=participants[ceo_id] if ceo_id < len(participants) else '',
+                content=summary['summary_content']
+            ))
+
+        # 已保存会议只记录了角色名称，描述使用角色名称代替（回放不依赖提示词内容）
+        meeting = {
+            'topic': info.get('topic', ''),
+            'background': info.get('background', ''),
+            'agents': [{'role': role, 'description': role} for role in participants]
+        }
+        return entries, meeting
+
+
+# 回放模式下从配置加载的录制（所有会议共享，开始会议时回到开头）
+_config_cassette: Optional[Cassette] = None
+_config_cassette_lock = threading.Lock()
+
+
+def cassette_from_config() -> Optional[Cassette]:
+    """按配置创建录制（录制模式每场会议新建，回放模式复用同一份记录）"""
+    global _config_cassette
+    mode = config.cassette.mode
+
+    if mode == MODE_RECORD:
+        return Cassette(MODE_RECORD)
+
+    if mode == MODE_REPLAY:
+        with _config_cassette_lock:
+            if _config_cassette is None:
+                _config_cassette = Cassette.load(
+                    config.cassette.path,
+                    replay_latency=config.cassette.replay_latency,
+                    latency_scale=config.cassette.latency_scale
+                )
+        return _config_cassette
+
+    return None
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+对话历史检索模块
+为单场会议的发言维护向量索引（随消息增量追加），按智能体角色和CEO最新发言检索相关的较早发言，
+与最近几条发言一起组成智能体的对话历史
+"""
+
+import threading
+from typing import List, Sequence
+
+from models import Message
+from text_vectors import HashingVectorizer, VectorIndex
+
+# 所有会议共享的向量化器（无状态）
+_vectorizer = HashingVectorizer()
+
+
+class HistoryIndex:
+    """单场会议的发言向量索引"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = VectorIndex(_vectorizer.dim)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def sync(self, messages: Sequence[Message]) -> None:
+        """将尚未索引的消息追加到索引（消息只追加，按数量判断）"""
+        with self._lock:
+            pending = messages[len(self._index):]
+            if pending:
+                self._index.add(_vectorizer.transform(m.content for m in pending))
+
+    def select(self, messages: Sequence[Message], query: str, top_k: int, recent_turns: int) -> List[int]:
+        """
+        选取对话历史中的消息
+
+        Args:
+            messages: 会议的全部消息
+            query: 检索文本（角色、职责和CEO最新发言）
+            top_k: 在最近发言之前检索的相关发言数
+            recent_turns: 始终包含的最近发言数
+
+        Returns:
+            选中消息的下标（按发言顺序）
+        """
+        self.sync(messages)
+        recent_start = max(0, len(messages) - recent_turns)
+        with self._lock:
+            hits = self._index.search(_vectorizer.transform_one(query), top_k, limit=recent_start)
+        return sorted(row for row, _ in hits) + list(range(recent_start, len(messages)))
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台任务服务模块
+在线程池中执行耗时的后处理任务（结束会议、导出、重建索引等），立即返回任务ID，
+任务进度和结果通过监听器推送（Socket.IO）并可按ID查询
+"""
+
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Any, Callable
+
+from config import config
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 任务状态
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+JOB_FINISHED_STATES = (JOB_SUCCEEDED, JOB_FAILED)
+
+# 进度回调：report(进度0~1, 阶段说明)
+ProgressReporter = Callable[[float, str], None]
+
+
+@dataclass
+class Job:
+    """后台任务"""
+    id: str
+    kind: str
+    status: str = JOB_QUEUED
+    progress: float = 0.0
+    stage: str = ''
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    meta: Dict[str, Any] = field(default_factory=dict)
+    owner: Optional[str] = None  # 提交任务的用户标识（不随任务返回），None 表示只有管理员可见
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def is_finished(self) -> bool:
+        return self.status in JOB_FINISHED_STATES
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典（结果只在任务完成后返回）"""
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': round(self.progress, 3),
+            'stage': self.stage,
+            'result': self.result if self.is_finished() else None,
+            'error': self.error,
+            'meta': dict(self.meta),
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobRunner:
+    """
+    后台任务执行器
+
+    任务函数以关键字参数 report 接收进度回调。任务状态每次变化时调用监听器，
+    已完成的任务保留最近 max_history 个供查询。
+    """
+
+    def __init__(self, workers: int, max_history: int):
+        self.workers = workers
+        self.max_history = max_history
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._cond = threading.Condition()
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """线程池在提交第一个任务时创建（调用方需持有锁）"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job-runner')
+        return self._executor
+
+    def add_listener(self, listener: Callable[[Dict[str, Any]], None]) -> None:
+        """添加任务状态监听器，参数为任务字典"""
+        self._listeners.append(listener)
+
+    def _notify(self, job: Job) -> None:
+        """唤醒等待者并调用监听器（调用方不持有锁）"""
+        with self._cond:
+            snapshot = job.to_dict()
+            self._cond.notify_all()
+        for listener in list(self._listeners):
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.warning(f"任务状态监听器执行失败: job_id={job.id}, error={e}")
+
+    def submit(self, kind: str, fn: Callable[..., Any], *args: Any,
+               meta: Optional[Dict[str, Any]] = None, owner: Optional[str] = None, **kwargs: Any) -> Job:
+        """
+        提交后台任务
+
+        Args:
+            kind: 任务类型
+            fn: 任务函数，返回值作为任务结果，需接受 report 关键字参数
+            meta: 随任务返回的附加信息（如会议ID）
+            owner: 可以查询该任务的用户标识，None 表示只有管理员可见（导出、重建索引等）
+
+        Returns:
+            任务对象
+        """
+        job = Job(id=uuid.uuid4().hex, kind=kind, meta=dict(meta or {}), owner=owner)
+        with self._cond:
+            self._jobs[job.id] = job
+            self._evict_finished()
+            executor = self._get_executor()
+        logger.info(f"提交后台任务: job_id={job.id}, kind={kind}, meta={job.meta}")
+        self._notify(job)
+        executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> None:
+        with self._cond:
+            job.status = JOB_RUNNING
+            job.started_at = time.time()
+        self._notify(job)
+
+        def report(progress: float, stage: str) -> None:
+            with self._cond:
+                job.progress = min(max(progress, 0.0), 1.0)
+                job.stage = stage
+            self._notify(job)
+
+        try:
+            result = fn(*args, report=report, **kwargs)
+        except Exception as e:
+            logger.error(f"后台任务失败: job_id={job.id}, kind={job.kind}, error={e}")
+            with self._cond:
+                job.status = JOB_FAILED
+                job.error = str(e)
+                job.finished_at = time.time()
+        else:
+            with self._cond:
+                job.status = JOB_SUCCEEDED
+                job.progress = 1.0
+                job.result = result
+                job.finished_at = time.time()
+            logger.info(f"后台任务完成: job_id={job.id}, kind={job.kind}, "
+                        f"duration={job.finished_at - job.started_at:.2f}s")
+        self._notify(job)
+
+    def _evict_finished(self) -> None:
+        """已完成的任务超过保留数量时移除最早的（调用方需持有锁）"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.is_finished()]
+        for job_id in finished[:max(0, len(finished) - self.max_history)]:
+            del self._jobs[job_id]
+
+    def _lookup(self, job_id: str, owner: Optional[str]) -> Optional[Job]:
+        """按ID查找任务，指定 owner 时只返回该用户提交的任务（调用方需持有锁）"""
+        job = self._jobs.get(job_id)
+        if job is None or (owner is not None and job.owner != owner):
+            return None
+        return job
+
+    def get(self, job_id: str, owner: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """按ID查询任务（owner 为 None 时不限提交者）"""
+        with self._cond:
+            job = self._lookup(job_id, owner)
+            return job.to_dict() if job is not None else None
+
+    def find(self, kind: str, **meta: Any) -> Optional[Dict[str, Any]]:
+        """查找最近提交的、类型和附加信息都匹配的任务"""
+        with self._cond:
+            for job in reversed(self._jobs.values()):
+                if job.kind == kind and all(job.meta.get(key) == value for key, value in meta.items()):
+                    return job.to_dict()
+        return None
+
+    def list_jobs(self, kind: Optional[str] = None, limit: int = 50,
+                  owner: Optional[str] = None) -> List[Dict[str, Any]]:
+        """最近的任务（新的在前，owner 为 None 时不限提交者）"""
+        with self._cond:
+            jobs = [job for job in reversed(self._jobs.values())
+                    if (kind is None or job.kind == kind) and (owner is None or job.owner == owner)]
+            return [job.to_dict() for job in jobs[:limit]]
+
+    def wait(self, job_id: str, timeout: Optional[float] = None,
+             owner: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """等待任务完成，返回任务字典（任务不存在或不属于 owner 时返回None，超时返回当前状态）"""
+        with self._cond:
+            job = self._lookup(job_id, owner)
+            if job is None:
+                return None
+            self._cond.wait_for(job.is_finished, timeout=timeout)
+            return job.to_dict()
+
+    def stats(self) -> Dict[str, Any]:
+        """任务统计"""
+        with self._cond:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {'workers': self.workers, 'jobs': counts}
+
+    def shutdown(self) -> None:
+        """等待进行中的任务完成并关闭线程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+# 全局后台任务执行器
+job_runner = JobRunner(workers=config.jobs.workers, max_history=config.jobs.max_history)
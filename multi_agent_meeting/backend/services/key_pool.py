@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API密钥池模块
+智能体创建时从池中分配当前分配数最少的密钥（不再按智能体序号一一对应），
+智能体清空时归还；可选地按密钥限制同时进行的模型调用数量
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence
+
+from config import config
+from logging_config import get_logger
+from services.usage_service import key_fingerprint
+
+logger = get_logger(__name__)
+
+
+class ApiKeyPool:
+    """在所有会议的智能体之间共享的API密钥池"""
+
+    def __init__(self, keys: Sequence[str], max_in_flight: int = 0):
+        """
+        Args:
+            keys: API密钥（重复的密钥只保留一个）
+            max_in_flight: 每个密钥同时进行的模型调用上限（0表示不限制）
+        """
+        self._keys: List[str] = list(dict.fromkeys(keys))
+        self._assigned: Dict[str, int] = {key: 0 for key in self._keys}
+        self._lock = threading.Lock()
+        self.max_in_flight = max_in_flight
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {
+            key: threading.BoundedSemaphore(max_in_flight) for key in self._keys
+        } if max_in_flight > 0 else {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def assign(self) -> str:
+        """分配当前分配数最少的密钥（相同时取靠前的）"""
+        with self._lock:
+            if not self._keys:
+                raise RuntimeError("API密钥池为空")
+            key = min(self._keys, key=self._assigned.__getitem__)
+            self._assigned[key] += 1
+        return key
+
+    def release(self, key: str) -> None:
+        """归还密钥（不属于密钥池或未分配的密钥忽略）"""
+        with self._lock:
+            if self._assigned.get(key, 0) > 0:
+                self._assigned[key] -= 1
+
+    @contextmanager
+    def limit(self, key: str) -> Iterator[None]:
+        """占用该密钥的一个调用名额（未限制或不属于密钥池的密钥直接通过）"""
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            yield
+            return
+        semaphore.acquire()
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """各密钥的分配数（按密钥指纹，不暴露密钥本身）"""
+        with self._lock:
+            return {key_fingerprint(key): {'assigned': count} for key, count in self._assigned.items()}
+
+
+# 全局密钥池
+key_pool = ApiKeyPool(config.api_keys, config.api_key_max_in_flight)
@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+私域知识检索服务模块
+将知识文档（markdown/文本）按标题和段落切分为片段，建立 BM25 倒排索引和特征哈希向量索引。
+索引保存为 .npy 文件并以内存映射方式加载，文档变化时只重新切分和向量化变化的文件。
+检索在进程内完成（倒排表查找加一次矩阵-向量乘法），不调用模型。
+
+索引目录结构：
+    current.json            # 当前索引版本（原子替换）
+    gen-000001/
+        manifest.json       # 文件签名（mtime、大小）及其片段范围
+        chunks.json         # 片段（来源、标题路径、正文）
+        vectors.npy         # 片段向量 (片段数, 维度)
+        doc_len.npy         # 片段词元数
+        terms.npy / postings_chunk.npy / postings_tf.npy  # 按词元哈希排序的倒排表
+"""
+
+import os
+import re
+import json
+import math
+import time
+import shutil
+import threading
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Any, Tuple
+
+from config import config
+from logging_config import get_logger
+from text_vectors import HashingVectorizer, hash_token, require_numpy, tokenize, top_k
+from utils import atomic_write_json
+from async_runtime import run_blocking
+
+logger = get_logger(__name__)
+
+# 建立索引的文件类型
+KNOWLEDGE_EXTENSIONS = ('.md', '.markdown', '.txt')
+
+# 索引格式版本（格式或切分参数变化时重建）
+INDEX_VERSION = 1
+CURRENT_FILENAME = 'current.json'
+GENERATION_PREFIX = 'gen-'
+
+# BM25 参数
+BM25_K1 = 1.5
+BM25_B = 0.75
+# 混合得分中 BM25（按最高分归一化）的权重，其余为向量相似度
+BM25_WEIGHT = 0.5
+
+# 重建索引后台任务类型
+JOB_KNOWLEDGE_REINDEX = 'knowledge_reindex'
+
+HEADING_PATTERN = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+PARAGRAPH_SEPARATOR = re.compile(r'\n\s*\n')
+
+# 片段向量化器（与索引文件中的向量维度一致）
+_vectorizer = HashingVectorizer()
+
+
+@dataclass
+class KnowledgeChunk:
+    """知识片段"""
+    source: str  # 来源文件（知识目录名/相对路径）
+    heading: str  # 标题路径，如"开发专家 > 核心工作流程"
+    text: str
+
+    def label(self) -> str:
+        """引用标注（来源文件和所在的最后一级标题）"""
+        return f"{self.source} > {self.heading.split(' > ')[-1]}" if self.heading else self.source
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """按 markdown 标题切分为 (标题路径, 正文)，代码块中的 # 不视为标题"""
+    sections: List[Tuple[str, str]] = []
+    headings: List[Tuple[int, str]] = []  # (级别, 标题)
+    lines: List[str] = []
+    in_code = False
+
+    def flush() -> None:
+        body = '\n'.join(lines).strip()
+        if body:
+            sections.append((' > '.join(title for _, title in headings), body))
+        lines.clear()
+
+    for line in text.splitlines():
+        if line.lstrip().startswith('```'):
+            in_code = not in_code
+        match = None if in_code else HEADING_PATTERN.match(line)
+        if match:
+            flush()
+            level = len(match.group(1))
+            while headings and headings[-1][0] >= level:
+                headings.pop()
+            headings.append((level, match.group(2)))
+            continue
+        lines.append(line)
+    flush()
+    return sections
+
+
+def split_body(body: str, chunk_chars: int, overlap: int) -> List[str]:
+    """按段落合并为不超过 chunk_chars 字的片段，过长的段落按 overlap 重叠切分"""
+    chunks: List[str] = []
+    current = ''
+    for paragraph in PARAGRAPH_SEPARATOR.split(body):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) > chunk_chars:
+            if current:
+                chunks.append(current)
+                current = ''
+            step = chunk_chars - overlap
+            chunks.extend(paragraph[start:start + chunk_chars]
+                          for start in range(0, len(paragraph) - overlap, step))
+        elif len(current) + len(paragraph) + 1 > chunk_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_document(source: str, text: str, chunk_chars: int, overlap: int) -> List[KnowledgeChunk]:
+    """切分一个知识文档"""
+    return [
+        KnowledgeChunk(source, heading, body_chunk)
+        for heading, body in split_sections(text)
+        for body_chunk in split_body(body, chunk_chars, overlap)
+    ]
+
+
+def load_document(source: str, path: str, chunk_chars: int, overlap: int) -> List[KnowledgeChunk]:
+    """读取并切分一个知识文档"""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return chunk_document(source, f.read(), chunk_chars, overlap)
+
+
+def encode_chunks(rows: List[int], chunks: List[KnowledgeChunk], vectors: Any,
+                  doc_len: Any) -> Tuple[List[Any], List[Any], List[Any]]:
+    """
+    向量化片段并统计词频
+
+    向量和文档长度写入 vectors、doc_len 的对应行，返回各片段的倒排表行 (词元哈希, 片段行号, 词频)。
+    """
+    np = require_numpy()
+    term_parts, chunk_parts, tf_parts = [], [], []
+    for row, chunk in zip(rows, chunks):
+        text = f"{chunk.heading} {chunk.text}"
+        _vectorizer.transform_one(text, out=vectors[row])
+        counts = term_counts(text)
+        doc_len[row] = sum(counts.values())
+        term_parts.append(np.fromiter(counts.keys(), dtype=np.uint32, count=len(counts)))
+        chunk_parts.append(np.full(len(counts), row, dtype=np.int64))
+        tf_parts.append(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+    return term_parts, chunk_parts, tf_parts
+
+
+def term_counts(text: str) -> Dict[int, int]:
+    """词元哈希 -> 出现次数"""
+    counts: Dict[int, int] = {}
+    for token in tokenize(text):
+        h = hash_token(token)
+        counts[h] = counts.get(h, 0) + 1
+    return counts
+
+
+def scan_sources(source_dirs: List[str]) -> Dict[str, Dict[str, Any]]:
+    """知识文档 -> {path, mtime_ns, size}，键为 知识目录名/相对路径"""
+    files: Dict[str, Dict[str, Any]] = {}
+    for source_dir in source_dirs:
+        if not os.path.isdir(source_dir):
+            logger.warning(f"知识目录不存在: {source_dir}")
+            continue
+        prefix = os.path.basename(os.path.normpath(source_dir))
+        for root, _, names in os.walk(source_dir):
+            for name in names:
+                if not name.lower().endswith(KNOWLEDGE_EXTENSIONS):
+                    continue
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                relative = os.path.relpath(path, source_dir).replace(os.sep, '/')
+                files[f"{prefix}/{relative}"] = {'path': path, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+    return files
+
+
+class _Snapshot:
+    """一个索引版本的只读视图（数组为内存映射）"""
+
+    def __init__(self, generation_dir: str):
+        np = require_numpy()
+        self.generation_dir = generation_dir
+        with open(os.path.join(generation_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+            self.manifest: Dict[str, Any] = json.load(f)
+        with open(os.path.join(generation_dir, 'chunks.json'), 'r', encoding='utf-8') as f:
+            self.chunks = [KnowledgeChunk(**chunk) for chunk in json.load(f)]
+
+        def load(name: str) -> Any:
+            return np.load(os.path.join(generation_dir, f"{name}.npy"), mmap_mode='r')
+
+        self.vectors = load('vectors')
+        self.doc_len = load('doc_len')
+        self.terms = load('terms')
+        self.postings_chunk = load('postings_chunk')
+        self.postings_tf = load('postings_tf')
+        self.avg_doc_len = float(self.doc_len.mean()) if len(self.doc_len) else 0.0
+
+
+class KnowledgeIndex:
+    """私域知识索引"""
+
+    def __init__(self, source_dirs: Optional[List[str]] = None, index_dir: Optional[str] = None):
+        self.source_dirs = source_dirs if source_dirs is not None else config.knowledge.source_dirs
+        self.index_dir = index_dir or config.knowledge.index_dir
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+        self._queries = 0
+        self._query_seconds = 0.0
+
+    def _params(self) -> Dict[str, Any]:
+        """影响索引内容的参数（变化时全部重新切分）"""
+        return {
+            'version': INDEX_VERSION,
+            'dim': _vectorizer.dim,
+            'chunk_chars': config.knowledge.chunk_chars,
+            'chunk_overlap': config.knowledge.chunk_overlap
+        }
+
+    def _load_current(self) -> Optional[_Snapshot]:
+        """加载当前索引版本（不存在或损坏时返回None）"""
+        current_path = os.path.join(self.index_dir, CURRENT_FILENAME)
+        try:
+            with open(current_path, 'r', encoding='utf-8') as f:
+                generation = json.load(f)['generation']
+            return _Snapshot(os.path.join(self.index_dir, generation))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"加载知识索引失败，将重新建立: error={e}")
+            return None
+
+    def snapshot(self) -> _Snapshot:
+        """当前索引（第一次使用时加载，没有索引时建立）"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            self.refresh()
+            snapshot = self._snapshot
+        return snapshot
+
+    def refresh(self, force: bool = False) -> Dict[str, Any]:
+        """
+        按文件签名增量更新索引
+
+        未变化的文件复用原有片段、向量和倒排表行，只切分和向量化新增或修改的文件。
+
+        Args:
+            force: 忽略已有索引，全部重新切分
+
+        Returns:
+            更新结果（是否变化、文件数、片段数、重新处理的文件）
+        """
+        np = require_numpy()
+        with self._lock:
+            started = time.perf_counter()
+            if self._snapshot is None and not force:
+                self._snapshot = self._load_current()
+            old = None if force else self._snapshot
+            files = scan_sources(self.source_dirs)
+            params = self._params()
+
+            if old is not None and old.manifest.get('params') != params:
+                logger.info("知识索引参数变化，重新建立索引")
+                old = None
+            old_files: Dict[str, Any] = old.manifest['files'] if old is not None else {}
+            signature = lambda info: (info['mtime_ns'], info['size'])
+            if old is not None and set(old_files) == set(files) and all(
+                    signature(old_files[name]) == signature(info) for name, info in files.items()):
+                return {'changed': False, 'files': len(files), 'chunks': len(old.chunks), 'reindexed': []}
+
+            chunks: List[KnowledgeChunk] = []
+            manifest_files: Dict[str, Dict[str, Any]] = {}
+            # 复用的旧片段：旧片段行号 -> 新片段行号（-1表示丢弃）
+            remap = np.full(len(old.chunks) if old is not None else 0, -1, dtype=np.int64)
+            reused_rows: List[int] = []
+            new_chunks: List[KnowledgeChunk] = []
+            new_rows: List[int] = []
+            reindexed: List[str] = []
+
+            for name in sorted(files):
+                info = files[name]
+                previous = old_files.get(name)
+                start = len(chunks)
+                if previous is not None and signature(previous) == signature(info):
+                    old_rows = range(previous['start'], previous['start'] + previous['count'])
+                    remap[old_rows.start:old_rows.stop] = np.arange(start, start + len(old_rows))
+                    reused_rows.extend(old_rows)
+                    chunks.extend(old.chunks[row] for row in old_rows)
+                else:
+                    document = run_blocking(load_document, name, info['path'],
+                                            params['chunk_chars'], params['chunk_overlap'])
+                    new_rows.extend(range(start, start + len(document)))
+                    new_chunks.extend(document)
+                    chunks.extend(document)
+                    reindexed.append(name)
+                manifest_files[name] = {'mtime_ns': info['mtime_ns'], 'size': info['size'],
+                                        'start': start, 'count': len(chunks) - start}
+
+            # 向量：复用行直接拷贝，新片段重新向量化
+            vectors = np.zeros((len(chunks), _vectorizer.dim), dtype=np.float32)
+            doc_len = np.zeros(len(chunks), dtype=np.float32)
+            if reused_rows:
+                vectors[remap[reused_rows]] = old.vectors[reused_rows]
+                doc_len[remap[reused_rows]] = old.doc_len[reused_rows]
+
+            # 倒排表：保留复用片段的行并改写片段行号，追加新片段的行
+            term_parts, chunk_parts, tf_parts = [], [], []
+            if old is not None and len(old.terms):
+                mapped = remap[old.postings_chunk]
+                keep = mapped >= 0
+                term_parts.append(np.asarray(old.terms)[keep])
+                chunk_parts.append(mapped[keep])
+                tf_parts.append(np.asarray(old.postings_tf)[keep])
+            # 向量化在协程模式下放到原生线程中，不阻塞事件循环
+            new_terms, new_chunk_rows, new_tfs = run_blocking(encode_chunks, new_rows, new_chunks, vectors, doc_len)
+            term_parts.extend(new_terms)
+            chunk_parts.extend(new_chunk_rows)
+            tf_parts.extend(new_tfs)
+
+            terms = np.concatenate(term_parts) if term_parts else np.zeros(0, dtype=np.uint32)
+            postings_chunk = np.concatenate(chunk_parts) if chunk_parts else np.zeros(0, dtype=np.int64)
+            postings_tf = np.concatenate(tf_parts) if tf_parts else np.zeros(0, dtype=np.float32)
+            order = np.lexsort((postings_chunk, terms))
+
+            generation = self._write_generation(params, manifest_files, chunks, {
+                'vectors': vectors,
+                'doc_len': doc_len,
+                'terms': terms[order],
+                'postings_chunk': postings_chunk[order].astype(np.int32),
+                'postings_tf': postings_tf[order]
+            })
+            self._snapshot = _Snapshot(generation)
+            self._remove_old_generations(keep=generation)
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            logger.info(f"知识索引已更新: files={len(files)}, chunks={len(chunks)}, "
+                        f"reindexed={len(reindexed)}, elapsed={elapsed_ms:.1f}ms")
+            return {'changed': True, 'files': len(files), 'chunks': len(chunks), 'reindexed': reindexed,
+                    'elapsed_ms': round(elapsed_ms, 1)}
+
+    def _write_generation(self, params: Dict[str, Any], files: Dict[str, Any],
+                          chunks: List[KnowledgeChunk], arrays: Dict[str, Any]) -> str:
+        """写入新的索引版本并原子切换 current.json（调用方需持有锁）"""
+        np = require_numpy()
+        os.makedirs(self.index_dir, exist_ok=True)
+        numbers = [int(name[len(GENERATION_PREFIX):]) for name in os.listdir(self.index_dir)
+                   if name.startswith(GENERATION_PREFIX) and name[len(GENERATION_PREFIX):].isdigit()]
+        name = f"{GENERATION_PREFIX}{max(numbers, default=0) + 1:06d}"
+        generation_dir = os.path.join(self.index_dir, name)
+        os.makedirs(generation_dir)
+
+        for array_name, array in arrays.items():
+            run_blocking(np.save, os.path.join(generation_dir, f"{array_name}.npy"), array)
+        atomic_write_json(os.path.join(generation_dir, 'chunks.json'), [asdict(chunk) for chunk in chunks])
+        atomic_write_json(os.path.join(generation_dir, 'manifest.json'), {'params': params, 'files': files})
+        atomic_write_json(os.path.join(self.index_dir, CURRENT_FILENAME), {'generation': name})
+        return generation_dir
+
+    def _remove_old_generations(self, keep: str) -> None:
+        """删除旧的索引版本（已映射的文件在Linux上仍可读取到映射释放）"""
+        for name in os.listdir(self.index_dir):
+            path = os.path.join(self.index_dir, name)
+            if name.startswith(GENERATION_PREFIX) and path != keep:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def search(self, query: str, k: int, min_score: float = 0.0) -> List[Tuple[KnowledgeChunk, float]]:
+        """
+        检索最相关的知识片段
+
+        Args:
+            query: 查询文本
+            k: 返回数量
+            min_score: 混合得分（0~1）不高于该值的片段不返回
+
+        Returns:
+            [(片段, 混合得分)]，按得分从高到低
+        """
+        np = require_numpy()
+        started = time.perf_counter()
+        snapshot = self.snapshot()
+        count = len(snapshot.chunks)
+        if not count or k <= 0:
+            return []
+
+        # BM25
+        query_terms = np.unique(np.fromiter((hash_token(token) for token in tokenize(query)), dtype=np.uint32))
+        lows = np.searchsorted(snapshot.terms, query_terms, side='left')
+        highs = np.searchsorted(snapshot.terms, query_terms, side='right')
+        bm25 = np.zeros(count, dtype=np.float32)
+        for low, high in zip(lows, highs):
+            if low == high:
+                continue
+            rows = snapshot.postings_chunk[low:high]
+            tf = snapshot.postings_tf[low:high]
+            df = high - low
+            idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * snapshot.doc_len[rows] / snapshot.avg_doc_len)
+            bm25[rows] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        # 向量相似度
+        similarity = snapshot.vectors @ _vectorizer.transform_one(query)
+        best = float(bm25.max())
+        scores = BM25_WEIGHT * (bm25 / best if best > 0 else bm25) + (1 - BM25_WEIGHT) * similarity
+        hits = top_k(scores, k, min_score)
+
+        self._queries += 1
+        self._query_seconds += time.perf_counter() - started
+        return [(snapshot.chunks[row], score) for row, score in hits]
+
+    def context(self, query: str, k: int, token_budget: int, min_score: float = 0.0) -> str:
+        """
+        按令牌预算组装参考资料文本（按相关度取片段，超出预算的部分截断）
+
+        Returns:
+            "[出处] 正文" 每行一个片段，没有相关片段时为空字符串
+        """
+        char_budget = int(token_budget / config.output.tokens_per_char)
+        lines = []
+        for chunk, _ in self.search(query, k, min_score):
+            label = f"[{chunk.label()}] "
+            remaining = char_budget - len(label)
+            if remaining <= 20:
+                break
+            text = chunk.text.replace('\n', ' ')
+            if len(text) > remaining:
+                text = text[:remaining - 1] + '…'
+            lines.append(label + text)
+            char_budget -= len(lines[-1]) + 1
+        return '\n'.join(lines)
+
+    def rebuild(self) -> Dict[str, Any]:
+        """全部重新建立索引"""
+        return self.refresh(force=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """索引统计"""
+        snapshot = self._snapshot
+        return {
+            'enabled': config.knowledge.enabled,
+            'loaded': snapshot is not None,
+            'files': len(snapshot.manifest['files']) if snapshot is not None else 0,
+            'chunks': len(snapshot.chunks) if snapshot is not None else 0,
+            'queries': self._queries,
+            'avg_query_ms': round(self._query_seconds * 1000 / self._queries, 3) if self._queries else 0.0
+        }
+
+
+def submit_reindex_job(force: bool = False) -> Dict[str, Any]:
+    """在后台任务中更新知识索引（已有进行中的任务时返回该任务）"""
+    from services.job_service import job_runner, JOB_FINISHED_STATES
+
+    existing = job_runner.find(JOB_KNOWLEDGE_REINDEX)
+    if existing is not None and existing['status'] not in JOB_FINISHED_STATES:
+        return existing
+    return job_runner.submit(
+        JOB_KNOWLEDGE_REINDEX,
+        lambda report: knowledge_index.refresh(force=force),
+        meta={'force': force}
+    ).to_dict()
+
+
+# 全局私域知识索引
+knowledge_index = KnowledgeIndex()
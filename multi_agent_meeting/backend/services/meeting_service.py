@@ -5,32 +5,68 @@
 处理会议的生命周期管理
 """
 
+import sys
 import time
+import uuid
+import threading
+from collections import OrderedDict
+from contextlib import nullcontext
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable, Tuple, ContextManager
 
 from utils import (
-    setup_console_encoding, post_process_ceo_content, 
+    post_process_ceo_content, 
     check_ceo_wants_to_end_meeting, remove_next_speaker_references,
     clean_unprofessional_content, format_duration, save_meeting_content
 )
 
-from camel.messages import BaseMessage
-
 from models import (
     MeetingConfig, MeetingState, Message, MeetingSummary, 
-    Agent, SpeakerDecision
+    Agent, SpeakerDecision, TurnState
 )
-from services.agent_service import AgentService
-from config import config
+from services.agent_service import AgentService, make_user_message, get_build_executor
+from services.usage_service import BUDGET_OK, BUDGET_HARD
+from services.cassette_service import Cassette, cassette_from_config
+from services.job_service import job_runner, ProgressReporter, JOB_FAILED
+from services.analytics_service import submit_export_job
+from services.history_service import HistoryIndex
+from services.knowledge_service import knowledge_index
+from services.output_governor import trim_to_sentence
+from services.key_pool import key_pool
+from services.admission_service import admission_controller, AdmissionRejected
+from config import config, ROUTE_CEO_ROUND, ROUTE_CEO_FINAL, ROUTE_AGENT, ROUTE_MEETING_SUMMARY
 from logging_config import get_logger
 from prompts import PromptConfig
 
-# 设置控制台编码
-setup_console_encoding()
-
 logger = get_logger(__name__)
 
+# 每场会议保留的幂等键结果数量
+IDEMPOTENCY_CACHE_SIZE = 256
+
+# 结束会议后台任务类型
+JOB_END_MEETING = 'end_meeting'
+
+# 会议总结最多等待生成名额的时长（ADMISSION_MAX_QUEUE_WAIT 的倍数），超时使用默认总结
+SUMMARY_ADMISSION_WAITS = 3
+
+# 分组讨论使用的共享线程池（各组并行讨论，组内依次发言）
+_breakout_executor: Optional[ThreadPoolExecutor] = None
+_breakout_executor_lock = threading.Lock()
+
+
+def get_breakout_executor() -> ThreadPoolExecutor:
+    """获取共享的分组讨论线程池"""
+    global _breakout_executor
+    if _breakout_executor is None:
+        with _breakout_executor_lock:
+            if _breakout_executor is None:
+                _breakout_executor = ThreadPoolExecutor(
+                    max_workers=config.breakout.max_parallel,
+                    thread_name_prefix='breakout'
+                )
+    return _breakout_executor
+
 
 class MeetingService:
     """会议管理服务类"""
@@ -38,14 +74,40 @@ class MeetingService:
     def __init__(self):
         self.agent_service = AgentService()
         self.state = MeetingState()
+        self.turn_state = TurnState()
         self.logger = logger
+        # 后台并行创建中的智能体
+        self._roster_futures: List[Future] = []
+        # 提前生成的CEO开场白
+        self._opening_future: Optional[Future] = None
+        # 准入配额的用户标识（经Web请求开始的会议），后台生成据此占用生成名额
+        self._admission_key: Optional[str] = None
+        # 指定的录制/回放（为空时按 config.cassette 决定）
+        self.cassette: Optional[Cassette] = None
+        # 发言去重：同一场会议同时只进行一次生成，重复请求共用进行中或已完成的结果
+        self._generation_lock = threading.Lock()
+        self._flight_lock = threading.Lock()
+        self._in_flight: Dict[Any, Future] = {}
+        self._idempotent_results: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        # 最近一次发言请求：(类型, 智能体ID, 完成后的消息数, 成功时的结果)
+        self._last_turn: Optional[Tuple[str, int, int, Optional[Dict[str, Any]]]] = None
+        # 串行化结束会议任务的提交，同一场会议只提交一次
+        self._end_lock = threading.Lock()
+        # 发言向量索引（retrieval 历史模式下第一次构建智能体输入时创建）
+        self.history_index: Optional[HistoryIndex] = None
+        # 分组讨论纪要：该轮第一条消息的下标 -> (该轮结束后的消息数, 纪要)，对话历史中用纪要代替该轮发言
+        self._breakout_digests: Dict[int, Tuple[int, str]] = {}
     
-    def initialize_meeting(self, meeting_config: MeetingConfig) -> bool:
+    def initialize_meeting(self, meeting_config: MeetingConfig, user_id: Optional[str] = None,
+                           admission_key: Optional[str] = None) -> bool:
         """
         初始化会议
         
         Args:
             meeting_config: 会议配置
+            user_id: 发起会议的用户（用于令牌用量统计）
+            admission_key: 准入配额的用户标识（经Web请求开始的会议），设置后开场白预生成、
+                           分组讨论和会议总结等后台生成也占用生成名额；批量运行时为None
         
         Returns:
             是否初始化成功
@@ -66,14 +128,23 @@ class MeetingService:
             self.state.topic = meeting_config.topic
             self.state.background = meeting_config.background
             self.state.start_time = time.time()
-            self.state.meeting_id = f"meeting_{int(time.time())}"
+            # 追加随机后缀，批量并发运行时同一秒内开始的会议不会互相覆盖
+            self.state.meeting_id = f"meeting_{int(time.time())}_{uuid.uuid4().hex[:6]}"
+            self.agent_service.reset_usage(self.state.meeting_id, user_id)
+            self._admission_key = admission_key
+            self._start_cassette(meeting_config)
+            self._refresh_knowledge()
             
-            # 创建智能体
+            # 创建智能体（CEO同步创建，其余智能体在后台并行创建）
             self._create_agents(meeting_config.agents)
+            self._build_speaker_router(meeting_config.agents)
             
             # 激活会议
             self.state.is_active = True
             
+            # CEO就绪后立即开始生成开场白，与其余智能体的创建并行
+            self._prefetch_opening()
+            
             self.logger.info(f"会议初始化成功: meeting_id={self.state.meeting_id}")
             return True
             
@@ -85,34 +156,253 @@ class MeetingService:
         """重置会议状态"""
         self.logger.debug("重置会议状态")
         self.state = MeetingState()
+        self.turn_state = TurnState()
+        self.history_index = None
+        self._breakout_digests = {}
+        self._roster_futures = []
+        self.agent_service.reset_usage()
+        self._opening_future = None
+        self._admission_key = None
         self.agent_service.clear_agents()
+        with self._flight_lock:
+            self._idempotent_results.clear()
+            self._last_turn = None
+    
+    def _build_speaker_router(self, agents_config: List[Dict[str, str]]) -> None:
+        """relevance 模式下按会议配置预先计算各智能体的路由向量（不等待智能体创建完成）"""
+        if config.meeting.speaker_selection != 'relevance':
+            return
+        try:
+            self.agent_service.build_speaker_router([
+                (index, agent_config['role'], agent_config['description'])
+                for index, agent_config in enumerate(agents_config)
+            ])
+        except Exception as e:
+            self.logger.warning(f"预计算发言者路由失败: error={e}")
+    
+    def _refresh_knowledge(self) -> None:
+        """检查知识文档是否变化并增量更新索引（文件未变化时只比较文件签名）"""
+        if not config.knowledge.enabled:
+            return
+        try:
+            knowledge_index.refresh()
+        except Exception as e:
+            self.logger.warning(f"更新私域知识索引失败: error={e}")
+    
+    def _start_cassette(self, meeting_config: MeetingConfig) -> None:
+        """为本场会议启用录制/回放"""
+        cassette = self.cassette if self.cassette is not None else cassette_from_config()
+        if cassette is not None:
+            cassette.start(meeting_config.to_dict())
+            self.logger.info(f"模型调用{'录制' if cassette.recording else '回放'}已启用: meeting_id={self.state.meeting_id}")
+        self.agent_service.cassette = cassette
     
     def _create_agents(self, agents_config: List[Dict[str, str]]) -> None:
-        """创建智能体"""
+        """创建智能体：CEO同步创建，其余智能体提交到线程池并行创建"""
         self.logger.debug(f"创建智能体: count={len(agents_config)}")
         
-        for i, agent_config in enumerate(agents_config):
-            try:
-                agent = self.agent_service.create_agent(
-                    agent_id=i,
-                    role=agent_config['role'],
-                    description=agent_config['description'],
-                    api_key=config.get_api_key(i)
-                )
-                self.agent_service.add_agent(agent)
-                self.logger.debug(f"智能体创建成功: {agent}")
-                
-            except Exception as e:
-                self.logger.error(f"创建智能体失败: index={i}, config={agent_config}, error={e}")
-                raise
+        ceo_id = config.meeting.ceo_agent_id
+        meeting_id = self.state.meeting_id
+        
+        if 0 <= ceo_id < len(agents_config):
+            self._create_and_add_agent(ceo_id, agents_config[ceo_id], meeting_id)
+        
+        executor = get_build_executor()
+        self._roster_futures = [
+            executor.submit(self._create_and_add_agent, i, agent_config, meeting_id)
+            for i, agent_config in enumerate(agents_config)
+            if i != ceo_id
+        ]
+    
+    def _create_and_add_agent(self, index: int, agent_config: Dict[str, str], meeting_id: str) -> None:
+        """创建单个智能体并加入列表（API密钥从密钥池分配）"""
+        api_key = key_pool.assign()
+        try:
+            agent = self.agent_service.create_agent(
+                agent_id=index,
+                role=agent_config['role'],
+                description=agent_config['description'],
+                api_key=api_key
+            )
+        except Exception as e:
+            key_pool.release(api_key)
+            self.logger.error(f"创建智能体失败: index={index}, config={agent_config}, error={e}")
+            raise
+        
+        # 创建期间会议已被重启，丢弃旧会议的智能体
+        if self.state.meeting_id != meeting_id:
+            self.logger.info(f"会议已变更，丢弃智能体: index={index}, meeting_id={meeting_id}")
+            self.agent_service.release_agent_models(agent)
+            key_pool.release(api_key)
+            return
+        
+        self.agent_service.add_agent(agent)
+        self.logger.debug(f"智能体创建成功: {agent}")
+    
+    def _wait_for_roster(self) -> None:
+        """等待后台创建的智能体全部就绪"""
+        futures = self._roster_futures
+        if not futures:
+            return
+        
+        wait(futures)
+        for future in futures:
+            error = future.exception()
+            if error is not None:
+                self.state.is_active = False
+                raise RuntimeError(f"智能体创建失败: {error}")
+    
+    def _prefetch_opening(self) -> None:
+        """在后台生成CEO开场白"""
+        ceo_agent = self.agent_service.get_agent_by_id(config.meeting.ceo_agent_id)
+        if not ceo_agent or not ceo_agent.agent:
+            return
+        
+        input_content = PromptConfig.get_ceo_meeting_start_input(self.state.topic, self.state.background)
+        self._opening_future = get_build_executor().submit(
+            self._generate_opening, ceo_agent, input_content, self._admission_key
+        )
+        self.logger.debug(f"开始预生成CEO开场白: meeting_id={self.state.meeting_id}")
+    
+    def _generate_opening(self, ceo_agent: Agent, input_content: str, admission_key: Optional[str]) -> str:
+        """生成CEO开场白（占用一个生成名额，被拒绝时由 ceo_speak 在请求中重新生成）"""
+        with self._admitted_generation(admission_key):
+            return self.agent_service.generate_response(ceo_agent, make_user_message(input_content), ROUTE_CEO_ROUND)
+    
+    @staticmethod
+    def _admitted_generation(admission_key: Optional[str], per_user: bool = True) -> ContextManager[None]:
+        """
+        后台生成（不在路由的准入检查范围内）占用的生成名额
+        
+        Args:
+            admission_key: 准入配额的用户标识，None 表示不经过准入控制（批量运行等）
+            per_user: 是否计入该用户的并发生成数
+        """
+        if admission_key is None or not config.admission.enabled:
+            return nullcontext()
+        return admission_controller.generation(admission_key if per_user else None)
     
-    def ceo_speak(self) -> Dict[str, Any]:
+    def ceo_speak(self, idempotency_key: Optional[str] = None,
+                  admission_key: Optional[str] = None) -> Dict[str, Any]:
         """
         CEO发言（轮次总结和下一轮安排）
         
+        Args:
+            idempotency_key: 客户端提供的幂等键，重试时返回同一结果
+            admission_key: 准入配额的用户标识，None 表示不经过准入控制（批量运行等）
+        
         Returns:
-            发言结果
+            发言结果（重复请求的结果带 replayed 或 deduplicated 标记）
+        
+        Raises:
+            AdmissionRejected: 需要生成时超出服务容量或用户并发配额
+        """
+        return self._single_flight('ceo', config.meeting.ceo_agent_id, idempotency_key, self._ceo_speak,
+                                   admission_key)
+    
+    def agent_speak(self, agent_id: int, idempotency_key: Optional[str] = None,
+                    admission_key: Optional[str] = None) -> Dict[str, Any]:
         """
+        智能体发言
+        
+        Args:
+            agent_id: 智能体ID
+            idempotency_key: 客户端提供的幂等键，重试时返回同一结果
+            admission_key: 准入配额的用户标识，None 表示不经过准入控制（批量运行等）
+        
+        Returns:
+            发言结果（重复请求的结果带 replayed 或 deduplicated 标记）
+        
+        Raises:
+            AdmissionRejected: 需要生成时超出服务容量或用户并发配额
+        """
+        return self._single_flight('agent', agent_id, idempotency_key, lambda: self._agent_speak(agent_id),
+                                   admission_key)
+    
+    def breakout_round(self, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        分组讨论（大规模会议中代替智能体逐个发言，CEO发言结果带 breakout 标记时调用）
+        
+        Args:
+            idempotency_key: 客户端提供的幂等键，重试时返回同一结果
+        
+        Returns:
+            讨论结果（全部发言和各组纪要，重复请求的结果带 replayed 或 deduplicated 标记）
+        """
+        return self._single_flight('breakout', config.meeting.ceo_agent_id, idempotency_key, self._breakout_round)
+    
+    def _single_flight(self, kind: str, agent_id: int, idempotency_key: Optional[str],
+                       generate: Callable[[], Dict[str, Any]],
+                       admission_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        发言去重
+        
+        以下请求不再生成，直接返回已有结果：
+        - 幂等键相同（同一请求的重试）且已成功完成或正在进行中，结果带 replayed 标记
+        - 同一发言者在同一位置（当前消息数相同）的发言正在进行中，或是最近一次成功的发言请求且此后
+          没有新消息（如前端定时器重复触发的另一个请求），结果带 deduplicated 标记，由首个请求继续推进会议
+        不同位置的发言按到达顺序依次生成。只有实际生成的请求在轮到它时占用生成名额
+        （admission_key），重试、重复请求和排队等待的请求不占名额；名额被拒绝时等待它的重复请求同样收到拒绝。
+        """
+        with self._flight_lock:
+            if idempotency_key and idempotency_key in self._idempotent_results:
+                self.logger.info(f"发言请求重试，返回已完成的结果: kind={kind}, agent_id={agent_id}")
+                return {**self._idempotent_results[idempotency_key], "replayed": True}
+            
+            message_count = len(self.state.messages)
+            turn_key = (kind, agent_id, message_count)
+            future = self._in_flight.get(idempotency_key) if idempotency_key else None
+            marker = "replayed"
+            if future is None:
+                future = self._in_flight.get(turn_key)
+                marker = "deduplicated"
+            
+            if future is None:
+                last_turn = self._last_turn
+                if last_turn is not None and last_turn[3] is not None and \
+                        last_turn[:3] == (kind, agent_id, message_count):
+                    self.logger.info(f"重复的发言请求（发言已完成）: kind={kind}, agent_id={agent_id}")
+                    return {**last_turn[3], "deduplicated": True}
+                
+                future = Future()
+                flight_keys = [turn_key] + ([idempotency_key] if idempotency_key else [])
+                for key in flight_keys:
+                    self._in_flight[key] = future
+                owner = True
+            else:
+                owner = False
+        
+        if not owner:
+            self.logger.info(f"重复的发言请求，等待进行中的发言: kind={kind}, agent_id={agent_id}, {marker}")
+            return {**future.result(), marker: True}
+        
+        result: Dict[str, Any] = {"status": "error", "error": "发言失败"}
+        rejection: Optional[AdmissionRejected] = None
+        try:
+            with self._generation_lock:
+                with self._admitted_generation(admission_key):
+                    result = generate()
+        except AdmissionRejected as e:
+            rejection = e
+            raise
+        finally:
+            with self._flight_lock:
+                for key in flight_keys:
+                    self._in_flight.pop(key, None)
+                succeeded = result.get('status') == 'success'
+                self._last_turn = (kind, agent_id, len(self.state.messages), result if succeeded else None)
+                if succeeded and idempotency_key:
+                    self._idempotent_results[idempotency_key] = result
+                    while len(self._idempotent_results) > IDEMPOTENCY_CACHE_SIZE:
+                        self._idempotent_results.popitem(last=False)
+            if rejection is not None:
+                future.set_exception(rejection)
+            else:
+                future.set_result(result)
+        return result
+    
+    def _ceo_speak(self) -> Dict[str, Any]:
+        """CEO发言（轮次总结和下一轮安排）"""
         self.logger.info("CEO开始发言（轮次总结）")
         
         try:
@@ -130,22 +420,40 @@ class MeetingService:
                 self.logger.info(f"已达到最大轮次限制({config.meeting.max_rounds})，强制结束会议")
                 return self._force_end_meeting_at_max_rounds()
             
+            # 检查是否达到令牌硬预算
+            if self._budget_state() == BUDGET_HARD:
+                self.logger.info(f"已达到令牌硬预算({config.meeting.token_hard_budget})，强制结束会议")
+                return self._force_end_meeting_at_max_rounds(
+                    reason="已达到令牌预算",
+                    end_reason=f"本次会议已用尽令牌预算({config.meeting.token_hard_budget})"
+                )
+            
             # 获取CEO智能体
             ceo_agent = self.agent_service.get_agent_by_id(config.meeting.ceo_agent_id)
             if not ceo_agent or not ceo_agent.agent:
                 return {"status": "error", "error": "CEO智能体初始化失败"}
             
-            # 构建输入内容（轮次总结）
-            input_content = self._build_ceo_round_summary_input()
-            
-            # 创建用户消息
-            user_message = BaseMessage.make_user_message(
-                role_name="用户",
-                content=input_content
-            )
+            opening_future = self._opening_future
+            ceo_content = None
+            if not self.state.messages and opening_future is not None:
+                # 使用初始化会议时预生成的开场白
+                self._opening_future = None
+                try:
+                    ceo_content = opening_future.result()
+                except AdmissionRejected as e:
+                    self.logger.info(f"预生成开场白未获得生成名额，在当前请求中生成: reason={e.reason}")
+            if ceo_content is None:
+                # 构建输入内容（轮次总结）
+                input_content = self._build_ceo_round_summary_input()
+                
+                # 创建用户消息
+                user_message = make_user_message(input_content)
+                
+                # 生成回复
+                ceo_content = self.agent_service.generate_response(ceo_agent, user_message, ROUTE_CEO_ROUND)
             
-            # 生成回复
-            ceo_content = self.agent_service.generate_response(ceo_agent, user_message)
+            # 其余智能体必须就绪后才能安排下一位发言者
+            self._wait_for_roster()
             
             # 后处理内容
             ceo_content = post_process_ceo_content(ceo_content, len(self.state.messages) > 0, False)
@@ -163,10 +471,13 @@ class MeetingService:
                 self.logger.info("CEO决定结束会议")
                 next_speaker_id = config.meeting.ceo_agent_id  # 不再有下一个发言者
             else:
-                # 决定下一个发言者（按顺序）
-                next_speaker_id = self._get_next_speaker_by_order()
+                # 决定下一个发言者
+                next_speaker_id = self._get_next_speaker()
             
-            self.logger.info(f"CEO发言完成: message_id={message.agent_id}, next_speaker_id={next_speaker_id}, meeting_should_end={meeting_should_end}")
+            # 大规模会议中下一步为分组讨论，而不是智能体逐个发言
+            breakout = not meeting_should_end and self._breakout_active()
+            
+            self.logger.info(f"CEO发言完成: message_id={message.agent_id}, next_speaker_id={next_speaker_id}, meeting_should_end={meeting_should_end}, breakout={breakout}")
             
             return {
                 "status": "success",
@@ -174,23 +485,16 @@ class MeetingService:
                 "current_round": self.state.current_round,
                 "next_speaker_id": next_speaker_id,
                 "meeting_should_end": meeting_should_end,
-                "meeting_ended": self.state.is_ended()
+                "meeting_ended": self.state.is_ended(),
+                "breakout": breakout
             }
             
         except Exception as e:
             self.logger.error(f"CEO发言失败: error={e}")
             return {"status": "error", "error": str(e)}
     
-    def agent_speak(self, agent_id: int) -> Dict[str, Any]:
-        """
-        智能体发言
-        
-        Args:
-            agent_id: 智能体ID
-        
-        Returns:
-            发言结果
-        """
+    def _agent_speak(self, agent_id: int) -> Dict[str, Any]:
+        """智能体发言"""
         self.logger.info(f"智能体开始发言: agent_id={agent_id}")
         
         try:
@@ -213,26 +517,35 @@ class MeetingService:
                     "reason": "达到最大轮次限制"
                 }
             
-            # 验证智能体ID
-            if agent_id >= len(self.agent_service.list_agents()) or agent_id == config.meeting.ceo_agent_id:
-                return {"status": "error", "error": "无效的智能体ID"}
+            # 达到令牌硬预算时同样交由CEO做最终总结
+            if self._budget_state() == BUDGET_HARD:
+                self.logger.info(f"已达到令牌硬预算({config.meeting.token_hard_budget})，阻止智能体发言，等待CEO最终总结")
+                return {
+                    "status": "error",
+                    "error": "已达到令牌预算，等待CEO最终总结",
+                    "should_ceo_speak": True,
+                    "reason": "达到令牌预算"
+                }
+            
+            # 等待后台创建的智能体就绪
+            self._wait_for_roster()
             
-            # 获取智能体
+            # 获取并验证智能体
             agent = self.agent_service.get_agent_by_id(agent_id)
-            if not agent or not agent.agent:
+            if agent is None or agent_id == config.meeting.ceo_agent_id:
+                return {"status": "error", "error": "无效的智能体ID"}
+            
+            if not agent.agent:
                 return {"status": "error", "error": f"智能体 {agent.role} 初始化失败"}
             
             # 构建输入内容
             input_content = self._build_agent_input(agent)
             
             # 创建用户消息
-            user_message = BaseMessage.make_user_message(
-                role_name="用户",
-                content=input_content
-            )
+            user_message = make_user_message(input_content)
             
             # 生成回复
-            agent_content = self.agent_service.generate_response(agent, user_message)
+            agent_content = self.agent_service.generate_response(agent, user_message, ROUTE_AGENT)
             
             # 创建消息记录
             message = self._create_message(agent_id, agent.role, agent_content)
@@ -246,8 +559,8 @@ class MeetingService:
                 next_speaker_id = config.meeting.ceo_agent_id
                 self.logger.info(f"轮次完成，下一个发言者：CEO")
             else:
-                # 轮次未完成，按顺序决定下一个智能体
-                next_speaker_id = self._get_next_speaker_by_order()
+                # 轮次未完成，决定本轮下一个智能体
+                next_speaker_id = self._get_next_speaker()
                 self.logger.info(f"轮次未完成，下一个发言者：智能体{next_speaker_id}")
             
             self.logger.info(f"智能体发言完成: agent_id={agent_id}, role='{agent.role}', round_complete={round_complete}, next_speaker_id={next_speaker_id}")
@@ -265,6 +578,162 @@ class MeetingService:
             self.logger.error(f"智能体发言失败: agent_id={agent_id}, error={e}")
             return {"status": "error", "error": str(e)}
     
+    def _breakout_round(self) -> Dict[str, Any]:
+        """分组讨论：各组并行讨论，组内依次发言，整轮分组讨论计为一个轮次"""
+        self.logger.info("开始分组讨论")
+        
+        try:
+            # 检查会议状态
+            if not self._is_meeting_active():
+                return {"status": "error", "error": "会议已结束"}
+            
+            if self.state.is_ending:
+                self.logger.info("会议正在结束，停止分组讨论")
+                return {"status": "error", "error": "会议正在结束"}
+            
+            # 与智能体发言相同，接近最大轮次限制或达到令牌硬预算时交由CEO做最终总结
+            if self.state.current_round >= config.meeting.max_rounds - 1:
+                self.logger.info(f"接近最大轮次限制({config.meeting.max_rounds})，停止分组讨论，等待CEO最终总结")
+                return {
+                    "status": "error",
+                    "error": "已达到最大轮次限制，等待CEO最终总结",
+                    "should_ceo_speak": True,
+                    "reason": "达到最大轮次限制"
+                }
+            
+            if self._budget_state() == BUDGET_HARD:
+                self.logger.info(f"已达到令牌硬预算({config.meeting.token_hard_budget})，停止分组讨论，等待CEO最终总结")
+                return {
+                    "status": "error",
+                    "error": "已达到令牌预算，等待CEO最终总结",
+                    "should_ceo_speak": True,
+                    "reason": "达到令牌预算"
+                }
+            
+            self._wait_for_roster()
+            if not self._breakout_active():
+                return {"status": "error", "error": "当前会议未启用分组讨论"}
+            
+            meeting_id = self.state.meeting_id
+            groups = self._breakout_groups()
+            # 各组共用同一份会议对话历史作为提示词前缀
+            conversation_history = self._get_conversation_history()
+            executor = get_breakout_executor()
+            futures = [
+                executor.submit(self._run_breakout_group, number, members, conversation_history, meeting_id)
+                for number, members in enumerate(groups, 1)
+            ]
+            wait(futures)
+            outcomes = [future.result() for future in futures]
+            
+            if self.state.meeting_id != meeting_id or self.state.is_ending:
+                self.logger.info(f"分组讨论期间会议已结束或重启，丢弃讨论结果: meeting_id={meeting_id}")
+                return {"status": "error", "error": "会议正在结束"}
+            
+            if not any(outcomes):
+                return {"status": "error", "error": "分组讨论失败：所有智能体发言均失败"}
+            
+            # 按组的顺序写入消息（与各组完成的先后无关）
+            start = len(self.state.messages)
+            messages = []
+            group_results = []
+            for number, (members, contents) in enumerate(zip(groups, outcomes), 1):
+                for agent, content in contents:
+                    message = self._create_message(agent.id, agent.role, content)
+                    self._add_message(message, advance_round=False)
+                    messages.append(message.to_dict())
+                group_results.append({
+                    "group": number,
+                    "members": [agent.id for agent in members],
+                    "digest": self._breakout_group_digest(number, members, contents)
+                })
+            self.state.current_round += 1
+            
+            digest = "分组讨论纪要：\n" + '\n'.join(group['digest'] for group in group_results)
+            self._breakout_digests[start] = (len(self.state.messages), digest)
+            
+            self.logger.info(f"分组讨论完成: groups={len(groups)}, messages={len(messages)}, "
+                             f"current_round={self.state.current_round}")
+            
+            return {
+                "status": "success",
+                "messages": messages,
+                "groups": group_results,
+                "current_round": self.state.current_round,
+                "next_speaker_id": config.meeting.ceo_agent_id,
+                "round_complete": True,
+                "meeting_ended": self.state.is_ended()
+            }
+        
+        except AdmissionRejected:
+            # 生成名额不足，由路由返回429，客户端按 Retry-After 重试整轮分组讨论
+            self.logger.warning("分组讨论未获得生成名额，放弃本轮")
+            raise
+        except Exception as e:
+            self.logger.error(f"分组讨论失败: error={e}")
+            return {"status": "error", "error": str(e)}
+    
+    def _breakout_active(self) -> bool:
+        """是否使用分组讨论（已启用且非CEO智能体达到分组阈值）"""
+        return config.breakout.enabled and self.agent_service.non_ceo_count() >= config.breakout.min_agents
+    
+    def _breakout_groups(self) -> List[List[Agent]]:
+        """按ID间隔分组（第i个智能体进入第 i % 组数 组），相邻配置的相近角色分到不同组"""
+        ceo_id = config.meeting.ceo_agent_id
+        members = [agent for agent in self.agent_service.list_agents() if agent.id != ceo_id]
+        group_count = max(1, -(-len(members) // config.breakout.group_size))
+        return [members[i::group_count] for i in range(group_count)]
+    
+    def _run_breakout_group(self, number: int, members: List[Agent], conversation_history: str,
+                            meeting_id: Optional[str]) -> List[Tuple[Agent, str]]:
+        """
+        一个组的讨论：组内成员依次发言，每位成员都能看到本组已有的发言
+        
+        单个成员发言失败时跳过该成员，会议结束或重启时停止。每次发言占用一个生成名额
+        （各组并行，只计入全局同时进行的生成数，不计入用户并发配额），未获得名额时抛出 AdmissionRejected。
+        
+        Returns:
+            [(智能体, 发言内容)]（按发言顺序）
+        """
+        member_roles = '、'.join(agent.role for agent in members)
+        contents: List[Tuple[Agent, str]] = []
+        for agent in members:
+            if self.state.meeting_id != meeting_id or self.state.is_ending:
+                break
+            if not agent.agent:
+                self.logger.warning(f"分组讨论跳过未初始化的智能体: group={number}, agent_id={agent.id}")
+                continue
+            
+            group_history = ''.join(f"{member.role}: {content}\n" for member, content in contents)
+            input_content = PromptConfig.get_breakout_agent_input(
+                self.state.topic, self.state.background, conversation_history,
+                agent.role, agent.description, number, member_roles,
+                "本组已有发言:\n" + group_history if group_history else "", self._get_knowledge(agent)
+            )
+            try:
+                with self._admitted_generation(self._admission_key, per_user=False):
+                    content = self.agent_service.generate_response(agent, make_user_message(input_content), ROUTE_AGENT)
+            except AdmissionRejected:
+                raise
+            except Exception as e:
+                self.logger.warning(f"分组讨论发言失败: group={number}, agent_id={agent.id}, error={e}")
+                continue
+            contents.append((agent, content))
+        
+        self.logger.info(f"分组讨论完成一组: group={number}, members={len(members)}, messages={len(contents)}")
+        return contents
+    
+    @staticmethod
+    def _breakout_group_digest(number: int, members: List[Agent], contents: List[Tuple[Agent, str]]) -> str:
+        """一个组的纪要：每位成员的发言截取到 digest_chars 字以内的句子边界"""
+        lines = [f"第{number}组（{'、'.join(agent.role for agent in members)}）："]
+        lines.extend(
+            f"- {agent.role}: {trim_to_sentence(content, config.breakout.digest_chars)}" for agent, content in contents
+        )
+        if not contents:
+            lines.append("- 本组没有发言")
+        return '\n'.join(lines)
+    
     def _is_meeting_active(self) -> bool:
         """检查会议是否活跃"""
         return self.state.is_active and not self.state.is_ended()
@@ -283,34 +752,120 @@ class MeetingService:
                 self.state.topic, self.state.background, conversation_history, speaker_stats
             )
     
-    def _build_force_end_meeting_input(self) -> str:
+    def _build_force_end_meeting_input(self, end_reason: Optional[str] = None) -> str:
         """构建强制结束会议的输入内容"""
         conversation_history = self._get_conversation_history()
         speaker_stats = self._get_speaker_statistics()
         
         return PromptConfig.get_ceo_force_end_input(
             self.state.topic, self.state.background, conversation_history, 
-            speaker_stats, self.state.current_round, config.meeting.max_rounds
+            speaker_stats, self.state.current_round, config.meeting.max_rounds,
+            end_reason
         )
     
     def _build_agent_input(self, agent: Agent) -> str:
         """构建智能体输入内容"""
-        conversation_history = self._get_conversation_history()
+        if config.meeting.history_mode == 'retrieval':
+            conversation_history = self._get_relevant_history(agent)
+        else:
+            conversation_history = self._get_conversation_history()
         
         return PromptConfig.get_agent_input(
             self.state.topic, self.state.background, conversation_history,
-            agent.role, agent.description
+            agent.role, agent.description, self._get_knowledge(agent)
         )
     
+    def _latest_ceo_content(self) -> str:
+        """CEO最新发言的内容（还没有发言时为空）"""
+        message = self.state.messages.last_from(config.meeting.ceo_agent_id)
+        return message.content if message else ""
+    
+    def _get_knowledge(self, agent: Agent) -> str:
+        """按会议主题、智能体职责和CEO最新发言检索私域知识片段（未启用或不可用时为空）"""
+        if not config.knowledge.enabled or not config.knowledge.top_k:
+            return ""
+        
+        query = f"{self.state.topic} {agent.role} {agent.description} {self._latest_ceo_content()}"
+        try:
+            return knowledge_index.context(
+                query, config.knowledge.top_k, config.knowledge.token_budget, config.knowledge.min_score
+            )
+        except Exception as e:
+            self.logger.warning(f"私域知识检索失败: agent_id={agent.id}, error={e}")
+            return ""
+    
     def _get_conversation_history(self) -> str:
-        """获取对话历史"""
-        if not self.state.messages:
+        """
+        获取对话历史
+        
+        历史窗口按半个窗口（max_conversation_history // 2 条）为一块对齐截断：窗口起点只在
+        需要时整块前移，其余调用中历史只在末尾追加，使提示词前缀保持稳定以命中前缀缓存。
+        实际包含的条目数不超过窗口大小，至少为窗口大小减去一块再加一。
+        每轮分组讨论的全部发言替换为该轮的纪要，在窗口中计为一条。
+        """
+        messages = self.state.messages
+        if not messages:
             return "这是会议的开始。"
         
-        history = "会议对话历史：\n"
-        for msg_dict in self.state.messages[-config.meeting.max_conversation_history:]:
-            history += f"{msg_dict['role']}: {msg_dict['content']}\n"
-        return history
+        window = max(1, config.meeting.max_conversation_history)
+        if self._budget_state() != BUDGET_OK:
+            # 接近令牌预算时缩小历史窗口
+            window = max(1, window // 2)
+        digests = self._breakout_digests
+        entries = self._history_entries() if digests else range(len(messages))
+        # 起点取不早于 len-window 的块边界，总条目数不超过窗口大小
+        block = max(1, window // 2)
+        start = -(-max(0, len(entries) - window) // block) * block
+        lines = [
+            digests[i][1] + "\n" if i in digests else f"{messages[i].role}: {messages[i].content}\n"
+            for i in entries[start:]
+        ]
+        return "会议对话历史：\n" + ''.join(lines)
+    
+    def _history_entries(self) -> List[int]:
+        """对话历史中各条目的起始消息下标（一轮分组讨论合并为一条）"""
+        entries = []
+        index, count = 0, len(self.state.messages)
+        while index < count:
+            entries.append(index)
+            digest = self._breakout_digests.get(index)
+            index = digest[0] if digest is not None else index + 1
+        return entries
+    
+    def _get_relevant_history(self, agent: Agent) -> str:
+        """
+        获取与智能体相关的对话历史
+        
+        按智能体的角色、职责和CEO最新发言检索 history_top_k 条相关的较早发言，
+        再加上最近 history_recent_turns 条发言（按发言顺序）。numpy 不可用时退回固定窗口。
+        """
+        messages = self.state.messages
+        if not messages:
+            return "这是会议的开始。"
+        
+        top_k = config.meeting.history_top_k
+        recent_turns = max(1, config.meeting.history_recent_turns)
+        if self._budget_state() != BUDGET_OK:
+            # 接近令牌预算时减少检索的发言数
+            top_k //= 2
+        
+        query = f"{agent.role} {agent.description} {self._latest_ceo_content()}"
+        
+        try:
+            if self.history_index is None:
+                self.history_index = HistoryIndex()
+            selected = self.history_index.select(messages, query, top_k, recent_turns)
+        except RuntimeError as e:
+            self.logger.warning(f"对话历史检索不可用，使用固定窗口: error={e}")
+            return self._get_conversation_history()
+        
+        recent_start = len(messages) - min(recent_turns, len(messages))
+        earlier = [f"{messages[i].role}: {messages[i].content}\n" for i in selected if i < recent_start]
+        recent = [f"{messages[i].role}: {messages[i].content}\n" for i in selected if i >= recent_start]
+        if not earlier:
+            return "会议对话历史：\n" + ''.join(recent)
+        return ("与你的职责相关的较早发言：\n" + ''.join(earlier) +
+                "最近的发言：\n" + ''.join(recent))
     
     def _get_speaker_statistics(self) -> str:
         """获取发言统计信息"""
@@ -326,74 +881,49 @@ class MeetingService:
         
         return stats
     
-    def _get_next_speaker_by_order(self) -> int:
-        """按顺序决定下一个发言者"""
-        agents = self.agent_service.list_agents()
-        if not agents:
-            return 1  # 默认返回第一个非CEO智能体
+    def _get_next_speaker(self) -> int:
+        """决定下一个发言者：relevance 模式下在本轮未发言的智能体中按相关度选择，否则按顺序"""
+        if config.meeting.speaker_selection != 'relevance':
+            return self._get_next_speaker_by_order()
         
-        non_ceo_agents = [agent for agent in agents if agent.id != config.meeting.ceo_agent_id]
-        if not non_ceo_agents:
-            return 1
-        
-        # 获取当前轮次中已发言的非CEO智能体
-        current_round_messages = [msg for msg in self.state.messages if msg.get('round_number', 0) == self.state.current_round]
-        current_round_non_ceo_speakers = [msg.get('agent_id', -1) for msg in current_round_messages if msg.get('agent_id', -1) != config.meeting.ceo_agent_id]
-        
-        # 如果当前轮次还没有非CEO智能体发言，返回第一个
-        if not current_round_non_ceo_speakers:
-            return 1
-        
-        # 找到最后一个发言的非CEO智能体
-        last_speaker_id = current_round_non_ceo_speakers[-1]
-        
-        # 找到下一个智能体
-        for i, agent in enumerate(non_ceo_agents):
-            if agent.id == last_speaker_id:
-                # 返回下一个智能体，如果到了最后一个就返回第一个
-                next_index = (i + 1) % len(non_ceo_agents)
-                return non_ceo_agents[next_index].id
-        
-        return 1  # 默认返回第一个
+        decision = self.agent_service.decide_next_speaker(
+            self._latest_ceo_content(), self.agent_service.list_agents(),
+            self.state.speaker_counts, exclude=self.turn_state.spoken_this_round
+        )
+        return decision.agent_id
     
-    def _is_round_complete(self) -> bool:
-        """检查当前轮次是否完成（所有非CEO智能体都已发言）"""
-        agents = self.agent_service.list_agents()
-        non_ceo_agents = [agent for agent in agents if agent.id != config.meeting.ceo_agent_id]
-        if not non_ceo_agents:
-            return True
-        
-        # 获取最近的消息，检查是否所有非CEO智能体都已发言
-        # 从最新的消息开始，找到CEO发言的位置，然后检查CEO发言后所有非CEO智能体是否都已发言
-        recent_messages = self.state.messages[-10:] if len(self.state.messages) > 10 else self.state.messages
-        
-        # 找到最近的CEO发言位置
-        last_ceo_index = -1
-        for i, msg in enumerate(reversed(recent_messages)):
-            if msg.get('agent_id', -1) == config.meeting.ceo_agent_id:  # CEO发言
-                last_ceo_index = len(recent_messages) - 1 - i
-                break
+    def _get_next_speaker_by_order(self) -> int:
+        """按顺序决定下一个发言者（基于增量维护的轮转状态，O(1)）"""
+        last_speaker_id = self.turn_state.last_speaker_id
         
-        if last_ceo_index == -1:
-            # 如果没有找到CEO发言，检查所有消息
-            messages_to_check = recent_messages
+        if last_speaker_id is None or last_speaker_id == config.meeting.ceo_agent_id:
+            # CEO刚发言或会议刚开始，从第一个非CEO智能体开始
+            next_speaker_id = self.agent_service.first_in_rotation()
         else:
-            # 从CEO发言后的消息开始检查
-            messages_to_check = recent_messages[last_ceo_index + 1:]
-        
-        # 获取这些消息中的非CEO智能体
-        non_ceo_speakers = set(msg.get('agent_id', -1) for msg in messages_to_check if msg.get('agent_id', -1) != config.meeting.ceo_agent_id)
-        
-        # 检查是否所有非CEO智能体都已发言
-        for agent in non_ceo_agents:
-            if agent.id not in non_ceo_speakers:
-                return False
+            # 返回上一位之后的智能体，如果到了最后一个就返回第一个
+            next_speaker_id = self.agent_service.next_in_rotation(last_speaker_id)
         
-        return True
+        return next_speaker_id if next_speaker_id is not None else 1  # 默认返回第一个非CEO智能体
+    
+    def _is_round_complete(self) -> bool:
+        """检查当前轮次是否完成（CEO上次发言后所有非CEO智能体都已发言）"""
+        # 本轮已发言集合只会包含经过校验的非CEO智能体ID，比较数量即可
+        return len(self.turn_state.spoken_this_round) >= self.agent_service.non_ceo_count()
+    
+    def _budget_state(self) -> str:
+        """当前会议的令牌预算状态"""
+        return self.agent_service.usage.budget_state()
     
-    def _force_end_meeting_at_max_rounds(self) -> Dict[str, Any]:
-        """在达到最大轮次限制时强制结束会议"""
-        self.logger.info("强制结束会议：已达到最大轮次限制")
+    def _force_end_meeting_at_max_rounds(self, reason: str = "已达到最大轮次限制",
+                                         end_reason: Optional[str] = None) -> Dict[str, Any]:
+        """
+        在达到最大轮次限制（或令牌硬预算）时强制结束会议
+        
+        Args:
+            reason: 返回给前端的结束原因
+            end_reason: 写入CEO提示词的结束原因，默认为最大轮次限制
+        """
+        self.logger.info(f"强制结束会议：{reason}")
         
         try:
             # 获取CEO智能体
@@ -402,16 +932,13 @@ class MeetingService:
                 return {"status": "error", "error": "CEO智能体初始化失败"}
             
             # 构建强制结束会议的输入内容
-            input_content = self._build_force_end_meeting_input()
+            input_content = self._build_force_end_meeting_input(end_reason)
             
             # 创建用户消息
-            user_message = BaseMessage.make_user_message(
-                role_name="用户",
-                content=input_content
-            )
+            user_message = make_user_message(input_content)
             
             # 生成CEO的最终总结发言
-            ceo_content = self.agent_service.generate_response(ceo_agent, user_message)
+            ceo_content = self.agent_service.generate_response(ceo_agent, user_message, ROUTE_CEO_FINAL)
             
             # 后处理内容
             ceo_content = post_process_ceo_content(ceo_content, True, True)
@@ -433,7 +960,7 @@ class MeetingService:
                 "meeting_should_end": True,
                 "meeting_ended": True,
                 "forced_end": True,
-                "reason": "已达到最大轮次限制"
+                "reason": reason
             }
             
         except Exception as e:
@@ -445,16 +972,18 @@ class MeetingService:
         """创建消息记录"""
         return Message(
             agent_id=agent_id,
-            role=role,
+            role=sys.intern(role),
             content=content,
             timestamp=time.time(),
             round_number=self.state.current_round + 1
         )
     
-    def _add_message(self, message: Message) -> None:
-        """添加消息到状态"""
-        self.state.messages.append(message.to_dict())
-        self.state.current_round += 1
+    def _add_message(self, message: Message, advance_round: bool = True) -> None:
+        """添加消息到状态（分组讨论中的发言不单独计入轮次，由整轮分组讨论计一次）"""
+        self.state.messages.append(message)
+        if advance_round:
+            self.state.current_round += 1
+        self.turn_state.record(message.agent_id, config.meeting.ceo_agent_id)
         
         # 更新发言统计
         if message.agent_id not in self.state.speaker_counts:
@@ -464,44 +993,111 @@ class MeetingService:
         self.logger.debug(f"添加消息: {message}, 发言统计: {self.state.speaker_counts}")
     
     def end_meeting(self) -> Dict[str, Any]:
-        """结束会议并生成总结"""
+        """结束会议并生成总结（在当前线程中完成，供批量运行和基准测试使用）"""
         self.logger.info("开始结束会议")
         
         try:
             if not self.state.is_active:
                 return {"status": "error", "error": "会议未开始"}
             
-            # 立即设置会议结束标志，停止智能体发言
-            self.state.is_ending = True
-            self.logger.info("会议结束标志已设置，智能体发言已停止")
-            
-            # 设置结束时间
-            self.state.end_time = time.time()
-            
-            # 生成会议总结
-            summary = self._generate_meeting_summary()
-            
-            # 停用会议
-            self.state.is_active = False
-            
-            # 保存会议内容到后台
-            self._save_meeting_to_backend(summary)
-            
-            self.logger.info(f"会议结束: meeting_id={self.state.meeting_id}, duration={summary.get_formatted_duration()}")
-            
-            return {
-                "status": "success",
-                "summary": summary.to_dict(),
-                "total_messages": len(self.state.messages),
-                "total_rounds": self.state.current_round
-            }
+            return self._finish_meeting(self._begin_end())
             
         except Exception as e:
             self.logger.error(f"结束会议失败: error={e}")
             return {"status": "error", "error": str(e)}
     
-    def _generate_meeting_summary(self) -> MeetingSummary:
-        """生成会议总结"""
+    def end_meeting_async(self) -> Dict[str, Any]:
+        """
+        结束会议，总结生成和保存在后台任务中完成
+        
+        立即返回任务ID，进度和总结通过任务状态推送。同一场会议重复请求时返回已提交的任务。
+        """
+        self.logger.info("开始结束会议（后台任务）")
+        
+        with self._end_lock:
+            meeting_id = self.state.meeting_id
+            existing = job_runner.find(JOB_END_MEETING, meeting_id=meeting_id) if meeting_id else None
+            if existing is not None and existing['status'] != JOB_FAILED:
+                self.logger.info(f"结束会议任务已存在: meeting_id={meeting_id}, job_id={existing['job_id']}")
+                return {"status": "success", "job_id": existing['job_id'], "job": existing}
+            
+            if not self.state.is_active:
+                return {"status": "error", "error": "会议未开始"}
+            
+            self._begin_end()
+            # 总结生成在后台任务中占用生成名额，按提交时的会议用户计入配额；任务只对该用户可见
+            job = job_runner.submit(JOB_END_MEETING, self._finish_meeting, meeting_id,
+                                    meta={'meeting_id': meeting_id}, owner=self._admission_key,
+                                    admission_key=self._admission_key)
+        
+        return {"status": "success", "job_id": job.id, "job": job.to_dict()}
+    
+    def _begin_end(self) -> Optional[str]:
+        """设置会议结束标志和结束时间，返回会议ID"""
+        # 立即设置会议结束标志，停止智能体发言
+        self.state.is_ending = True
+        self.logger.info("会议结束标志已设置，智能体发言已停止")
+        
+        # 设置结束时间
+        self.state.end_time = time.time()
+        return self.state.meeting_id
+    
+    def _finish_meeting(self, meeting_id: Optional[str],
+                        report: Optional[ProgressReporter] = None,
+                        admission_key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        生成会议总结并保存会议
+        
+        Args:
+            meeting_id: 开始结束时的会议ID，期间会议被重启或开始新会议时放弃
+            report: 进度回调（后台任务中使用）
+            admission_key: 准入配额的用户标识，设置时总结生成占用一个生成名额
+        
+        Returns:
+            结束会议结果（包含总结）
+        """
+        report = report or (lambda progress, stage: None)
+        
+        # 生成会议总结
+        report(0.1, '正在生成会议总结')
+        summary = self._generate_meeting_summary(admission_key, meeting_id)
+        if self.state.meeting_id != meeting_id:
+            raise RuntimeError("会议已被重启，放弃保存")
+        
+        # 停用会议
+        self.state.is_active = False
+        
+        # 保存会议内容到后台
+        report(0.8, '正在保存会议记录')
+        self._save_meeting_to_backend(summary)
+        
+        # 增量导出会议分析文件（在单独的后台任务中进行）
+        if config.analytics.auto_export:
+            try:
+                submit_export_job()
+            except Exception as e:
+                self.logger.warning(f"提交会议分析导出任务失败: error={e}")
+        
+        self.logger.info(f"会议结束: meeting_id={meeting_id}, duration={summary.get_formatted_duration()}")
+        report(1.0, '会议已结束')
+        
+        return {
+            "status": "success",
+            "meeting_id": meeting_id,
+            "summary": summary.to_dict(),
+            "total_messages": len(self.state.messages),
+            "total_rounds": self.state.current_round,
+            "token_usage": self.agent_service.usage.to_dict()
+        }
+    
+    def _generate_meeting_summary(self, admission_key: Optional[str] = None,
+                                  meeting_id: Optional[str] = None) -> MeetingSummary:
+        """
+        生成会议总结
+        
+        admission_key 不为空时等待生成名额后再调用模型，最多等待 SUMMARY_ADMISSION_WAITS 个排队时长；
+        超时或会议已不是 meeting_id（被重启）时不再等待，使用默认总结。
+        """
         self.logger.debug("生成会议总结")
         
         try:
@@ -510,15 +1106,30 @@ class MeetingService:
             conversation_summary = self._get_conversation_history()
             
             if ceo_agent and ceo_agent.agent:
-                summary_request = BaseMessage.make_user_message(
-                    role_name="用户",
-                    content=PromptConfig.get_meeting_summary_input(
+                summary_request = make_user_message(
+                    PromptConfig.get_meeting_summary_input(
                         self.state.topic, self.state.background, self.state.current_round,
                         len(self.state.messages), conversation_summary
                     )
                 )
                 
-                summary_content = self.agent_service.generate_response(ceo_agent, summary_request)
+                deadline = time.monotonic() + config.admission.max_queue_wait * SUMMARY_ADMISSION_WAITS
+                while True:
+                    try:
+                        with self._admitted_generation(admission_key):
+                            summary_content = self.agent_service.generate_response(
+                                ceo_agent, summary_request, ROUTE_MEETING_SUMMARY
+                            )
+                        break
+                    except AdmissionRejected as e:
+                        # 结束会议的请求已被接受，过载时先等待名额，等不到再退回默认总结
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0 or self.state.meeting_id != meeting_id:
+                            self.logger.warning(f"会议总结未获得生成名额，使用默认总结: reason={e.reason}")
+                            summary_content = self._generate_default_summary(conversation_summary)
+                            break
+                        self.logger.info(f"会议总结等待生成名额: reason={e.reason}, retry_after={e.retry_after}")
+                        time.sleep(min(e.retry_after, remaining))
             else:
                 # 使用默认总结
                 summary_content = self._generate_default_summary(conversation_summary)
@@ -581,9 +1192,10 @@ class MeetingService:
 
 """
         
-        for msg_dict in self.state.messages:
-            timestamp = datetime.fromtimestamp(msg_dict['timestamp']).strftime('%H:%M:%S')
-            transcript += f"[{timestamp}] {msg_dict['role']}: {msg_dict['content']}\n\n"
+        transcript += ''.join(
+            f"[{message.get_formatted_time()}] {message.role}: {message.content}\n\n"
+            for message in self.state.messages
+        )
         
         return transcript
     
@@ -629,6 +1241,9 @@ class MeetingService:
             "agents_count": len(self.state.agents) if self.state.agents else 0,
             "messages_count": len(self.state.messages),
             "current_speaker_id": self.state.current_speaker_id,
+            "discussion_round": self.turn_state.discussion_round,
+            "prompt_cache": self.agent_service.get_prompt_cache_stats(),
+            "token_usage": self.agent_service.usage.to_dict(),
             "meeting_id": self.state.meeting_id
         }
     
@@ -648,12 +1263,18 @@ class MeetingService:
                 'start_time': self.state.start_time,
                 'end_time': self.state.end_time,
                 'current_round': self.state.current_round,
-                'messages': self.state.messages,
+                'messages': self.state.messages.to_dicts(),
                 'speaker_counts': self.state.speaker_counts,
                 'participants': [agent.role for agent in self.agent_service.list_agents()],
-                'summary': summary.to_dict()
+                'summary': summary.to_dict(),
+                'token_usage': self.agent_service.usage.to_dict()
             }
             
+            # 录制模式下随会议保存模型调用记录
+            cassette = self.agent_service.cassette
+            if cassette is not None and cassette.recording:
+                meeting_data['cassette'] = cassette.to_dict()
+            
             # 保存会议内容
             saved_path = save_meeting_content(meeting_data, config.meetings_save_dir)
             
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模型路由服务模块
+按调用类型（CEO轮次总结、CEO最终总结、普通智能体发言、会议总结）选择模型端点，
+每个端点有独立的模型实例池（即独立的HTTP连接池），并按路由表顺序提供后备端点。
+模型实例的生成参数包含路由的输出长度策略，因此实例池按 (端点, 路由) 区分
+"""
+
+import os
+import threading
+from typing import Dict, List, Tuple, Any
+
+from config import config, ModelEndpointConfig, DEFAULT_ENDPOINT
+from logging_config import get_logger
+from services.output_governor import output_governor
+
+logger = get_logger(__name__)
+
+
+class ModelRouter:
+    """模型路由器"""
+
+    def __init__(self):
+        # 预热的模型实例池：(端点名称, 路由, API密钥) -> 可复用的模型实例
+        # 模型实例只持有客户端和配置，可在会议间复用
+        self._pool: Dict[Tuple[str, str, str], List[Any]] = {}
+        self._lock = threading.Lock()
+        # 端点调用统计：端点名称 -> {calls, failures}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self.fallbacks = 0
+
+    def endpoints_for(self, route: str) -> List[ModelEndpointConfig]:
+        """路由对应的端点（按尝试顺序）"""
+        names = config.model_routes.get(route) or [DEFAULT_ENDPOINT]
+        return [config.model_endpoints[name] for name in names]
+
+    def primary_endpoint(self, route: str) -> ModelEndpointConfig:
+        """路由的首选端点"""
+        return self.endpoints_for(route)[0]
+
+    @staticmethod
+    def api_key_for(endpoint: ModelEndpointConfig, agent_api_key: str) -> str:
+        """端点使用的API密钥：配置了 api_key_env 时使用该环境变量，否则使用智能体分配的密钥"""
+        if endpoint.api_key_env:
+            return os.getenv(endpoint.api_key_env, '')
+        return agent_api_key
+
+    def requested_tokens(self, endpoint: ModelEndpointConfig, route: str) -> int:
+        """路由在端点上请求的输出令牌上限"""
+        return output_governor.generation_params(route, endpoint).get('max_tokens', endpoint.max_tokens)
+
+    def build_model(self, endpoint: ModelEndpointConfig, route: str, api_key: str) -> Any:
+        """为端点创建新的模型实例（生成参数包含路由的输出长度策略）"""
+        from camel.models import ModelFactory
+        from camel.types import ModelPlatformType
+
+        model_config_dict = {
+            "temperature": endpoint.temperature,
+            "max_tokens": endpoint.max_tokens
+        }
+        model_config_dict.update(endpoint.extra_params)
+        model_config_dict.update(output_governor.generation_params(route, endpoint))
+
+        return ModelFactory.create(
+            model_platform=ModelPlatformType.OPENAI_COMPATIBILITY_MODEL,
+            model_type=endpoint.model_type,
+            url=endpoint.base_url,
+            api_key=api_key,
+            model_config_dict=model_config_dict
+        )
+
+    def acquire_model(self, endpoint: ModelEndpointConfig, route: str, api_key: str) -> Any:
+        """从端点的实例池取出模型实例，池为空时新建"""
+        with self._lock:
+            pooled = self._pool.get((endpoint.name, route, api_key))
+            if pooled:
+                return pooled.pop()
+        return self.build_model(endpoint, route, api_key)
+
+    def release_model(self, endpoint: ModelEndpointConfig, route: str, api_key: str, model: Any) -> None:
+        """将模型实例归还端点的实例池（超过池容量时丢弃）"""
+        if model is None:
+            return
+        with self._lock:
+            pooled = self._pool.setdefault((endpoint.name, route, api_key), [])
+            if len(pooled) < config.meeting.agent_pool_size:
+                pooled.append(model)
+
+    def missing(self, endpoint: ModelEndpointConfig, route: str, api_key: str) -> int:
+        """端点实例池距离预热容量还差的数量"""
+        with self._lock:
+            pooled = self._pool.get((endpoint.name, route, api_key), [])
+            return max(0, config.meeting.agent_pool_size - len(pooled))
+
+    def record(self, endpoint: ModelEndpointConfig, success: bool) -> None:
+        """记录一次端点调用结果"""
+        with self._lock:
+            stats = self._stats.setdefault(endpoint.name, {'calls': 0, 'failures': 0})
+            stats['calls'] += 1
+            if not success:
+                stats['failures'] += 1
+
+    def record_fallback(self, route: str, failed: ModelEndpointConfig, fallback: ModelEndpointConfig,
+                        error: Exception) -> None:
+        """记录一次后备端点切换"""
+        with self._lock:
+            self.fallbacks += 1
+        logger.warning(f"模型端点调用失败，切换到后备端点: route={route}, endpoint={failed.name}, "
+                       f"fallback={fallback.name}, error={error}")
+
+    def stats(self) -> Dict[str, Any]:
+        """路由与端点统计"""
+        with self._lock:
+            pooled: Dict[str, int] = {}
+            for (name, _, _), models in self._pool.items():
+                pooled[name] = pooled.get(name, 0) + len(models)
+            return {
+                'routes': {route: list(names) for route, names in config.model_routes.items()},
+                'endpoints': {
+                    name: {
+                        'model_type': endpoint.model_type,
+                        'pooled_models': pooled.get(name, 0),
+                        **self._stats.get(name, {'calls': 0, 'failures': 0})
+                    }
+                    for name, endpoint in config.model_endpoints.items()
+                },
+                'fallbacks': self.fallbacks
+            }
+
+
+# 全局模型路由器
+model_router = ModelRouter()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输出长度控制模块
+按模型路由从提示词中的字数要求推算输出令牌上限并设置停止序列，超长输出按句子边界截断，
+并按角色统计请求的上限与实际输出长度
+"""
+
+import re
+import math
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple, Optional, Any
+
+from config import (
+    config, ModelEndpointConfig,
+    ROUTE_CEO_ROUND, ROUTE_CEO_FINAL, ROUTE_AGENT, ROUTE_MEETING_SUMMARY
+)
+from prompts import PromptConfig
+
+# 提示词中的字数要求，如"每次发言不超过100个字"、"200字以内"
+CHAR_LIMIT_PATTERN = re.compile(r'(?:不超过|不多于|少于|控制在)\s*(\d+)\s*个?字|(\d+)\s*个?字以内')
+
+# 句子边界（截断后保留边界字符）
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'[。！？!?；;…\n]')
+
+# 由字数推算的输出令牌上限不低于该值，避免过小的上限截断正常回复
+MIN_OUTPUT_TOKENS = 32
+
+# 各路由对应的提示词（系统提示 + 任务模板），用于推算字数限制
+ROUTE_PROMPTS = {
+    ROUTE_CEO_ROUND: (PromptConfig.CEO_SYSTEM_PROMPT, PromptConfig.CEO_ROUND_SUMMARY_TEMPLATE,
+                      PromptConfig.CEO_MEETING_START_TEMPLATE),
+    ROUTE_CEO_FINAL: (PromptConfig.CEO_SYSTEM_PROMPT, PromptConfig.CEO_FORCE_END_TEMPLATE),
+    ROUTE_AGENT: (PromptConfig.AGENT_SYSTEM_PROMPT, PromptConfig.AGENT_INPUT_TEMPLATE),
+    ROUTE_MEETING_SUMMARY: (PromptConfig.CEO_SYSTEM_PROMPT, PromptConfig.MEETING_SUMMARY_TEMPLATE)
+}
+
+
+def parse_char_limit(*texts: str) -> int:
+    """从提示词中提取最严格的字数限制（没有时返回0）"""
+    limits = [
+        int(match.group(1) or match.group(2))
+        for text in texts for match in CHAR_LIMIT_PATTERN.finditer(text)
+    ]
+    return min(limits) if limits else 0
+
+
+def trim_to_sentence(content: str, max_chars: int) -> str:
+    """
+    截断到不超过 max_chars 的最后一个句子边界
+
+    在前一半范围内找不到句子边界时直接按字数截断。
+    """
+    if len(content) <= max_chars:
+        return content
+
+    head = content[:max_chars]
+    last_boundary = -1
+    for match in SENTENCE_BOUNDARY_PATTERN.finditer(head):
+        last_boundary = match.end()
+    if last_boundary >= max_chars // 2:
+        return head[:last_boundary].rstrip()
+    return head.rstrip()
+
+
+def drop_partial_sentence(content: str) -> str:
+    """去掉末尾未完成的句子（回复因达到令牌上限被截断时使用）"""
+    last_boundary = -1
+    for match in SENTENCE_BOUNDARY_PATTERN.finditer(content):
+        last_boundary = match.end()
+    if last_boundary > 0:
+        return content[:last_boundary].rstrip()
+    return content
+
+
+@dataclass
+class OutputPolicy:
+    """单个路由的输出策略"""
+    route: str
+    char_limit: int = 0  # 字数限制（0表示不限制）
+    stop_sequences: List[str] = field(default_factory=list)
+
+    def max_tokens(self, endpoint: ModelEndpointConfig) -> int:
+        """请求的输出令牌上限（不超过端点配置的 max_tokens）"""
+        if not self.char_limit:
+            return endpoint.max_tokens
+        estimated = math.ceil(self.char_limit * config.output.tokens_per_char * config.output.token_headroom)
+        return min(endpoint.max_tokens, max(MIN_OUTPUT_TOKENS, estimated))
+
+    def trim_chars(self) -> int:
+        """超过该字数时截断（0表示不截断）"""
+        if not self.char_limit or not config.output.trim_ratio:
+            return 0
+        return int(self.char_limit * config.output.trim_ratio)
+
+
+@dataclass
+class RoleOutputStats:
+    """单个角色在单个路由上的输出长度统计"""
+    calls: int = 0
+    char_limit: int = 0
+    requested_tokens: int = 0  # 请求的输出令牌上限之和
+    completion_tokens: int = 0  # 实际输出令牌之和
+    output_chars: int = 0  # 截断后的输出字数之和
+    max_chars: int = 0  # 截断前的最长输出字数
+    over_limit: int = 0  # 超过字数限制的次数（截断前）
+    trimmed: int = 0  # 按句子边界截断的次数
+    truncated: int = 0  # 因达到令牌上限被截断的次数
+
+    def to_dict(self) -> Dict[str, Any]:
+        calls = max(self.calls, 1)
+        return {
+            'calls': self.calls,
+            'char_limit': self.char_limit,
+            'avg_requested_tokens': round(self.requested_tokens / calls, 1),
+            'avg_completion_tokens': round(self.completion_tokens / calls, 1),
+            'avg_output_chars': round(self.output_chars / calls, 1),
+            'max_chars': self.max_chars,
+            'over_limit': self.over_limit,
+            'trimmed': self.trimmed,
+            'truncated': self.truncated,
+            'token_utilization': round(self.completion_tokens / self.requested_tokens, 4)
+            if self.requested_tokens else 0.0
+        }
+
+
+class OutputGovernor:
+    """输出长度控制器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (角色, 路由) -> 输出长度统计
+        self._stats: Dict[Tuple[str, str], RoleOutputStats] = {}
+        self.policies: Dict[str, OutputPolicy] = {}
+        self.reload()
+
+    def reload(self) -> None:
+        """按提示词和配置重建各路由的输出策略"""
+        policies = {}
+        for route, prompts in ROUTE_PROMPTS.items():
+            char_limit = config.output.char_limits.get(route, parse_char_limit(*prompts))
+            policies[route] = OutputPolicy(route, char_limit, list(config.output.stop_sequences))
+        self.policies = policies
+
+    def policy(self, route: str) -> Optional[OutputPolicy]:
+        """路由的输出策略（未启用时返回None）"""
+        if not config.output.enabled:
+            return None
+        return self.policies.get(route)
+
+    def generation_params(self, route: str, endpoint: ModelEndpointConfig) -> Dict[str, Any]:
+        """路由在端点上的生成参数（max_tokens、stop）"""
+        policy = self.policy(route)
+        if policy is None:
+            return {}
+        params: Dict[str, Any] = {'max_tokens': policy.max_tokens(endpoint)}
+        if policy.stop_sequences:
+            params['stop'] = list(policy.stop_sequences)
+        return params
+
+    def apply(self, route: str, role: str, content: str, requested_tokens: int,
+              completion_tokens: int, truncated: bool = False) -> str:
+        """
+        按路由的输出策略处理回复并记录角色统计
+
+        Args:
+            route: 模型路由
+            role: 智能体角色
+            content: 模型回复
+            requested_tokens: 请求的输出令牌上限
+            completion_tokens: 实际输出令牌数
+            truncated: 回复是否因达到令牌上限被截断
+
+        Returns:
+            处理后的回复
+        """
+        policy = self.policy(route)
+        raw_chars = len(content)
+        trimmed = False
+
+        if policy is not None:
+            if truncated:
+                content = drop_partial_sentence(content)
+            trim_chars = policy.trim_chars()
+            if trim_chars and len(content) > trim_chars:
+                content = trim_to_sentence(content, trim_chars)
+            trimmed = len(content) < raw_chars
+
+        with self._lock:
+            stats = self._stats.setdefault((role, route), RoleOutputStats())
+            stats.calls += 1
+            stats.char_limit = policy.char_limit if policy is not None else 0
+            stats.requested_tokens += requested_tokens
+            stats.completion_tokens += completion_tokens
+            stats.output_chars += len(content)
+            stats.max_chars = max(stats.max_chars, raw_chars)
+            if stats.char_limit and raw_chars > stats.char_limit:
+                stats.over_limit += 1
+            if trimmed:
+                stats.trimmed += 1
+            if truncated:
+                stats.truncated += 1
+
+        return content
+
+    def stats(self) -> Dict[str, Any]:
+        """各路由的输出策略与各角色的输出长度统计"""
+        by_role: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for (role, route), stats in self._stats.items():
+                by_role.setdefault(role, {})[route] = stats.to_dict()
+        return {
+            'enabled': config.output.enabled,
+            'policies': {
+                route: {
+                    'char_limit': policy.char_limit,
+                    'trim_chars': policy.trim_chars(),
+                    'stop_sequences': policy.stop_sequences
+                }
+                for route, policy in self.policies.items()
+            },
+            'by_role': by_role
+        }
+
+
+# 全局输出长度控制器
+output_governor = OutputGovernor()
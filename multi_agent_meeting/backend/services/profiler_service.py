@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+采样分析器服务模块
+基于 sys._current_frames 的低开销统计采样，用于线上排查问题
+"""
+
+import os
+import sys
+import time
+import uuid
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+
+from async_runtime import is_green, original, run_blocking
+from config import config
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 保留的历史采样记录数量
+MAX_KEPT_RUNS = 10
+
+# 允许的最小采样间隔（毫秒），避免采样线程占用过多CPU
+MIN_SAMPLE_INTERVAL_MS = 1
+
+
+@dataclass
+class ProfileRun:
+    """一次采样任务"""
+    run_id: str
+    duration: float
+    sample_interval: float
+    top_n: int
+    status: str = 'running'  # running / completed / failed
+    started_at: float = 0.0
+    finished_at: Optional[float] = None
+    sample_count: int = 0
+    output_file: Optional[str] = None
+    error: Optional[str] = None
+    summary: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        """转换为字典"""
+        return {
+            'run_id': self.run_id,
+            'status': self.status,
+            'duration': self.duration,
+            'sample_interval_ms': self.sample_interval * 1000,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'sample_count': self.sample_count,
+            'output_file': self.output_file,
+            'error': self.error,
+            'summary': self.summary
+        }
+
+
+class SamplingProfiler:
+    """统计采样分析器
+
+    后台线程按固定间隔读取所有线程的调用栈，累计为折叠栈（collapsed stack）格式，
+    采样线程自身不计入结果。同一时间只允许一个采样任务运行。
+    """
+
+    def __init__(self, output_dir: str = None):
+        self.output_dir = output_dir or config.temp_dir
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._current: Optional[ProfileRun] = None
+        self._runs: Dict[str, ProfileRun] = {}
+        # 代码对象到栈帧标签的缓存，避免每次采样重复格式化字符串
+        self._label_cache: Dict[Any, str] = {}
+
+    def start(self, duration: float = None, interval_ms: float = None, top_n: int = None) -> ProfileRun:
+        """
+        启动采样任务
+
+        Args:
+            duration: 采样时长（秒），不超过配置的最大时长
+            interval_ms: 采样间隔（毫秒）
+            top_n: 摘要中展示的函数数量
+
+        Returns:
+            采样任务
+
+        Raises:
+            RuntimeError: 已有采样任务正在运行
+        """
+        duration = float(duration or config.profiler.default_duration)
+        duration = max(0.1, min(duration, float(config.profiler.max_duration)))
+        interval_ms = float(interval_ms or config.profiler.sample_interval_ms)
+        interval_ms = max(float(MIN_SAMPLE_INTERVAL_MS), interval_ms)
+        top_n = int(top_n or config.profiler.top_n)
+
+        with self._lock:
+            if self._current is not None and self._current.status == 'running':
+                raise RuntimeError(f"采样任务正在运行: run_id={self._current.run_id}")
+
+            run = ProfileRun(
+                run_id=uuid.uuid4().hex[:12],
+                duration=duration,
+                sample_interval=interval_ms / 1000.0,
+                top_n=top_n,
+                started_at=time.time()
+            )
+            self._current = run
+            self._runs[run.run_id] = run
+
+            # 只保留最近的采样记录
+            while len(self._runs) > MAX_KEPT_RUNS:
+                oldest_id = next(iter(self._runs))
+                self._runs.pop(oldest_id)
+
+        thread = threading.Thread(
+            target=self._run,
+            args=(run,),
+            name=f"sampling-profiler-{run.run_id}",
+            daemon=True
+        )
+        thread.start()
+
+        self.logger.info(f"采样任务已启动: run_id={run.run_id}, duration={duration}s, interval={interval_ms}ms")
+        return run
+
+    def get_run(self, run_id: str) -> Optional[ProfileRun]:
+        """获取采样任务"""
+        return self._runs.get(run_id)
+
+    def list_runs(self) -> List[ProfileRun]:
+        """获取最近的采样任务列表"""
+        return list(self._runs.values())
+
+    def is_running(self) -> bool:
+        """是否有采样任务正在运行"""
+        current = self._current
+        return current is not None and current.status == 'running'
+
+    def _run(self, run: ProfileRun) -> None:
+        """采样线程主循环"""
+        try:
+            # 协程模式下采样循环放到原生线程中执行，按固定节拍采样不依赖事件循环调度
+            stacks = run_blocking(self._collect, run, self._fixed_thread_names())
+
+            run.output_file = self._write_collapsed(run, stacks)
+            run.summary = self._build_summary(stacks, run.sample_count, run.top_n)
+            run.status = 'completed'
+            self.logger.info(f"采样任务完成: run_id={run.run_id}, samples={run.sample_count}, output={run.output_file}")
+
+        except Exception as e:
+            run.status = 'failed'
+            run.error = str(e)
+            self.logger.error(f"采样任务失败: run_id={run.run_id}, error={e}")
+        finally:
+            run.finished_at = time.time()
+
+    def _fixed_thread_names(self) -> Optional[Dict[int, str]]:
+        """
+        协程模式下的线程名称（只有事件循环所在的原生线程，其栈为当前运行的协程）；
+        threading 模式下返回 None，每次采样时重新枚举线程
+        """
+        if not is_green():
+            return None
+        return {original('_thread', 'get_ident')(): 'event-loop'}
+
+    def _collect(self, run: ProfileRun, thread_names: Optional[Dict[int, str]]) -> Counter:
+        """按固定节拍采集调用栈直到采样时长结束"""
+        stacks: Counter = Counter()
+        own_thread_id = original('_thread', 'get_ident')()
+        sleep = original('time', 'sleep')
+        max_depth = config.profiler.max_stack_depth
+        deadline = time.monotonic() + run.duration
+
+        next_tick = time.monotonic()
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+
+            self._sample_once(stacks, own_thread_id, max_depth, thread_names)
+            run.sample_count += 1
+
+            # 按固定节拍采样，落后时直接跳到下一个节拍，避免追赶造成突发开销
+            next_tick += run.sample_interval
+            sleep_time = next_tick - time.monotonic()
+            if sleep_time > 0:
+                sleep(sleep_time)
+            else:
+                next_tick = time.monotonic()
+
+        return stacks
+
+    def _sample_once(self, stacks: Counter, own_thread_id: int, max_depth: int,
+                     thread_names: Optional[Dict[int, str]] = None) -> None:
+        """采集一次所有线程的调用栈"""
+        if thread_names is None:
+            thread_names = {t.ident: t.name for t in threading.enumerate()}
+
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread_id:
+                continue
+
+            labels = []
+            depth = 0
+            while frame is not None and depth < max_depth:
+                labels.append(self._frame_label(frame.f_code))
+                frame = frame.f_back
+                depth += 1
+
+            labels.append(thread_names.get(thread_id, f"thread-{thread_id}"))
+            labels.reverse()
+            stacks[';'.join(labels)] += 1
+
+    def _frame_label(self, code) -> str:
+        """生成栈帧标签（折叠栈格式中不能包含分号）"""
+        label = self._label_cache.get(code)
+        if label is None:
+            filename = os.path.basename(code.co_filename)
+            label = f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ':')
+            self._label_cache[code] = label
+        return label
+
+    def _write_collapsed(self, run: ProfileRun, stacks: Counter) -> str:
+        """将折叠栈写入临时目录，可直接用于 flamegraph.pl / speedscope"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output_file = os.path.join(self.output_dir, f"profile_{timestamp}_{run.run_id}.folded")
+
+        with open(output_file, 'w', encoding='utf-8') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        return output_file
+
+    def _build_summary(self, stacks: Counter, sample_count: int, top_n: int) -> Dict[str, Any]:
+        """生成按自身耗时和累计耗时排序的函数摘要"""
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        thread_counts: Counter = Counter()
+        total_stack_samples = sum(stacks.values())
+
+        for stack, count in stacks.items():
+            frames = stack.split(';')
+            thread_counts[frames[0]] += count
+            functions = frames[1:]
+            if not functions:
+                continue
+            self_counts[functions[-1]] += count
+            # 递归调用只计一次累计样本
+            for function in set(functions):
+                total_counts[function] += count
+
+        def percent(value: int) -> float:
+            return round(value * 100.0 / total_stack_samples, 2) if total_stack_samples else 0.0
+
+        top_functions = []
+        for function, count in self_counts.most_common(top_n):
+            top_functions.append({
+                'function': function,
+                'self_samples': count,
+                'self_percent': percent(count),
+                'total_samples': total_counts[function],
+                'total_percent': percent(total_counts[function])
+            })
+
+        top_cumulative = [
+            {'function': function, 'total_samples': count, 'total_percent': percent(count)}
+            for function, count in total_counts.most_common(top_n)
+        ]
+
+        return {
+            'sample_rounds': sample_count,
+            'stack_samples': total_stack_samples,
+            'unique_stacks': len(stacks),
+            'threads': dict(thread_counts.most_common()),
+            'top_self': top_functions,
+            'top_cumulative': top_cumulative
+        }
+
+
+# 全局采样分析器实例
+profiler_service = SamplingProfiler()
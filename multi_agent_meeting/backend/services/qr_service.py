@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+登录二维码渲染服务模块
+二维码在后台线程池中渲染，结果按 (会话ID, 格式) 缓存，供独立的图片接口直接返回
+"""
+
+import threading
+from io import BytesIO
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Optional, Any, Tuple
+
+from config import config
+from async_runtime import run_blocking
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 支持的图片格式 -> MIME类型
+QR_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml'
+}
+
+
+def render_qr_image(content: str, fmt: str = 'png') -> bytes:
+    """渲染二维码图片（qrcode/PIL较重，首次使用时再导入；SVG不依赖PIL）"""
+    import qrcode
+
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(content)
+    qr.make(fit=True)
+
+    buffer = BytesIO()
+    if fmt == 'svg':
+        import qrcode.image.svg
+        img = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+        img.save(buffer)
+    else:
+        img = qr.make_image(fill_color="black", back_color="white")
+        img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class QrRenderer:
+    """
+    二维码渲染器
+
+    渲染在独立的线程池中进行，同一图片同时只渲染一次；渲染结果保存在按最近最少使用淘汰的缓存中。
+    """
+
+    def __init__(self, workers: int = 2, cache_size: int = 256):
+        self.cache_size = cache_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='qr-render')
+        self._cache: 'OrderedDict[Tuple[str, str], bytes]' = OrderedDict()
+        self._pending: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.renders = 0
+
+    def submit(self, fn: Any, *args: Any) -> Future:
+        """在渲染线程池中执行任务"""
+        return self._executor.submit(fn, *args)
+
+    def render(self, session_id: str, content: str, fmt: str = 'png') -> bytes:
+        """在当前线程渲染并写入缓存（供渲染线程池内的任务调用；协程模式下渲染在原生线程中进行）"""
+        image = run_blocking(render_qr_image, content, fmt)
+        with self._lock:
+            self.renders += 1
+            self._cache[(session_id, fmt)] = image
+            self._cache.move_to_end((session_id, fmt))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return image
+
+    def cached(self, session_id: str, fmt: str) -> Optional[bytes]:
+        """获取已缓存的图片"""
+        with self._lock:
+            image = self._cache.get((session_id, fmt))
+            if image is not None:
+                self._cache.move_to_end((session_id, fmt))
+                self.hits += 1
+            return image
+
+    def prerender(self, session_id: str, content: str, fmt: str = 'png') -> Future:
+        """提交渲染任务（已缓存或正在渲染时复用），不等待结果"""
+        key = (session_id, fmt)
+        with self._lock:
+            return self._prerender_locked(key, content)
+
+    def _prerender_locked(self, key: Tuple[str, str], content: str) -> Future:
+        future = self._pending.get(key)
+        if future is not None:
+            return future
+
+        future = Future()
+        image = self._cache.get(key)
+        if image is not None:
+            future.set_result(image)
+            return future
+
+        future = self._pending[key] = self._executor.submit(self.render, key[0], content, key[1])
+        # 任务已完成时回调会在当前线程中立即执行，因此使用可重入锁
+        future.add_done_callback(lambda _, key=key: self._forget_pending(key))
+        return future
+
+    def get(self, session_id: str, content: str, fmt: str = 'png', timeout: float = 10.0) -> bytes:
+        """获取图片：命中缓存直接返回，否则交给渲染线程池（相同图片的并发请求共用一次渲染）"""
+        key = (session_id, fmt)
+        with self._lock:
+            image = self._cache.get(key)
+            if image is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return image
+
+            self.misses += 1
+            future = self._prerender_locked(key, content)
+
+        return future.result(timeout=timeout)
+
+    def _forget_pending(self, key: Tuple[str, str]) -> None:
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def pending(self) -> int:
+        """正在排队或渲染中的按需渲染数量"""
+        with self._lock:
+            return len(self._pending)
+
+    def discard(self, session_id: str) -> None:
+        """删除某个会话的所有缓存图片"""
+        with self._lock:
+            for fmt in QR_FORMATS:
+                self._cache.pop((session_id, fmt), None)
+
+    def stats(self) -> Dict[str, Any]:
+        """渲染统计"""
+        with self._lock:
+            return {
+                'cached_images': len(self._cache),
+                'cache_size': self.cache_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'renders': self.renders
+            }
+
+    def shutdown(self) -> None:
+        """关闭渲染线程池"""
+        self._executor.shutdown(wait=False)
+
+
+def create_qr_renderer() -> QrRenderer:
+    """按配置创建二维码渲染器"""
+    return QrRenderer(config.wechat.qr_render_workers, config.wechat.qr_image_cache_size)
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会话存储模块
+带过期时间的键值存储，用于登录会话、用户会话等短期数据
+
+- memory: 进程内存储，过期堆 + 后台清理，容量上限按最近最少使用淘汰
+- sqlite: 本机文件存储，重启后保留，同一台机器的多个worker共享
+- redis: 由Redis按TTL过期，可跨机器共享（需要安装 redis 包）
+"""
+
+import os
+import json
+import time
+import heapq
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple
+
+from config import config
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class SessionStore:
+    """会话存储基类，值为可JSON序列化的字典，按命名空间隔离"""
+
+    backend = 'base'
+
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        """获取未过期的值"""
+        raise NotImplementedError
+
+    def set(self, namespace: str, key: str, value: Dict[str, Any], ttl: float) -> None:
+        """写入值，ttl 秒后过期"""
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str) -> bool:
+        """删除值"""
+        raise NotImplementedError
+
+    def sweep(self) -> int:
+        """清理已过期的条目，返回清理数量"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        """存储统计"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """关闭存储"""
+
+
+class MemorySessionStore(SessionStore):
+    """
+    进程内会话存储
+
+    条目按访问顺序保存在 OrderedDict 中，超出容量时淘汰最近最少使用的条目；
+    过期时间另存于最小堆，清理时只弹出已到期的堆顶，代价为 O(k log n)，
+    无需扫描全部条目。被覆盖或删除的条目在堆中留下的旧记录在弹出时跳过。
+    """
+
+    backend = 'memory'
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple[str, str], Tuple[Dict[str, Any], float]]' = OrderedDict()
+        self._expiry_heap: List[Tuple[float, str, str]] = []
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.expired = 0
+
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        entry_key = (namespace, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[entry_key]
+                self.expired += 1
+                return None
+            self._entries.move_to_end(entry_key)
+            return dict(value)
+
+    def set(self, namespace: str, key: str, value: Dict[str, Any], ttl: float) -> None:
+        entry_key = (namespace, key)
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._entries[entry_key] = (dict(value), expires_at)
+            self._entries.move_to_end(entry_key)
+            heapq.heappush(self._expiry_heap, (expires_at, namespace, key))
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+
+            # 旧的堆记录过多时重建堆，避免反复覆盖同一会话导致堆无限增长
+            if len(self._expiry_heap) > 2 * len(self._entries) + 1024:
+                self._expiry_heap = [(entry[1], ns, k) for (ns, k), entry in self._entries.items()]
+                heapq.heapify(self._expiry_heap)
+
+    def delete(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            return self._entries.pop((namespace, key), None) is not None
+
+    def sweep(self) -> int:
+        now = time.time()
+        removed = 0
+        with self._lock:
+            heap = self._expiry_heap
+            while heap and heap[0][0] <= now:
+                expires_at, namespace, key = heapq.heappop(heap)
+                entry = self._entries.get((namespace, key))
+                # 只删除过期时间与堆记录一致的条目（被覆盖过的条目以新的过期时间为准）
+                if entry is not None and entry[1] == expires_at:
+                    del self._entries[(namespace, key)]
+                    removed += 1
+            self.expired += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'backend': self.backend,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'heap_size': len(self._expiry_heap),
+                'evicted': self.evicted,
+                'expired': self.expired
+            }
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    SQLite会话存储
+
+    使用WAL模式，同一台机器上的多个worker进程可共享同一个数据库文件，重启后会话仍然有效。
+    过期时间建有索引，清理为一次范围删除；容量上限在后台清理时按最近写入时间淘汰。
+    """
+
+    backend = 'sqlite'
+
+    def __init__(self, path: str, max_entries: int = 100000):
+        self.path = path
+        self.max_entries = max_entries
+        self.evicted = 0
+        self.expired = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS sessions ('
+            ' namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,'
+            ' expires_at REAL NOT NULL, updated_at REAL NOT NULL,'
+            ' PRIMARY KEY (namespace, key))'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions (updated_at)')
+
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value FROM sessions WHERE namespace = ? AND key = ? AND expires_at > ?',
+                (namespace, key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, namespace: str, key: str, value: Dict[str, Any], ttl: float) -> None:
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO sessions (namespace, key, value, expires_at, updated_at) VALUES (?, ?, ?, ?, ?)',
+                (namespace, key, payload, now + ttl, now)
+            )
+
+    def delete(self, namespace: str, key: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM sessions WHERE namespace = ? AND key = ?', (namespace, key))
+        return cursor.rowcount > 0
+
+    def sweep(self) -> int:
+        with self._lock:
+            removed = self._conn.execute('DELETE FROM sessions WHERE expires_at <= ?', (time.time(),)).rowcount
+            self.expired += removed
+
+            overflow = self._conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    'DELETE FROM sessions WHERE rowid IN (SELECT rowid FROM sessions ORDER BY updated_at LIMIT ?)',
+                    (overflow,)
+                )
+                self.evicted += overflow
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+        return {
+            'backend': self.backend,
+            'path': self.path,
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'evicted': self.evicted,
+            'expired': self.expired
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisSessionStore(SessionStore):
+    """Redis会话存储（过期由Redis的TTL处理，容量由Redis的maxmemory策略控制）"""
+
+    backend = 'redis'
+
+    def __init__(self, url: str, prefix: str = 'multi_agent_meeting'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("使用Redis会话存储需要安装 redis 包: pip install redis")
+
+        self.url = url
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{key}"
+
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        payload = self._client.get(self._key(namespace, key))
+        return json.loads(payload) if payload else None
+
+    def set(self, namespace: str, key: str, value: Dict[str, Any], ttl: float) -> None:
+        self._client.set(self._key(namespace, key), json.dumps(value, ensure_ascii=False), px=max(1, int(ttl * 1000)))
+
+    def delete(self, namespace: str, key: str) -> bool:
+        return self._client.delete(self._key(namespace, key)) > 0
+
+    def sweep(self) -> int:
+        return 0  # Redis自动删除过期键
+
+    def stats(self) -> Dict[str, Any]:
+        return {'backend': self.backend, 'url': self.url}
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class SessionSweeper:
+    """后台定时清理过期会话"""
+
+    def __init__(self, store: SessionStore, interval: float):
+        self.store = store
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """启动清理线程（重复调用无效）"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='session-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """停止清理线程"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                removed = self.store.sweep()
+                if removed:
+                    logger.info(f"清理过期会话: backend={self.store.backend}, count={removed}")
+            except Exception as e:
+                logger.error(f"清理过期会话失败: error={e}")
+
+
+def create_session_store() -> SessionStore:
+    """按配置创建会话存储"""
+    store_config = config.session_store
+
+    if store_config.backend == 'sqlite':
+        path = store_config.path or os.path.join(config.temp_dir, 'sessions.db')
+        return SqliteSessionStore(path, store_config.max_entries)
+
+    if store_config.backend == 'redis':
+        return RedisSessionStore(store_config.redis_url)
+
+    return MemorySessionStore(store_config.max_entries)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发言者路由模块
+会议开始时为每个非CEO智能体的角色和职责预先计算文本向量，选择下一位发言者时
+用一次矩阵-向量乘法得到CEO发言与全部智能体的相关度，加上点名加分、减去发言次数带来的公平性惩罚
+"""
+
+import threading
+from typing import Collection, Dict, List, Optional, Sequence, Tuple
+
+from models import SpeakerDecision
+from text_vectors import HashingVectorizer, require_numpy
+from utils import KeywordMatcher
+
+# CEO发言中直接点到角色名称时的加分（高于任何相关度，点名优先）
+MENTION_BONUS = 1.0
+
+_vectorizer = HashingVectorizer()
+
+
+class SpeakerRouter:
+    """
+    按相关度选择下一位发言者
+
+    每个智能体的得分 = CEO发言与"角色+职责"向量的余弦相似度
+                     + 被点名时的 MENTION_BONUS
+                     - fairness_weight x (该智能体发言次数 - 最少发言次数)
+    """
+
+    def __init__(self, category_keywords: Sequence[Tuple[Sequence[str], Sequence[str]]] = ()):
+        """
+        Args:
+            category_keywords: [(CEO发言关键词, 角色关键词)]，角色命中某类角色关键词时，
+                该类的CEO发言关键词并入该角色的向量
+        """
+        self._category_keywords = [
+            (list(ceo_keywords), KeywordMatcher(role_keywords)) for ceo_keywords, role_keywords in category_keywords
+        ]
+        self._lock = threading.Lock()
+        self._ids: List[int] = []
+        self._roles: List[str] = []
+        self._rows: Dict[int, int] = {}
+        self._matrix = None
+        self._mentions: Optional[KeywordMatcher] = None
+        self._role_rows: Dict[str, List[int]] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self._matrix is not None
+
+    def _profile(self, role: str, description: str) -> str:
+        """用于计算向量的角色文本"""
+        keywords = [
+            keyword for ceo_keywords, role_matcher in self._category_keywords
+            if role_matcher.search(role) for keyword in ceo_keywords
+        ]
+        return ' '.join([role, description] + keywords)
+
+    def build(self, agents: Sequence[Tuple[int, str, str]]) -> None:
+        """
+        预先计算智能体向量
+
+        Args:
+            agents: [(智能体ID, 角色, 职责描述)]，不含CEO
+        """
+        np = require_numpy()
+        matrix = _vectorizer.transform(self._profile(role, description) for _, role, description in agents)
+        role_rows: Dict[str, List[int]] = {}
+        for row, (_, role, _) in enumerate(agents):
+            role_rows.setdefault(role.lower(), []).append(row)
+        with self._lock:
+            self._ids = [agent_id for agent_id, _, _ in agents]
+            self._roles = [role for _, role, _ in agents]
+            self._rows = {agent_id: row for row, agent_id in enumerate(self._ids)}
+            self._matrix = matrix if len(agents) else np.zeros((0, _vectorizer.dim), dtype=np.float32)
+            self._mentions = KeywordMatcher(role for _, role, _ in agents)
+            self._role_rows = role_rows
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids, self._roles, self._rows, self._role_rows = [], [], {}, {}
+            self._matrix = None
+            self._mentions = None
+
+    def select(self, ceo_content: str, speaker_counts: Optional[Dict[int, int]] = None,
+               exclude: Collection[int] = (), fairness_weight: float = 0.0) -> Optional[SpeakerDecision]:
+        """
+        选择下一位发言者
+
+        Args:
+            ceo_content: CEO最新发言
+            speaker_counts: 发言次数统计
+            exclude: 不参与选择的智能体ID（如本轮已发言的）
+            fairness_weight: 每多发言一次扣除的分数
+
+        Returns:
+            发言人决策结果（没有可选的智能体时返回None）
+        """
+        np = require_numpy()
+        with self._lock:
+            ids, roles, rows, matrix = self._ids, self._roles, self._rows, self._matrix
+            mentions, role_rows = self._mentions, self._role_rows
+        if matrix is None or not ids:
+            return None
+
+        scores = matrix @ _vectorizer.transform_one(ceo_content)
+        mentioned = mentions.find_all(ceo_content) if mentions is not None else set()
+        for role in mentioned:
+            scores[role_rows.get(role.lower(), [])] += MENTION_BONUS
+        if speaker_counts and fairness_weight:
+            counts = np.fromiter((speaker_counts.get(agent_id, 0) for agent_id in ids),
+                                 dtype=np.float32, count=len(ids))
+            scores -= fairness_weight * (counts - counts.min())
+        excluded = [rows[agent_id] for agent_id in exclude if agent_id in rows]
+        if excluded:
+            if len(excluded) == len(ids):
+                return None
+            scores[excluded] = -np.inf
+
+        row = int(np.argmax(scores))
+        if roles[row] in mentioned:
+            reason = f"CEO点名: {roles[row]}"
+            confidence = 0.9
+        else:
+            reason = f"与CEO发言最相关: {roles[row]}（得分 {float(scores[row]):.3f}）"
+            confidence = float(min(max(scores[row], 0.1), 0.8))
+        return SpeakerDecision(agent_id=ids[row], agent_role=roles[row], decision_reason=reason,
+                               confidence=confidence)
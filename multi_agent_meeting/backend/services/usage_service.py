@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+令牌用量服务模块
+按智能体、会议、用户和API密钥统计模型调用的令牌用量，并判断会议预算状态
+"""
+
+import hashlib
+import threading
+from typing import Dict, Optional, Any
+
+from models import TokenUsage
+from config import config
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# 预算状态
+BUDGET_OK = 'ok'
+BUDGET_SOFT = 'soft'  # 达到软预算：缩小对话历史窗口
+BUDGET_HARD = 'hard'  # 达到硬预算：强制CEO最终总结
+
+
+def key_fingerprint(api_key: str) -> str:
+    """API密钥指纹（统计和日志中不出现明文密钥）"""
+    if not api_key:
+        return 'key_unknown'
+    return 'key_' + hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:10]
+
+
+class MeetingUsage:
+    """单场会议的令牌用量（会议总量 + 按智能体）"""
+
+    def __init__(self, meeting_id: Optional[str] = None, user_id: Optional[str] = None):
+        self.meeting_id = meeting_id
+        self.user_id = user_id
+        self.total = TokenUsage()
+        self.by_agent: Dict[int, TokenUsage] = {}
+        self._lock = threading.Lock()
+
+    def record(self, agent_id: int, usage: Dict[str, int]) -> None:
+        """记录一次调用"""
+        with self._lock:
+            self.total.add(usage)
+            agent_usage = self.by_agent.get(agent_id)
+            if agent_usage is None:
+                agent_usage = self.by_agent[agent_id] = TokenUsage()
+            agent_usage.add(usage)
+
+    def budget_state(self) -> str:
+        """当前预算状态（预算为0表示不限制）"""
+        total_tokens = self.total.total_tokens
+        hard_budget = config.meeting.token_hard_budget
+        soft_budget = config.meeting.token_soft_budget
+
+        if hard_budget > 0 and total_tokens >= hard_budget:
+            return BUDGET_HARD
+        if soft_budget > 0 and total_tokens >= soft_budget:
+            return BUDGET_SOFT
+        return BUDGET_OK
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        with self._lock:
+            by_agent = {str(agent_id): usage.to_dict() for agent_id, usage in sorted(self.by_agent.items())}
+            total = self.total.to_dict()
+        return {
+            'meeting_id': self.meeting_id,
+            'user_id': self.user_id,
+            'total': total,
+            'by_agent': by_agent,
+            'budget': {
+                'soft': config.meeting.token_soft_budget,
+                'hard': config.meeting.token_hard_budget,
+                'state': self.budget_state()
+            }
+        }
+
+
+class UsageLedger:
+    """进程级累计用量（按用户和API密钥）"""
+
+    def __init__(self):
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._by_user: Dict[str, TokenUsage] = {}
+        self._by_key: Dict[str, TokenUsage] = {}
+
+    def record(self, user_id: Optional[str], api_key: str, usage: Dict[str, int]) -> None:
+        """记录一次调用"""
+        user_id = user_id or 'anonymous'
+        fingerprint = key_fingerprint(api_key)
+        with self._lock:
+            for bucket, name in ((self._by_user, user_id), (self._by_key, fingerprint)):
+                entry = bucket.get(name)
+                if entry is None:
+                    entry = bucket[name] = TokenUsage()
+                entry.add(usage)
+
+    def get_user_usage(self, user_id: str) -> TokenUsage:
+        """获取用户累计用量"""
+        with self._lock:
+            usage = self._by_user.get(user_id)
+            return TokenUsage(**vars(usage)) if usage else TokenUsage()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        with self._lock:
+            return {
+                'by_user': {name: usage.to_dict() for name, usage in self._by_user.items()},
+                'by_key': {name: usage.to_dict() for name, usage in self._by_key.items()}
+            }
+
+
+# 全局用量账本实例
+usage_ledger = UsageLedger()
@@ -9,27 +9,19 @@ import os
 import sys
 import time
 import uuid
+import random
 import hashlib
-import requests
-import qrcode
-from io import BytesIO
-from typing import Optional, Dict, Any
+import heapq
+import threading
+from collections import deque
+from typing import Optional, Dict, Any, Deque, Tuple, List, Callable
 from datetime import datetime
 
 from models import User, WechatLoginSession, UserSession
 from config import config
 from logging_config import get_logger
-
-# 设置控制台编码
-if sys.platform == "win32":
-    try:
-        import codecs
-        if hasattr(sys.stdout, 'detach'):
-            sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
-            sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
-        os.system("chcp 65001 > nul")
-    except Exception:
-        pass
+from services.session_store import SessionStore, SessionSweeper, create_session_store
+from services.qr_service import QrRenderer, QR_FORMATS, create_qr_renderer
 
 logger = get_logger(__name__)
 
@@ -37,71 +29,156 @@ logger = get_logger(__name__)
 class WechatService:
     """微信登录服务"""
     
-    def __init__(self):
+    # 会话存储命名空间
+    LOGIN_NAMESPACE = 'login'
+    USER_SESSION_NAMESPACE = 'user_session'
+    USER_NAMESPACE = 'user'
+    
+    # 长轮询重新读取存储的间隔（秒），用于发现其他worker中的状态变化
+    LONG_POLL_RECHECK_INTERVAL = 1.0
+    
+    # 模拟扫码：发放二维码后在该范围内随机延迟（秒）将状态置为 scanned
+    SIMULATED_SCAN_DELAY = (3.0, 10.0)
+    
+    def __init__(self, store: Optional[SessionStore] = None, renderer: Optional[QrRenderer] = None):
         self.app_id = config.wechat.app_id
         self.app_secret = config.wechat.app_secret
         self.redirect_uri = config.wechat.redirect_uri
         self.qr_expire_time = config.wechat.qr_code_expire_time
         self.session_expire_time = config.wechat.session_expire_time
         
-        # 内存存储（生产环境建议使用Redis）
-        self.login_sessions: Dict[str, WechatLoginSession] = {}
-        self.user_sessions: Dict[str, UserSession] = {}
-        self.users: Dict[str, User] = {}
+        # 会话按过期时间自动清理；sqlite/redis 后端下重启后仍有效，并可在多个worker间共享
+        self.store = store or create_session_store()
+        self.sweeper = SessionSweeper(self.store, config.session_store.sweep_interval)
+        
+        # 二维码在渲染线程池中生成；预生成少量登录会话应对登录高峰
+        self.renderer = renderer or create_qr_renderer()
+        self.qr_pool_size = config.wechat.qr_pool_size
+        self._pool: Deque[WechatLoginSession] = deque()
+        self._pool_lock = threading.Lock()
+        self._pool_filling = False
+        self.pool_hits = 0
+        self.pool_misses = 0
+        
+        # 登录状态变化通知：长轮询在条件变量上等待，Socket.IO 推送通过监听器
+        self._state_changed = threading.Condition()
+        self._state_listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        
+        # 模拟扫码：所有待扫码会话按到期时间放在一个堆里，由单个调度线程依次处理
+        self._scan_heap: List[Tuple[float, str]] = []
+        self._scan_ready = threading.Condition()
+        self._scan_thread: Optional[threading.Thread] = None
+        
+        logger.info(f"微信登录服务初始化完成: session_store={self.store.backend}")
+    
+    def _get_login_session(self, session_id: str) -> Optional[WechatLoginSession]:
+        data = self.store.get(self.LOGIN_NAMESPACE, session_id)
+        return WechatLoginSession.from_dict(data) if data else None
+    
+    def _save_login_session(self, login_session: WechatLoginSession) -> None:
+        ttl = login_session.expires_at - time.time()
+        if ttl > 0:
+            self.store.set(self.LOGIN_NAMESPACE, login_session.session_id, login_session.to_dict(), ttl)
+    
+    def _get_user(self, user_id: str) -> Optional[User]:
+        data = self.store.get(self.USER_NAMESPACE, user_id)
+        return User.from_dict(data) if data else None
+    
+    def _save_user(self, user: User) -> None:
+        # 用户记录与最近一次登录的会话同时过期，每次登录续期
+        self.store.set(self.USER_NAMESPACE, user.id, user.to_dict(), self.session_expire_time)
+    
+    def _new_login_session(self) -> WechatLoginSession:
+        """创建登录会话（尚未写入存储）"""
+        session_id = str(uuid.uuid4())
+        
+        # 生成二维码内容（这里使用模拟的微信登录URL）
+        # 实际应用中需要调用微信API获取真实的二维码
+        qr_content = f"https://open.weixin.qq.com/connect/qrconnect?appid={self.app_id}&redirect_uri={self.redirect_uri}&response_type=code&scope=snsapi_login&state={session_id}#wechat_redirect"
+        
+        current_time = time.time()
+        return WechatLoginSession(
+            session_id=session_id,
+            qr_code_url=qr_content,
+            qr_code_ticket=session_id,  # 使用session_id作为ticket
+            state='waiting',
+            created_at=current_time,
+            expires_at=current_time + self.qr_expire_time
+        )
+    
+    def _take_pooled_session(self) -> Optional[WechatLoginSession]:
+        """取出一个预生成的登录会话（超过二维码有效期的丢弃），并在后台补充"""
+        deadline = time.time() - self.qr_expire_time
+        login_session = None
+        with self._pool_lock:
+            while self._pool:
+                candidate = self._pool.popleft()
+                if candidate.created_at > deadline:
+                    login_session = candidate
+                    break
+            if login_session is None:
+                self.pool_misses += 1
+            else:
+                self.pool_hits += 1
         
-        logger.info("微信登录服务初始化完成")
+        self.fill_pool()
+        return login_session
+    
+    def fill_pool(self) -> None:
+        """在渲染线程池中补充预生成的登录会话（已在补充时不重复提交）"""
+        with self._pool_lock:
+            if self._pool_filling or len(self._pool) >= self.qr_pool_size:
+                return
+            self._pool_filling = True
+        self.renderer.submit(self._fill_pool)
+    
+    def _fill_pool(self) -> None:
+        # 每个任务只生成一个会话，再重新提交，使按需渲染的图片不必排在整批预生成之后；
+        # 有按需渲染在排队时（持续高峰）暂停预生成，下次发放会话时再继续
+        try:
+            login_session = self._new_login_session()
+            self.renderer.render(login_session.session_id, login_session.qr_code_url, 'png')
+            with self._pool_lock:
+                self._pool.append(login_session)
+                if len(self._pool) < self.qr_pool_size and not self.renderer.pending():
+                    self.renderer.submit(self._fill_pool)
+                    return
+        except RuntimeError:
+            pass  # 渲染线程池已关闭
+        except Exception as e:
+            logger.error(f"预生成登录会话失败: {e}")
+        with self._pool_lock:
+            self._pool_filling = False
     
     def generate_qr_code(self) -> Dict[str, Any]:
-        """生成微信登录二维码"""
+        """
+        生成微信登录二维码
+        
+        优先使用预生成的登录会话（图片已渲染），响应中只包含会话信息，
+        图片通过 get_qr_image 对应的独立接口获取
+        """
         try:
-            # 生成会话ID
-            session_id = str(uuid.uuid4())
-            
-            # 生成二维码内容（这里使用模拟的微信登录URL）
-            # 实际应用中需要调用微信API获取真实的二维码
-            qr_content = f"https://open.weixin.qq.com/connect/qrconnect?appid={self.app_id}&redirect_uri={self.redirect_uri}&response_type=code&scope=snsapi_login&state={session_id}#wechat_redirect"
-            
-            # 生成二维码图片
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(qr_content)
-            qr.make(fit=True)
+            login_session = self._take_pooled_session()
+            if login_session is None:
+                login_session = self._new_login_session()
+                # 提前开始渲染，前端请求图片时通常已完成
+                self.renderer.prerender(login_session.session_id, login_session.qr_code_url, 'png')
+            else:
+                # 有效期从发放时开始计算
+                login_session.created_at = time.time()
+                login_session.expires_at = login_session.created_at + self.qr_expire_time
             
-            # 创建二维码图片
-            img = qr.make_image(fill_color="black", back_color="white")
+            self._save_login_session(login_session)
+            self._schedule_simulated_scan(login_session.session_id)
             
-            # 转换为base64
-            buffer = BytesIO()
-            img.save(buffer, format='PNG')
-            buffer.seek(0)
-            import base64
-            qr_code_base64 = base64.b64encode(buffer.getvalue()).decode()
-            
-            # 创建登录会话
-            current_time = time.time()
-            login_session = WechatLoginSession(
-                session_id=session_id,
-                qr_code_url=qr_content,
-                qr_code_ticket=session_id,  # 使用session_id作为ticket
-                state='waiting',
-                created_at=current_time,
-                expires_at=current_time + self.qr_expire_time
-            )
-            
-            self.login_sessions[session_id] = login_session
-            
-            logger.info(f"生成微信登录二维码: session_id={session_id}")
+            logger.info(f"生成微信登录二维码: session_id={login_session.session_id}")
             
             return {
                 'status': 'success',
-                'session_id': session_id,
-                'qr_code_url': qr_content,
-                'qr_code_base64': f"data:image/png;base64,{qr_code_base64}",
-                'expires_in': self.qr_expire_time
+                'session_id': login_session.session_id,
+                'qr_code_url': login_session.qr_code_url,
+                'expires_in': self.qr_expire_time,
+                'expires_at': login_session.expires_at
             }
             
         except Exception as e:
@@ -111,42 +188,88 @@ class WechatService:
                 'error': str(e)
             }
     
+    def get_qr_image(self, session_id: str, fmt: str = 'png') -> Optional[Tuple[bytes, str]]:
+        """
+        获取登录二维码图片
+        
+        Returns:
+            (图片内容, MIME类型)，会话不存在、已过期或格式不支持时返回None
+        """
+        if fmt not in QR_FORMATS:
+            return None
+        
+        image = self.renderer.cached(session_id, fmt)
+        if image is None:
+            # 本进程没有缓存（如由其他worker生成的会话），按存储中的会话内容渲染
+            login_session = self._get_login_session(session_id)
+            if login_session is None or login_session.is_expired():
+                return None
+            image = self.renderer.get(session_id, login_session.qr_code_url, fmt)
+        return image, QR_FORMATS[fmt]
+    
+    def add_state_listener(self, listener: Callable[[str, Dict[str, Any]], None]) -> None:
+        """注册登录状态变化监听器，参数为 (登录会话ID, 状态)"""
+        self._state_listeners.append(listener)
+    
+    def _notify_state_change(self, login_session: WechatLoginSession) -> None:
+        """唤醒等待中的长轮询并通知监听器"""
+        with self._state_changed:
+            self._state_changed.notify_all()
+        
+        status = self._status_payload(login_session)
+        for listener in self._state_listeners:
+            try:
+                listener(login_session.session_id, status)
+            except Exception as e:
+                logger.error(f"登录状态通知失败: session_id={login_session.session_id}, error={e}")
+    
+    @staticmethod
+    def _status_payload(login_session: WechatLoginSession) -> Dict[str, Any]:
+        return {
+            'status': 'success',
+            'state': login_session.state,
+            'expires_at': login_session.expires_at,
+            'user_id': login_session.user_id,
+            'openid': login_session.openid
+        }
+    
+    def wait_for_login_status(self, session_id: str, known_state: Optional[str] = None,
+                              timeout: float = 25.0) -> Dict[str, Any]:
+        """
+        长轮询登录状态：状态与 known_state 不同（或出错、过期）时立即返回，否则等待状态变化直至超时
+        
+        本进程内的状态变化会立即唤醒等待；其他worker写入共享存储的变化按 LONG_POLL_RECHECK_INTERVAL 重新检查
+        """
+        deadline = time.time() + timeout
+        while True:
+            result = self.check_login_status(session_id)
+            remaining = deadline - time.time()
+            if result['status'] != 'success' or result['state'] != known_state or remaining <= 0:
+                return result
+            
+            with self._state_changed:
+                self._state_changed.wait(min(remaining, self.LONG_POLL_RECHECK_INTERVAL))
+    
     def check_login_status(self, session_id: str) -> Dict[str, Any]:
         """检查登录状态"""
         try:
-            if session_id not in self.login_sessions:
+            login_session = self._get_login_session(session_id)
+            if login_session is None:
                 return {
                     'status': 'error',
                     'error': '会话不存在或已过期'
                 }
             
-            login_session = self.login_sessions[session_id]
-            
             # 检查是否过期
             if login_session.is_expired():
-                # 清理过期会话
-                del self.login_sessions[session_id]
+                self.store.delete(self.LOGIN_NAMESPACE, session_id)
                 return {
                     'status': 'error',
                     'error': '二维码已过期，请重新生成'
                 }
             
-            # 模拟登录状态检查
-            # 实际应用中需要调用微信API检查扫码状态
-            if login_session.state == 'waiting':
-                # 模拟用户扫码（这里为了演示，随机返回扫码状态）
-                import random
-                if random.random() < 0.1:  # 10%概率模拟扫码
-                    login_session.state = 'scanned'
-                    logger.info(f"模拟用户扫码: session_id={session_id}")
-            
-            return {
-                'status': 'success',
-                'state': login_session.state,
-                'expires_at': login_session.expires_at,
-                'user_id': login_session.user_id,
-                'openid': login_session.openid
-            }
+            # 扫码状态由扫码事件写入（见 _simulate_scan），这里只读取
+            return self._status_payload(login_session)
             
         except Exception as e:
             logger.error(f"检查登录状态失败: {e}")
@@ -155,19 +278,64 @@ class WechatService:
                 'error': str(e)
             }
     
+    def _schedule_simulated_scan(self, session_id: str) -> None:
+        """
+        安排模拟扫码（实际应用中由微信扫码回调触发）
+        
+        扫码由调度线程按到期时间触发，与是否有人查询状态无关：只通过 Socket.IO 订阅 login_status 的客户端
+        同样会收到 scanned 推送，随后调用确认登录接口即可收到 confirmed 推送
+        """
+        due = time.monotonic() + random.uniform(*self.SIMULATED_SCAN_DELAY)
+        with self._scan_ready:
+            heapq.heappush(self._scan_heap, (due, session_id))
+            if self._scan_thread is None or not self._scan_thread.is_alive():
+                self._scan_thread = threading.Thread(target=self._run_scan_scheduler, name='simulated-scan', daemon=True)
+                self._scan_thread.start()
+            self._scan_ready.notify()
+    
+    def _run_scan_scheduler(self) -> None:
+        """调度线程：等待堆顶会话到期后模拟扫码（新会话入堆时被唤醒重新计算等待时间）"""
+        while True:
+            with self._scan_ready:
+                while True:
+                    if not self._scan_heap:
+                        self._scan_ready.wait()
+                        continue
+                    due, session_id = self._scan_heap[0]
+                    remaining = due - time.monotonic()
+                    if remaining <= 0:
+                        heapq.heappop(self._scan_heap)
+                        break
+                    self._scan_ready.wait(remaining)
+            self._simulate_scan(session_id)
+    
+    def _simulate_scan(self, session_id: str) -> None:
+        """模拟用户扫码：等待中的登录会话置为 scanned 并通知长轮询和订阅者"""
+        try:
+            login_session = self._get_login_session(session_id)
+            if login_session is None or login_session.is_expired() or login_session.state != 'waiting':
+                return
+            
+            login_session.state = 'scanned'
+            self._save_login_session(login_session)
+            self._notify_state_change(login_session)
+            logger.info(f"模拟用户扫码: session_id={session_id}")
+            
+        except Exception as e:
+            logger.error(f"模拟扫码失败: session_id={session_id}, error={e}")
+    
     def confirm_login(self, session_id: str, code: str = None) -> Dict[str, Any]:
         """确认登录（模拟微信授权回调）"""
         try:
-            if session_id not in self.login_sessions:
+            login_session = self._get_login_session(session_id)
+            if login_session is None:
                 return {
                     'status': 'error',
                     'error': '会话不存在或已过期'
                 }
             
-            login_session = self.login_sessions[session_id]
-            
             if login_session.is_expired():
-                del self.login_sessions[session_id]
+                self.store.delete(self.LOGIN_NAMESPACE, session_id)
                 return {
                     'status': 'error',
                     'error': '二维码已过期，请重新生成'
@@ -198,12 +366,15 @@ class WechatService:
                 last_login_at=current_time
             )
             
-            self.users[user_id] = user
+            self._save_user(user)
             
             # 更新登录会话
             login_session.state = 'confirmed'
             login_session.user_id = user_id
             login_session.openid = openid
+            self._save_login_session(login_session)
+            self.renderer.discard(session_id)
+            self._notify_state_change(login_session)
             
             # 创建用户会话
             user_session_id = str(uuid.uuid4())
@@ -214,7 +385,7 @@ class WechatService:
                 expires_at=current_time + self.session_expire_time
             )
             
-            self.user_sessions[user_session_id] = user_session
+            self.store.set(self.USER_SESSION_NAMESPACE, user_session_id, user_session.to_dict(), self.session_expire_time)
             
             logger.info(f"用户登录成功: user_id={user_id}, session_id={session_id}")
             
@@ -235,20 +406,17 @@ class WechatService:
     def verify_user_session(self, session_id: str) -> Optional[User]:
         """验证用户会话"""
         try:
-            if session_id not in self.user_sessions:
+            data = self.store.get(self.USER_SESSION_NAMESPACE, session_id)
+            if data is None:
                 return None
             
-            user_session = self.user_sessions[session_id]
+            user_session = UserSession.from_dict(data)
             
             if user_session.is_expired() or not user_session.is_active:
-                # 清理过期会话
-                del self.user_sessions[session_id]
-                return None
-            
-            if user_session.user_id not in self.users:
+                self.store.delete(self.USER_SESSION_NAMESPACE, session_id)
                 return None
             
-            return self.users[user_session.user_id]
+            return self._get_user(user_session.user_id)
             
         except Exception as e:
             logger.error(f"验证用户会话失败: {e}")
@@ -257,8 +425,7 @@ class WechatService:
     def logout(self, session_id: str) -> Dict[str, Any]:
         """用户登出"""
         try:
-            if session_id in self.user_sessions:
-                del self.user_sessions[session_id]
+            if self.store.delete(self.USER_SESSION_NAMESPACE, session_id):
                 logger.info(f"用户登出: session_id={session_id}")
             
             return {
@@ -273,33 +440,46 @@ class WechatService:
                 'error': str(e)
             }
     
-    def cleanup_expired_sessions(self):
-        """清理过期会话"""
+    def cleanup_expired_sessions(self) -> int:
+        """清理过期会话（通常由后台清理线程定时执行，无需手动调用）"""
         try:
-            current_time = time.time()
-            
-            # 清理过期的登录会话
-            expired_login_sessions = [
-                session_id for session_id, session in self.login_sessions.items()
-                if session.is_expired()
-            ]
-            for session_id in expired_login_sessions:
-                del self.login_sessions[session_id]
-            
-            # 清理过期的用户会话
-            expired_user_sessions = [
-                session_id for session_id, session in self.user_sessions.items()
-                if session.is_expired()
-            ]
-            for session_id in expired_user_sessions:
-                del self.user_sessions[session_id]
-            
-            if expired_login_sessions or expired_user_sessions:
-                logger.info(f"清理过期会话: 登录会话={len(expired_login_sessions)}, 用户会话={len(expired_user_sessions)}")
-                
+            removed = self.store.sweep()
+            if removed:
+                logger.info(f"清理过期会话: count={removed}")
+            return removed
         except Exception as e:
             logger.error(f"清理过期会话失败: {e}")
+            return 0
+    
+    def get_session_stats(self) -> Dict[str, Any]:
+        """会话存储与二维码统计"""
+        with self._pool_lock:
+            pooled = len(self._pool)
+        return {
+            'store': self.store.stats(),
+            'qr_pool': {
+                'size': self.qr_pool_size,
+                'ready': pooled,
+                'hits': self.pool_hits,
+                'misses': self.pool_misses
+            },
+            'qr_renderer': self.renderer.stats()
+        }
+
+
+# 全局微信服务实例（首次使用时创建，同时启动后台清理线程并预生成登录会话）
+_wechat_service: Optional[WechatService] = None
+_wechat_service_lock = threading.Lock()
 
 
-# 全局微信服务实例
-wechat_service = WechatService()
+def get_wechat_service() -> WechatService:
+    """获取全局微信服务实例"""
+    global _wechat_service
+    if _wechat_service is None:
+        with _wechat_service_lock:
+            if _wechat_service is None:
+                service = WechatService()
+                service.sweeper.start()
+                service.fill_pool()
+                _wechat_service = service
+    return _wechat_service
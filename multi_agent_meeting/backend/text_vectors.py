@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文本向量模块
+本地的特征哈希文本向量（不依赖外部服务）：中文按连续汉字的单字和二元组切分，英文和数字按词切分，
+哈希到固定维度后按次线性词频加权并做L2归一化，两个向量的点积即余弦相似度。
+哈希使用 crc32，结果与进程无关，向量可以保存到文件后复用。需要 numpy。
+"""
+
+import re
+import zlib
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional, Tuple
+
+# 词元：连续的英文/数字，或连续的汉字
+TOKEN_PATTERN = re.compile(r'[a-z0-9_]+|[\u4e00-\u9fff]+')
+
+# 默认向量维度（2的幂）
+DEFAULT_DIM = 4096
+
+
+def require_numpy() -> Any:
+    """导入 numpy（可选依赖）"""
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("文本向量需要安装 numpy 包: pip install numpy")
+    return numpy
+
+
+def tokenize(text: str) -> List[str]:
+    """切分词元：英文/数字按词，汉字按单字和相邻二元组"""
+    tokens: List[str] = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        run = match.group()
+        if run[0] < '\u4e00':
+            tokens.append(run)
+            continue
+        tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+@lru_cache(maxsize=65536)
+def hash_token(token: str) -> int:
+    """词元的哈希值（crc32，与进程无关）"""
+    return zlib.crc32(token.encode('utf-8'))
+
+
+class HashingVectorizer:
+    """特征哈希向量化器（无状态，可在线程间共享）"""
+
+    def __init__(self, dim: int = DEFAULT_DIM):
+        if dim <= 0 or dim & (dim - 1):
+            raise ValueError(f"向量维度必须是2的幂: {dim}")
+        self.dim = dim
+
+    def transform_one(self, text: str, out: Optional[Any] = None) -> Any:
+        """文本 -> L2归一化的 float32 向量（空文本为零向量）"""
+        np = require_numpy()
+        vector = out if out is not None else np.zeros(self.dim, dtype=np.float32)
+        counts: dict = {}
+        for token in tokenize(text):
+            h = hash_token(token)
+            # 最高位决定符号，抵消哈希碰撞带来的偏差
+            key = h & (self.dim - 1)
+            counts[key] = counts.get(key, 0.0) + (1.0 if h & 0x80000000 else -1.0)
+        if counts:
+            keys = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            vector[keys] = np.sign(values) * np.log1p(np.abs(values))
+            norm = float(np.linalg.norm(vector))
+            if norm > 0:
+                vector /= norm
+        return vector
+
+    def transform(self, texts: Iterable[str]) -> Any:
+        """多段文本 -> (n, dim) 矩阵"""
+        np = require_numpy()
+        texts = list(texts)
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            self.transform_one(text, out=matrix[row])
+        return matrix
+
+
+class VectorIndex:
+    """
+    只追加的向量索引
+
+    向量按行保存在预分配的矩阵中，容量不足时翻倍扩容；检索为一次矩阵-向量乘法加 argpartition。
+    """
+
+    def __init__(self, dim: int = DEFAULT_DIM, capacity: int = 64):
+        np = require_numpy()
+        self.dim = dim
+        self._matrix = np.zeros((max(1, capacity), dim), dtype=np.float32)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, vectors: Any) -> None:
+        """追加一个向量或 (n, dim) 矩阵"""
+        np = require_numpy()
+        vectors = np.atleast_2d(vectors)
+        needed = self._size + len(vectors)
+        if needed > len(self._matrix):
+            capacity = len(self._matrix)
+            while capacity < needed:
+                capacity *= 2
+            matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+            matrix[:self._size] = self._matrix[:self._size]
+            self._matrix = matrix
+        self._matrix[self._size:needed] = vectors
+        self._size = needed
+
+    @property
+    def vectors(self) -> Any:
+        """已添加的向量（视图，不复制）"""
+        return self._matrix[:self._size]
+
+    def scores(self, query: Any, limit: Optional[int] = None) -> Any:
+        """查询向量与前 limit 行的相似度"""
+        return self._matrix[:self._size if limit is None else min(limit, self._size)] @ query
+
+    def search(self, query: Any, k: int, limit: Optional[int] = None,
+               min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """
+        检索最相似的 k 行
+
+        Args:
+            query: 查询向量
+            k: 返回数量
+            limit: 只在前 limit 行中检索
+            min_score: 相似度不高于该值的行不返回
+
+        Returns:
+            [(行号, 相似度)]，按相似度从高到低
+        """
+        return top_k(self.scores(query, limit), k, min_score)
+
+
+def top_k(scores: Any, k: int, min_score: float = 0.0) -> List[Tuple[int, float]]:
+    """得分最高的 k 个下标（按得分从高到低，不含得分不高于 min_score 的）"""
+    np = require_numpy()
+    if k <= 0 or len(scores) == 0:
+        return []
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+    return [(int(row), float(scores[row])) for row in candidates if scores[row] > min_score]
@@ -9,12 +9,26 @@ import os
 import sys
 import re
 import json
+import uuid
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Set, Tuple
+
+from async_runtime import run_blocking
+
+
+# 控制台编码是否已设置（只需在进程入口设置一次）
+_console_encoding_configured = False
 
 
 def setup_console_encoding():
-    """设置控制台编码为UTF-8"""
+    """设置控制台编码为UTF-8（仅在进程入口调用，重复调用无副作用）"""
+    global _console_encoding_configured
+    if _console_encoding_configured:
+        return
+    _console_encoding_configured = True
+    
     if sys.platform == "win32":
         try:
             import codecs
@@ -29,75 +43,184 @@ def setup_console_encoding():
             pass
 
 
-def clean_unprofessional_content(content: str) -> str:
-    """清理不专业的内容"""
-    # 移除表情符号
-    content = re.sub(r'[😀-🙏🌀-🗿]', '', content)
+class KeywordMatcher:
+    """
+    预编译的多关键词匹配器
+    
+    将关键词构建为前缀树形式的单个正则（共享前缀只比较一次），一次扫描即可找出文本中
+    出现的全部关键词，替代逐个关键词执行 `kw in text` 的嵌套扫描。
+    """
     
-    # 移除过于随意的表达
-    casual_expressions = [
-        r'~+',  # 波浪号
-        r'！+',  # 多个感叹号
-        r'？+',  # 多个问号
-        r'（.*?）',  # 括号内容（通常是口语化表达）
-    ]
+    def __init__(self, keywords: Iterable[str], ignore_case: bool = True):
+        self.ignore_case = ignore_case
+        # 去重并保持原有顺序
+        self.keywords: Tuple[str, ...] = tuple(dict.fromkeys(kw for kw in keywords if kw))
+        self._lookup: Dict[str, str] = {self._normalize(kw): kw for kw in self.keywords}
+        
+        flags = re.IGNORECASE if ignore_case else 0
+        # 不使用零宽前瞻：保留正则引擎按首字符快速跳过的优化，重叠匹配由 finditer 逐位置续扫处理
+        self._pattern = re.compile(self._build_trie_pattern(self._lookup.keys()), flags) if self._lookup else None
+        
+        # 同一位置只会命中最长的关键词，作为其前缀的较短关键词需要一并计入
+        self._implied: Dict[str, Tuple[str, ...]] = {
+            key: tuple(self._lookup[other] for other in self._lookup if other != key and key.startswith(other))
+            for key in self._lookup
+        }
     
-    for pattern in casual_expressions:
-        content = re.sub(pattern, '', content)
+    def _normalize(self, text: str) -> str:
+        return text.lower() if self.ignore_case else text
+    
+    @staticmethod
+    def _build_trie_pattern(keywords: Iterable[str]) -> str:
+        """将关键词构建为前缀树正则，例如 会议结束/会议总结 -> 会议(?:结束|总结)"""
+        trie: Dict[str, Any] = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = True
+        
+        def build(node: Dict[str, Any]) -> str:
+            is_end = '' in node
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char != '']
+            if not branches:
+                return ''
+            if len(branches) == 1 and not is_end:
+                return branches[0]
+            # 贪婪的可选分组优先尝试更长的关键词
+            return '(?:' + '|'.join(branches) + ')' + ('?' if is_end else '')
+        
+        return build(trie)
+    
+    def finditer(self, text: str) -> Iterator[Tuple[int, str]]:
+        """依次返回 (位置, 关键词)，包含重叠出现的关键词"""
+        if self._pattern is None or not text:
+            return
+        search = self._pattern.search
+        lookup = self._lookup
+        implied = self._implied
+        ignore_case = self.ignore_case
+        match = search(text)
+        while match is not None:
+            key = match.group().lower() if ignore_case else match.group()
+            position = match.start()
+            yield position, lookup[key]
+            for keyword in implied[key]:
+                yield position, keyword
+            # 从下一个字符继续扫描，找出与当前关键词重叠的关键词
+            match = search(text, position + 1)
+    
+    def find_all(self, text: str) -> Set[str]:
+        """返回文本中出现过的全部关键词"""
+        return {keyword for _, keyword in self.finditer(text)}
+    
+    def search(self, text: str) -> bool:
+        """文本中是否包含任一关键词"""
+        return self._pattern is not None and bool(text) and self._pattern.search(text) is not None
+    
+    def matching_lines(self, text: str) -> Set[int]:
+        """返回包含关键词的行号（从0开始），只扫描一遍文本"""
+        lines: Set[int] = set()
+        if self._pattern is None or not text:
+            return lines
+        search = self._pattern.search
+        line_number = 0
+        last_position = 0
+        match = search(text)
+        while match is not None:
+            position = match.start()
+            line_number += text.count('\n', last_position, position)
+            last_position = position
+            lines.add(line_number)
+            # 同一行只需记录一次，直接跳到下一行
+            next_line = text.find('\n', position)
+            if next_line < 0:
+                break
+            match = search(text, next_line + 1)
+        return lines
+
+
+# 会议结束的明确表达
+END_MEETING_KEYWORDS = ["会议结束", "结束会议", "会议到此结束", "今天的会议", "会议总结"]
+
+# 总结性语句
+SUMMARY_INDICATORS = ["总结一下", "总的来说", "综上所述", "会议总结", "总结会议", "会议成果", "会议结论", "会议结束"]
+
+# 表示会议还将继续的表达
+CONTINUE_KEYWORDS = ["下一位", "继续"]
+
+# 重复开场白关键词
+OPENING_KEYWORDS = [
+    "我们现在开始", "今天召开", "会议开始", "各位同事，上午好",
+    "今天我们召开", "开始这次会议", "会议正式开始", "各位同事，我们现在开始",
+    "现在开始", "开始会议", "会议现在开始", "各位同事，今天召开",
+    "今天召开会议", "召开会议", "开始这次"
+]
+
+# 一次扫描即可判断结束意图的匹配器
+_END_SIGNAL_MATCHER = KeywordMatcher(END_MEETING_KEYWORDS + SUMMARY_INDICATORS + CONTINUE_KEYWORDS)
+_END_MEETING_SET = frozenset(END_MEETING_KEYWORDS)
+_SUMMARY_SET = frozenset(SUMMARY_INDICATORS)
+_CONTINUE_SET = frozenset(CONTINUE_KEYWORDS)
+
+_OPENING_MATCHER = KeywordMatcher(OPENING_KEYWORDS)
+
+# 开场白之后恢复保留内容的行首
+_OPENING_RESUME_PREFIXES = ('作为', '根据', '基于', '关于', '针对')
+
+# 不专业内容：表情符号、波浪号、多个感叹号/问号、括号内容（通常是口语化表达）
+_UNPROFESSIONAL_PATTERN = re.compile(r'[😀-🙏🌀-🗿]|~+|！+|？+|（.*?）')
+
+# 句子（以中文句末标点结束，或文本末尾未结束的部分）
+_SENTENCE_PATTERN = re.compile(r'[^。！？]*[。！？]|[^。！？]+$')
+
+# 最终总结中不应出现的"下一位"相关表达（在单个句子内匹配）
+_NEXT_SPEAKER_PATTERN = re.compile(
+    r'下一位|继续讨论|下一轮|请.*发言|邀请.*发言|让我们.*继续|接下来',
+    re.IGNORECASE
+)
+
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def clean_unprofessional_content(content: str) -> str:
+    """清理不专业的内容"""
+    # 移除表情符号和过于随意的表达（单个预编译正则一次完成）
+    content = _UNPROFESSIONAL_PATTERN.sub('', content)
     
     # 移除多余的空格和换行
-    content = re.sub(r'\s+', ' ', content).strip()
+    content = _WHITESPACE_PATTERN.sub(' ', content).strip()
     
     return content
 
 
 def remove_next_speaker_references(content: str) -> str:
     """移除最终总结中的"下一位"相关内容"""
-    # 移除包含"下一位"、"继续讨论"、"下一轮"等字眼的句子
-    next_speaker_patterns = [
-        r'[^。！？]*下一位[^。！？]*[。！？]',
-        r'[^。！？]*继续讨论[^。！？]*[。！？]',
-        r'[^。！？]*下一轮[^。！？]*[。！？]',
-        r'[^。！？]*请.*发言[^。！？]*[。！？]',
-        r'[^。！？]*邀请.*发言[^。！？]*[。！？]',
-        r'[^。！？]*让我们.*继续[^。！？]*[。！？]',
-        r'[^。！？]*接下来[^。！？]*[。！？]',
-    ]
-    
-    for pattern in next_speaker_patterns:
-        content = re.sub(pattern, '', content, flags=re.IGNORECASE)
+    # 移除包含"下一位"、"继续讨论"、"下一轮"等字眼的完整句子
+    sentences: List[str] = []
+    for sentence in _SENTENCE_PATTERN.findall(content):
+        if sentence[-1] in '。！？' and _NEXT_SPEAKER_PATTERN.search(sentence):
+            continue
+        sentences.append(sentence)
+    content = ''.join(sentences)
     
     # 移除多余的空格和换行
-    content = re.sub(r'\s+', ' ', content).strip()
+    content = _WHITESPACE_PATTERN.sub(' ', content).strip()
     
     return content
 
 
 def check_ceo_wants_to_end_meeting(content: str) -> bool:
     """检查CEO是否想要结束会议"""
-    content_lower = content.lower()
-    
-    # 检查结束会议的关键词
-    end_keywords = [
-        "会议结束", "结束会议", "会议到此结束", "今天的会议", "会议总结",
-        "会议结束", "会议结束", "会议结束", "会议结束", "会议结束"
-    ]
+    found = _END_SIGNAL_MATCHER.find_all(content)
     
     # 检查是否有结束会议的明确表达
-    for keyword in end_keywords:
-        if keyword in content_lower:
-            return True
-    
-    # 检查是否有总结性语句
-    summary_indicators = [
-        "总结一下", "总的来说", "综上所述", "会议总结", "总结会议",
-        "会议成果", "会议结论", "会议结束", "会议结束", "会议结束"
-    ]
-    
-    summary_count = sum(1 for indicator in summary_indicators if indicator in content_lower)
+    if found & _END_MEETING_SET:
+        return True
     
     # 如果有多于2个总结性指标，且没有邀请下一位发言，可能想要结束会议
-    if summary_count >= 2 and "下一位" not in content_lower and "继续" not in content_lower:
+    summary_count = len(found & _SUMMARY_SET)
+    if summary_count >= 2 and not found & _CONTINUE_SET:
         return True
     
     return False
@@ -107,31 +230,19 @@ def post_process_ceo_content(content: str, is_meeting_started: bool = True,
                            is_final_summary: bool = False) -> str:
     """后处理CEO内容"""
     if is_meeting_started:
-        # 检查并移除重复的开场白
-        opening_keywords = [
-            "我们现在开始", "今天召开", "会议开始", "各位同事，上午好",
-            "今天我们召开", "开始这次会议", "会议正式开始", "各位同事，我们现在开始",
-            "现在开始", "开始会议", "会议现在开始", "各位同事，今天召开",
-            "今天召开会议", "召开会议", "开始这次", "会议正式开始"
-        ]
+        # 检查并移除重复的开场白（一次扫描找出所有包含开场白关键词的行）
+        opening_lines = _OPENING_MATCHER.matching_lines(content)
         
         lines = content.split('\n')
         filtered_lines = []
         skip_opening = False
         
-        for line in lines:
-            line_lower = line.lower().strip()
-            
-            if any(kw in line_lower for kw in opening_keywords):
+        for line_number, line in enumerate(lines):
+            if line_number in opening_lines:
                 skip_opening = True
                 continue
             
-            if skip_opening and (line.strip() == '' or 
-                               line.startswith('作为') or 
-                               line.startswith('根据') or
-                               line.startswith('基于') or
-                               line.startswith('关于') or
-                               line.startswith('针对')):
+            if skip_opening and (line.strip() == '' or line.startswith(_OPENING_RESUME_PREFIXES)):
                 skip_opening = False
             
             if not skip_opening:
@@ -177,6 +288,106 @@ def safe_get(dictionary: dict, key: str, default: any = None) -> any:
     return dictionary.get(key, default) if dictionary else default
 
 
+def extract_token_usage(usage: Any) -> Dict[str, int]:
+    """
+    从模型响应的 usage 字段提取令牌用量
+    
+    兼容两种缓存字段格式：DeepSeek 的 prompt_cache_hit_tokens/prompt_cache_miss_tokens，
+    以及 OpenAI 的 prompt_tokens_details.cached_tokens。usage 可以是字典或对象。
+    
+    Returns:
+        包含 prompt_tokens、completion_tokens、cached_tokens、uncached_tokens 的字典
+    """
+    def read(source: Any, key: str) -> Any:
+        if source is None:
+            return None
+        if isinstance(source, dict):
+            return source.get(key)
+        return getattr(source, key, None)
+    
+    prompt_tokens = int(read(usage, 'prompt_tokens') or 0)
+    completion_tokens = int(read(usage, 'completion_tokens') or 0)
+    
+    cached_tokens = read(usage, 'prompt_cache_hit_tokens')
+    if cached_tokens is None:
+        cached_tokens = read(read(usage, 'prompt_tokens_details'), 'cached_tokens')
+    cached_tokens = int(cached_tokens or 0)
+    
+    uncached_tokens = read(usage, 'prompt_cache_miss_tokens')
+    if uncached_tokens is None:
+        uncached_tokens = max(0, prompt_tokens - cached_tokens)
+    
+    return {
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'cached_tokens': cached_tokens,
+        'uncached_tokens': int(uncached_tokens)
+    }
+
+
+def atomic_write_text(path: str, text: str) -> None:
+    """
+    原子写入文本文件
+    
+    先写入同一目录下的临时文件并刷新到磁盘，再重命名覆盖目标文件，
+    读取方只会看到完整的旧文件或新文件，进程中途退出也不会留下写了一半的文件。
+    eventlet/gevent 模式下在原生线程中写入，fsync 不阻塞事件循环。
+    """
+    run_blocking(_atomic_write_text, path, text)
+
+
+def _atomic_write_text(path: str, text: str) -> None:
+    """原子写入文本文件（在当前线程中完成）"""
+    # 不使用 mkstemp，使新文件与直接写入时一样按 umask 设置权限
+    temp_path = os.path.join(os.path.dirname(path) or '.', f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+    try:
+        with open(temp_path, 'x', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(path: str, data: Any) -> None:
+    """原子写入JSON文件（协程模式下序列化也在原生线程中进行，data 不能在写入期间被修改）"""
+    run_blocking(_atomic_write_json, path, data)
+
+
+def _atomic_write_json(path: str, data: Any) -> None:
+    _atomic_write_text(path, json.dumps(data, ensure_ascii=False, indent=2))
+
+
+# 会议索引文件的进程内锁（多个会议并发保存时串行更新索引）
+_meeting_index_lock = threading.Lock()
+
+
+@contextmanager
+def _locked_meeting_index(save_dir: str):
+    """
+    串行化会议索引的读-改-写：进程内使用线程锁，支持时再加文件锁以兼容多进程
+
+    等待文件锁（其他进程正在更新索引）在原生线程中进行，协程模式下不阻塞事件循环；
+    flock 属于打开的文件，在原生线程中获取、关闭文件时释放
+    """
+    with _meeting_index_lock:
+        lock_file = open(os.path.join(save_dir, 'meeting_index.lock'), 'a')
+        try:
+            try:
+                import fcntl
+                run_blocking(fcntl.flock, lock_file, fcntl.LOCK_EX)
+            except ImportError:
+                pass  # Windows下仅使用进程内锁
+            yield
+        finally:
+            lock_file.close()
+
+
 def save_meeting_content(meeting_data: Dict[str, Any], save_dir: str) -> str:
     """
     保存会议内容到文件
@@ -210,58 +421,54 @@ def save_meeting_content(meeting_data: Dict[str, Any], save_dir: str) -> str:
             'total_rounds': meeting_data.get('current_round', 0),
             'total_messages': len(meeting_data.get('messages', [])),
             'participants': meeting_data.get('participants', []),
+            'token_usage': meeting_data.get('token_usage'),
             'save_timestamp': datetime.now().isoformat()
         }
         
         # 保存会议基本信息为JSON
-        info_file = os.path.join(meeting_dir, 'meeting_info.json')
-        with open(info_file, 'w', encoding='utf-8') as f:
-            json.dump(meeting_info, f, ensure_ascii=False, indent=2)
+        # 所有文件均先写临时文件再重命名，中途失败不会留下不完整的文件
+        atomic_write_json(os.path.join(meeting_dir, 'meeting_info.json'), meeting_info)
         
         # 保存会议消息记录
-        messages_file = os.path.join(meeting_dir, 'messages.json')
-        with open(messages_file, 'w', encoding='utf-8') as f:
-            json.dump(meeting_data.get('messages', []), f, ensure_ascii=False, indent=2)
+        atomic_write_json(os.path.join(meeting_dir, 'messages.json'), meeting_data.get('messages', []))
         
         # 保存会议总结
         summary = meeting_data.get('summary', {})
         if summary:
-            summary_file = os.path.join(meeting_dir, 'summary.json')
-            with open(summary_file, 'w', encoding='utf-8') as f:
-                json.dump(summary, f, ensure_ascii=False, indent=2)
+            atomic_write_json(os.path.join(meeting_dir, 'summary.json'), summary)
+        
+        # 保存模型调用录制（录制模式）
+        cassette = meeting_data.get('cassette')
+        if cassette:
+            atomic_write_json(os.path.join(meeting_dir, 'cassette.json'), cassette)
         
         # 保存可读的会议记录文本
-        transcript_file = os.path.join(meeting_dir, 'transcript.txt')
-        with open(transcript_file, 'w', encoding='utf-8') as f:
-            f.write(f"多智能体会议记录\n")
-            f.write(f"会议主题：{meeting_info['topic']}\n")
-            f.write(f"会议背景：{meeting_info['background']}\n")
-            f.write(f"会议ID：{meeting_info['meeting_id']}\n")
-            f.write(f"保存时间：{meeting_info['save_timestamp']}\n")
-            f.write(f"总轮次：{meeting_info['total_rounds']}\n")
-            f.write(f"总发言数：{meeting_info['total_messages']}\n")
-            f.write(f"参与者：{', '.join(meeting_info['participants'])}\n")
-            f.write("\n=== 会议内容 ===\n\n")
-            
-            # 写入消息记录
-            for msg in meeting_data.get('messages', []):
-                timestamp = datetime.fromtimestamp(msg.get('timestamp', 0)).strftime('%H:%M:%S')
-                f.write(f"[{timestamp}] {msg.get('role', 'Unknown')}: {msg.get('content', '')}\n\n")
-            
-            # 写入会议总结
-            if summary:
-                f.write("\n=== 会议总结 ===\n\n")
-                f.write(summary.get('summary_content', '无总结内容'))
+        parts = [
+            "多智能体会议记录\n",
+            f"会议主题：{meeting_info['topic']}\n",
+            f"会议背景：{meeting_info['background']}\n",
+            f"会议ID：{meeting_info['meeting_id']}\n",
+            f"保存时间：{meeting_info['save_timestamp']}\n",
+            f"总轮次：{meeting_info['total_rounds']}\n",
+            f"总发言数：{meeting_info['total_messages']}\n",
+            f"参与者：{', '.join(meeting_info['participants'])}\n",
+            "\n=== 会议内容 ===\n\n"
+        ]
+        
+        # 写入消息记录
+        for msg in meeting_data.get('messages', []):
+            timestamp = datetime.fromtimestamp(msg.get('timestamp', 0)).strftime('%H:%M:%S')
+            parts.append(f"[{timestamp}] {msg.get('role', 'Unknown')}: {msg.get('content', '')}\n\n")
+        
+        # 写入会议总结
+        if summary:
+            parts.append("\n=== 会议总结 ===\n\n")
+            parts.append(summary.get('summary_content', '无总结内容'))
+        
+        atomic_write_text(os.path.join(meeting_dir, 'transcript.txt'), ''.join(parts))
         
         # 保存索引文件（用于快速查找所有会议）
         index_file = os.path.join(save_dir, 'meeting_index.json')
-        index_data = []
-        if os.path.exists(index_file):
-            try:
-                with open(index_file, 'r', encoding='utf-8') as f:
-                    index_data = json.load(f)
-            except:
-                index_data = []
         
         # 添加新会议到索引
         index_entry = {
@@ -271,13 +478,23 @@ def save_meeting_content(meeting_data: Dict[str, Any], save_dir: str) -> str:
             'meeting_dir': os.path.basename(meeting_dir),
             'total_rounds': meeting_info['total_rounds'],
             'total_messages': meeting_info['total_messages'],
-            'participants': meeting_info['participants']
+            'participants': meeting_info['participants'],
+            'total_tokens': (meeting_info['token_usage'] or {}).get('total', {}).get('total_tokens')
         }
-        index_data.append(index_entry)
         
-        # 保存更新后的索引
-        with open(index_file, 'w', encoding='utf-8') as f:
-            json.dump(index_data, f, ensure_ascii=False, indent=2)
+        with _locked_meeting_index(save_dir):
+            index_data = []
+            if os.path.exists(index_file):
+                try:
+                    with open(index_file, 'r', encoding='utf-8') as f:
+                        index_data = json.load(f)
+                except:
+                    index_data = []
+            
+            index_data.append(index_entry)
+            
+            # 保存更新后的索引
+            atomic_write_json(index_file, index_data)
         
         return meeting_dir
         
@@ -35,6 +35,9 @@ createApp({
             // WebSocket
             socket: null,
             
+            // 等待中的后台任务：job_id -> { resolve, reject }
+            jobWaiters: {},
+            
             // API配置 - 使用相对路径自动适应当前域名
             apiBase: '',
             
@@ -169,6 +172,14 @@ createApp({
             }
         },
         
+        // 发言请求的幂等键（同一次发言的重试使用同一个键，服务端不会重复生成）
+        newIdempotencyKey(prefix) {
+            const random = (window.crypto && window.crypto.randomUUID)
+                ? window.crypto.randomUUID()
+                : `${Date.now()}_${Math.random().toString(36).slice(2)}`;
+            return `${prefix}_${random}`;
+        },
+        
         // 带重试的API调用
         async apiCall(url, options = {}, retries = 3) {
             for (let i = 0; i < retries; i++) {
@@ -183,6 +194,17 @@ createApp({
                         }
                     });
                     
+                    if (response.status === 429) {
+                        // 服务端过载或超出配额：按 Retry-After 等待后重试
+                        const retryAfter = parseInt(response.headers.get('Retry-After'), 10) || (i + 1);
+                        this.log('warn', `服务繁忙，${retryAfter}秒后重试: ${url}`, { attempt: i + 1 });
+                        if (i === retries - 1) {
+                            throw new Error('服务繁忙，请稍后重试');
+                        }
+                        await new Promise(resolve => setTimeout(resolve, retryAfter * 1000));
+                        continue;
+                    }
+                    
                     if (!response.ok) {
                         throw new Error(`HTTP ${response.status}: ${response.statusText}`);
                     }
@@ -461,6 +483,11 @@ createApp({
                     this.handleNewMessage(message);
                 });
                 
+                // 后台任务进度（结束会议等）
+                this.socket.on('job_update', (job) => {
+                    this.handleJobUpdate(job);
+                });
+                
                 // 其他错误事件
                 this.socket.on('error', (error) => {
                     this.log('error', 'WebSocket错误', error);
@@ -501,6 +528,10 @@ createApp({
                             this.handleNewMessage(message);
                         });
                         
+                        this.socket.on('job_update', (job) => {
+                            this.handleJobUpdate(job);
+                        });
+                        
                     } catch (fallbackError) {
                         this.log('error', '降级连接也失败', fallbackError);
                         this.showNotification('无法建立任何连接，请检查网络和服务器状态', 'error');
@@ -544,9 +575,16 @@ createApp({
             
             try {
                 const data = await this.apiCall(`${this.apiBase}/api/ceo_speak`, {
-                    method: 'POST'
+                    method: 'POST',
+                    headers: { 'Idempotency-Key': this.newIdempotencyKey('ceo') }
                 });
                 
+                if (data.deduplicated) {
+                    // 同一发言已由另一个请求处理，由该请求继续推进会议
+                    this.log('info', 'CEO发言请求重复，忽略', data);
+                    return;
+                }
+                
                 if (data.status === 'success') {
                     // 消息已通过WebSocket添加，不需要重复添加
                     this.currentRound = data.current_round;
@@ -574,6 +612,13 @@ createApp({
                         setTimeout(() => {
                             this.generateSummary();
                         }, 1000);
+                    } else if (data.breakout) {
+                        // 大规模会议：延迟后进行分组讨论
+                        setTimeout(() => {
+                            if (!this.showSummary && this.meetingStarted) {
+                                this.startBreakoutRound();
+                            }
+                        }, 1000);
                     } else {
                         // 延迟后让下一个智能体发言
                         setTimeout(() => {
@@ -604,6 +649,86 @@ createApp({
             }
         },
         
+        async startBreakoutRound() {
+            // 检查会议是否已结束
+            if (this.showSummary || !this.meetingStarted) {
+                this.log('info', '会议已结束，停止分组讨论');
+                return;
+            }
+            
+            this.currentSpeakerId = 0;
+            this.isThinking = true;
+            this.log('info', '分组讨论开始');
+            
+            try {
+                const data = await this.apiCall(`${this.apiBase}/api/breakout_round`, {
+                    method: 'POST',
+                    headers: { 'Idempotency-Key': this.newIdempotencyKey('breakout') }
+                });
+                
+                if (data.deduplicated) {
+                    // 同一轮分组讨论已由另一个请求处理，由该请求继续推进会议
+                    this.log('info', '分组讨论请求重复，忽略', data);
+                    return;
+                }
+                
+                if (data.status === 'success') {
+                    // 各组发言已通过WebSocket添加，不需要重复添加
+                    this.currentRound = data.current_round;
+                    this.isThinking = false;
+                    
+                    this.log('info', '分组讨论完成', {
+                        round: data.current_round,
+                        groups: data.groups.length,
+                        messages: data.messages.length
+                    });
+                    
+                    this.$nextTick(() => {
+                        this.scrollToBottom();
+                    });
+                    
+                    // 分组讨论结束，CEO根据各组纪要总结
+                    setTimeout(() => {
+                        if (!this.showSummary && this.meetingStarted) {
+                            this.startCeoSpeak();
+                        }
+                    }, 1000);
+                } else {
+                    // 达到最大轮次限制或令牌预算时由CEO做最终总结
+                    if (data.should_ceo_speak) {
+                        this.log('info', '分组讨论停止，触发CEO最终总结', data);
+                        this.isThinking = false;
+                        setTimeout(() => {
+                            if (!this.showSummary && this.meetingStarted) {
+                                this.startCeoSpeak();
+                            }
+                        }, 1000);
+                        return;
+                    }
+                    
+                    // 检查是否是会议结束错误
+                    if (data.error && data.error.includes('会议正在结束')) {
+                        this.log('info', '会议正在结束，停止分组讨论');
+                        this.isThinking = false;
+                        return;
+                    }
+                    throw new Error(data.error || '分组讨论失败');
+                }
+            } catch (error) {
+                this.log('error', '分组讨论失败', error);
+                this.showNotification('分组讨论失败：' + error.message, 'error');
+                this.isThinking = false;
+                // 尝试继续会议
+                setTimeout(() => {
+                    if (!this.showSummary && this.meetingStarted) {
+                        this.waitingForCeo = true;
+                        this.currentSpeakerId = 0;
+                        this.startCeoTimer();
+                    }
+                }, 2000);
+            }
+        },
+        
         async nextAgentSpeak(agentId) {
             // 检查会议是否已结束
             if (this.showSummary || !this.meetingStarted) {
@@ -617,9 +742,16 @@ createApp({
             
             try {
                 const data = await this.apiCall(`${this.apiBase}/api/agent_speak/${agentId}`, {
-                    method: 'POST'
+                    method: 'POST',
+                    headers: { 'Idempotency-Key': this.newIdempotencyKey(`agent_${agentId}`) }
                 });
                 
+                if (data.deduplicated) {
+                    // 同一发言已由另一个请求处理，由该请求继续推进会议
+                    this.log('info', '智能体发言请求重复，忽略', data);
+                    return;
+                }
+                
                 if (data.status === 'success') {
                     // 消息已通过WebSocket添加，不需要重复添加
                     this.currentRound = data.current_round;
@@ -783,18 +915,24 @@ createApp({
                 this.isThinking = false;
                 this.currentSpeakerId = null;
                 
+                // 结束会议立即返回任务ID，总结在后台生成，进度和结果通过 job_update 事件推送
                 const data = await this.apiCall(`${this.apiBase}/api/end_meeting`, {
                     method: 'POST'
                 });
                 
-                if (data.status === 'success') {
-                    this.summary = data.summary;
-                    this.showSummary = true;
-                    this.log('info', '会议总结生成成功');
-                    this.showNotification('会议总结生成成功！', 'success');
-                } else {
+                if (data.status !== 'success') {
                     throw new Error(data.error || '生成总结失败');
                 }
+                
+                const job = await this.waitForJob(data.job_id, data.job);
+                if (job.status !== 'succeeded') {
+                    throw new Error(job.error || '生成总结失败');
+                }
+                
+                this.summary = job.result.summary;
+                this.showSummary = true;
+                this.log('info', '会议总结生成成功');
+                this.showNotification('会议总结生成成功！', 'success');
             } catch (error) {
                 this.log('error', '生成总结失败', error);
                 this.showNotification('生成总结失败：' + error.message, 'error');
@@ -803,6 +941,49 @@ createApp({
             }
         },
         
+        // 等待后台任务完成：优先使用 job_update 推送，同时长轮询任务状态，避免错过推送
+        waitForJob(jobId, initialJob) {
+            return new Promise((resolve, reject) => {
+                this.jobWaiters[jobId] = { resolve, reject };
+                // job_update 只推送给订阅了该任务的连接
+                if (this.socket) {
+                    this.socket.emit('watch_job', { job_id: jobId });
+                }
+                if (initialJob) {
+                    this.handleJobUpdate(initialJob);
+                }
+                
+                const poll = async () => {
+                    while (this.jobWaiters[jobId]) {
+                        try {
+                            const data = await this.apiCall(`${this.apiBase}/api/jobs/${jobId}?wait=20`);
+                            this.handleJobUpdate(data.job);
+                        } catch (error) {
+                            delete this.jobWaiters[jobId];
+                            reject(error);
+                        }
+                    }
+                };
+                poll();
+            });
+        },
+        
+        handleJobUpdate(job) {
+            const waiter = this.jobWaiters[job.job_id];
+            if (!waiter) {
+                return;
+            }
+            
+            if (job.stage) {
+                this.loadingText = `${job.stage}（${Math.round(job.progress * 100)}%）`;
+            }
+            
+            if (job.status === 'succeeded' || job.status === 'failed') {
+                delete this.jobWaiters[job.job_id];
+                waiter.resolve(job);
+            }
+        },
+        
         async downloadTranscript() {
             this.log('info', '开始下载会议记录');
             try {